@@ -1,14 +1,18 @@
-import sqlite3
+import json
+from typing import Optional
+
 import pandas as pd
 import numpy as np
-from pathlib import Path
-import json
 
-def analyze_addons_amenities():
+from analytics_frames import AnalyticsFrames, order_by, shared_frames, sql_round
+from rvezy_db import PROCESSED_DIR
+
+def analyze_addons_amenities(frames: Optional[AnalyticsFrames] = None):
     """Analyze add-ons and amenities to identify revenue opportunities and requirements"""
     
-    db_path = Path("/home/chris/rvezy/data/processed/rvezy_listings.db")
-    conn = sqlite3.connect(db_path)
+    frames = frames or shared_frames()
+    listings = frames.listings
+    priced = frames.priced
     
     print("=== RVezy Add-Ons and Amenities Analysis ===\n")
     
@@ -16,22 +20,23 @@ def analyze_addons_amenities():
     print("=== Add-On Revenue Opportunities ===")
     
     # Clean up add-on data (remove outliers)
-    query_addons = """
-    SELECT 
-        name,
-        COUNT(*) as frequency,
-        ROUND(AVG(CASE WHEN price < 500 THEN price END), 2) as avg_price,
-        ROUND(MIN(CASE WHEN price > 0 AND price < 500 THEN price END), 2) as min_price,
-        ROUND(MAX(CASE WHEN price < 500 THEN price END), 2) as max_price,
-        ROUND(AVG(CASE WHEN price < 500 THEN price END) * 0.3, 2) as avg_revenue_30pct_attach
-    FROM addons
-    WHERE name != ''
-    GROUP BY name
-    HAVING COUNT(*) >= 10
-    ORDER BY frequency DESC
-    """
-    
-    df_addons = pd.read_sql_query(query_addons, conn)
+    addons = frames.addons[frames.addons['name'].notna() & (frames.addons['name'] != '')]
+    price = addons['price']
+    df_addons = addons.assign(
+        capped=price.where(price < 500),
+        positive=price.where((price > 0) & (price < 500)),
+    ).groupby('name').agg(
+        frequency=('listing_id', 'size'),
+        avg_price=('capped', 'mean'),
+        min_price=('positive', 'min'),
+        max_price=('capped', 'max'),
+    ).reset_index()
+    df_addons['avg_revenue_30pct_attach'] = sql_round(df_addons['avg_price'] * 0.3, 2)
+    for column in ['avg_price', 'min_price', 'max_price']:
+        df_addons[column] = sql_round(df_addons[column], 2)
+    df_addons = df_addons[df_addons['frequency'] >= 10]
+    df_addons = frames.sql_types(order_by(df_addons, ['frequency'], ascending=False).reset_index(drop=True),
+                                 integers=['frequency'])
     
     print("Most Common Add-Ons (min 10 listings):")
     print(df_addons.to_string(index=False))
@@ -45,23 +50,16 @@ def analyze_addons_amenities():
     # 2. Add-ons by RV Type
     print("\n=== Add-On Adoption by RV Type ===")
     
-    query_addon_by_type = """
-    SELECT 
-        l.rv_type,
-        a.name as addon_name,
-        COUNT(*) as count,
-        ROUND(AVG(a.price), 2) as avg_price
-    FROM listings l
-    JOIN addons a ON l.listing_id = a.listing_id
-    WHERE l.rv_type IS NOT NULL
-    AND a.name IN ('Propane Refill Prepayment', 'Emptying Septic Prepayment', 
-                   'Portable BBQ', 'Bedding and Linens', 'Portable Generator')
-    AND a.price < 500
-    GROUP BY l.rv_type, a.name
-    ORDER BY l.rv_type, count DESC
-    """
-    
-    df_addon_type = pd.read_sql_query(query_addon_by_type, conn)
+    addon_names = ['Propane Refill Prepayment', 'Emptying Septic Prepayment',
+                   'Portable BBQ', 'Bedding and Linens', 'Portable Generator']
+    typed_addons = listings.loc[listings['rv_type'].notna(), ['listing_id', 'rv_type']].merge(
+        frames.addons[frames.addons['name'].isin(addon_names) & (frames.addons['price'] < 500)], on='listing_id')
+    df_addon_type = typed_addons.rename(columns={'name': 'addon_name'}).groupby(['rv_type', 'addon_name']).agg(
+        count=('listing_id', 'size'),
+        avg_price=('price', 'mean'),
+    ).reset_index()
+    df_addon_type['avg_price'] = sql_round(df_addon_type['avg_price'], 2)
+    df_addon_type = frames.sql_types(order_by(df_addon_type, ['rv_type', 'count'], [True, False]), integers=['count'])
     
     # Pivot for better visualization
     addon_pivot = df_addon_type.pivot_table(
@@ -77,25 +75,20 @@ def analyze_addons_amenities():
     # 3. Amenity Analysis
     print("\n=== Essential Amenities Analysis ===")
     
-    query_amenities = """
-    SELECT 
-        a.name,
-        COUNT(*) as total_listings,
-        ROUND(COUNT(*) * 100.0 / (SELECT COUNT(*) FROM listings), 1) as adoption_pct,
-        AVG(l.base_price) as avg_price_with,
-        (SELECT AVG(base_price) FROM listings WHERE listing_id NOT IN 
-            (SELECT listing_id FROM listing_amenities WHERE amenity_id = a.amenity_id)) as avg_price_without
-    FROM amenities a
-    JOIN listing_amenities la ON a.amenity_id = la.amenity_id
-    JOIN listings l ON la.listing_id = l.listing_id
-    WHERE l.base_price IS NOT NULL
-    GROUP BY a.amenity_id, a.name
-    HAVING COUNT(*) >= 100
-    ORDER BY adoption_pct DESC
-    LIMIT 20
-    """
-    
-    df_amenities = pd.read_sql_query(query_amenities, conn)
+    # Average price of the priced listings without each amenity, from the
+    # totals over all priced listings less those over the ones with it
+    priced_amenities = frames.amenities.merge(priced[['listing_id', 'base_price']], on='listing_id')
+    df_amenities = priced_amenities.groupby(['amenity_id', 'name']).agg(
+        total_listings=('listing_id', 'size'),
+        avg_price_with=('base_price', 'mean'),
+        price_with=('base_price', 'sum'),
+    ).reset_index()
+    df_amenities.insert(3, 'adoption_pct', sql_round(df_amenities['total_listings'] * 100.0 / len(listings), 1))
+    listings_without = (len(priced) - df_amenities['total_listings']).replace(0, np.nan)
+    df_amenities['avg_price_without'] = (priced['base_price'].sum() - df_amenities['price_with']) / listings_without
+    df_amenities = df_amenities[df_amenities['total_listings'] >= 100].drop(columns=['amenity_id', 'price_with'])
+    df_amenities = frames.sql_types(order_by(df_amenities, ['adoption_pct'], ascending=False).head(20)
+                                    .reset_index(drop=True), integers=['total_listings'])
     
     # Calculate price premium for amenities
     df_amenities['price_premium'] = ((df_amenities['avg_price_with'] / df_amenities['avg_price_without']) - 1) * 100
@@ -106,52 +99,31 @@ def analyze_addons_amenities():
     # 4. Amenities by Price Tier
     print("\n=== Amenity Requirements by Price Tier ===")
     
-    query_tier_amenities = """
-    WITH price_tiers AS (
-        SELECT 
-            listing_id,
-            base_price,
-            CASE 
-                WHEN base_price < 125 THEN 'Budget (<$125)'
-                WHEN base_price < 175 THEN 'Mid ($125-175)'
-                WHEN base_price < 250 THEN 'Upper ($175-250)'
-                ELSE 'Premium ($250+)'
-            END as price_tier
-        FROM listings
-        WHERE base_price IS NOT NULL
-    ),
-    tier_amenity_counts AS (
-        SELECT 
-            pt.price_tier,
-            a.name,
-            COUNT(DISTINCT la.listing_id) as listings_with,
-            COUNT(DISTINCT pt.listing_id) as total_in_tier
-        FROM price_tiers pt
-        LEFT JOIN listing_amenities la ON pt.listing_id = la.listing_id
-        LEFT JOIN amenities a ON la.amenity_id = a.amenity_id
-        WHERE a.name IN (
-            'Refrigerator', 'Kitchen sink', 'Heater', 'Air conditioner',
-            'Toilet', 'Inside shower', 'TV & DVD', 'Microwave',
-            'Camping chairs', 'Solar', 'Backup camera', 'Pet friendly'
-        )
-        GROUP BY pt.price_tier, a.name
+    tiers = ['Budget (<$125)', 'Mid ($125-175)', 'Upper ($175-250)', 'Premium ($250+)']
+    price = priced['base_price']
+    price_tiers = priced[['listing_id']].assign(
+        price_tier=np.select([price < 125, price < 175, price < 250], tiers[:3], default=tiers[3]))
+    tier_amenities = price_tiers.merge(frames.amenities[frames.amenities['name'].isin([
+        'Refrigerator', 'Kitchen sink', 'Heater', 'Air conditioner',
+        'Toilet', 'Inside shower', 'TV & DVD', 'Microwave',
+        'Camping chairs', 'Solar', 'Backup camera', 'Pet friendly'
+    ])], on='listing_id')
+    tier_amenity_counts = tier_amenities.groupby(['price_tier', 'name']).agg(
+        listings_with=('listing_id', 'nunique'),
+        total_in_tier=('listing_id', 'nunique'),
     )
-    SELECT 
-        name as amenity,
-        ROUND(100.0 * SUM(CASE WHEN price_tier = 'Budget (<$125)' THEN listings_with END) / 
-            MAX(CASE WHEN price_tier = 'Budget (<$125)' THEN total_in_tier END), 0) as budget_pct,
-        ROUND(100.0 * SUM(CASE WHEN price_tier = 'Mid ($125-175)' THEN listings_with END) / 
-            MAX(CASE WHEN price_tier = 'Mid ($125-175)' THEN total_in_tier END), 0) as mid_pct,
-        ROUND(100.0 * SUM(CASE WHEN price_tier = 'Upper ($175-250)' THEN listings_with END) / 
-            MAX(CASE WHEN price_tier = 'Upper ($175-250)' THEN total_in_tier END), 0) as upper_pct,
-        ROUND(100.0 * SUM(CASE WHEN price_tier = 'Premium ($250+)' THEN listings_with END) / 
-            MAX(CASE WHEN price_tier = 'Premium ($250+)' THEN total_in_tier END), 0) as premium_pct
-    FROM tier_amenity_counts
-    GROUP BY amenity
-    ORDER BY premium_pct DESC
-    """
-    
-    df_tier_amenities = pd.read_sql_query(query_tier_amenities, conn)
+    tier_pct = sql_round(100.0 * tier_amenity_counts['listings_with'] / tier_amenity_counts['total_in_tier'], 0)
+    tier_pct = tier_pct.unstack('price_tier').reindex(columns=tiers)
+    df_tier_amenities = pd.DataFrame({
+        'amenity': tier_pct.index,
+        'budget_pct': tier_pct[tiers[0]].values,
+        'mid_pct': tier_pct[tiers[1]].values,
+        'upper_pct': tier_pct[tiers[2]].values,
+        'premium_pct': tier_pct[tiers[3]].values,
+    })
+    # Ties come in reverse name order, as SQLite returns them from its grouping
+    df_tier_amenities = frames.sql_types(order_by(df_tier_amenities, ['premium_pct', 'amenity'], ascending=False)
+                                         .reset_index(drop=True))
     
     print("\nAmenity Adoption by Price Tier (% of listings in tier):")
     print(df_tier_amenities.to_string(index=False))
@@ -160,35 +132,16 @@ def analyze_addons_amenities():
     print("\n=== Missing Amenities Impact ===")
     
     # Find listings missing key amenities
-    query_missing = """
-    WITH essential_amenities AS (
-        SELECT amenity_id, name 
-        FROM amenities 
-        WHERE name IN ('Air conditioner', 'Microwave', 'TV & DVD', 'Camping chairs')
-    ),
-    listing_amenity_count AS (
-        SELECT 
-            l.listing_id,
-            l.base_price,
-            l.num_reviews,
-            COUNT(DISTINCT ea.amenity_id) as essential_count
-        FROM listings l
-        LEFT JOIN listing_amenities la ON l.listing_id = la.listing_id
-        LEFT JOIN essential_amenities ea ON la.amenity_id = ea.amenity_id
-        WHERE l.base_price IS NOT NULL
-        GROUP BY l.listing_id
-    )
-    SELECT 
-        essential_count as num_essential_amenities,
-        COUNT(*) as listing_count,
-        AVG(base_price) as avg_price,
-        AVG(num_reviews) as avg_reviews
-    FROM listing_amenity_count
-    GROUP BY essential_count
-    ORDER BY essential_count DESC
-    """
-    
-    df_missing = pd.read_sql_query(query_missing, conn)
+    essential = frames.amenities[frames.amenities['name'].isin(
+        ['Air conditioner', 'Microwave', 'TV & DVD', 'Camping chairs'])]
+    essential_count = essential.groupby('listing_id')['amenity_id'].nunique()
+    listing_amenity_count = priced.assign(
+        essential_count=priced['listing_id'].map(essential_count).fillna(0).astype('int64'))
+    df_missing = listing_amenity_count.groupby('essential_count').agg(
+        listing_count=('listing_id', 'size'),
+        avg_price=('base_price', 'mean'),
+        avg_reviews=('num_reviews', 'mean'),
+    ).sort_index(ascending=False).reset_index().rename(columns={'essential_count': 'num_essential_amenities'})
     
     print("\nImpact of Essential Amenities on Performance:")
     print("(Essential: AC, Microwave, TV & DVD, Camping chairs)")
@@ -197,21 +150,20 @@ def analyze_addons_amenities():
     # 6. Pet-Friendly Analysis
     print("\n=== Pet-Friendly Premium Analysis ===")
     
-    query_pet = """
-    SELECT 
-        l.rv_type,
-        COUNT(CASE WHEN l.pet_friendly = 1 THEN 1 END) as pet_friendly_count,
-        COUNT(*) as total_count,
-        ROUND(COUNT(CASE WHEN l.pet_friendly = 1 THEN 1 END) * 100.0 / COUNT(*), 1) as pet_friendly_pct,
-        AVG(CASE WHEN l.pet_friendly = 1 THEN l.base_price END) as avg_price_pet,
-        AVG(CASE WHEN l.pet_friendly = 0 THEN l.base_price END) as avg_price_no_pet
-    FROM listings l
-    WHERE l.rv_type IS NOT NULL
-    AND l.base_price IS NOT NULL
-    GROUP BY l.rv_type
-    """
-    
-    df_pet = pd.read_sql_query(query_pet, conn)
+    typed = priced[priced['rv_type'].notna()]
+    pet_friendly = typed['pet_friendly'] == 1
+    df_pet = typed.assign(
+        pet=pet_friendly,
+        price_pet=typed['base_price'].where(pet_friendly),
+        price_no_pet=typed['base_price'].where(typed['pet_friendly'] == 0),
+    ).groupby('rv_type').agg(
+        pet_friendly_count=('pet', 'sum'),
+        total_count=('listing_id', 'size'),
+        avg_price_pet=('price_pet', 'mean'),
+        avg_price_no_pet=('price_no_pet', 'mean'),
+    ).reset_index()
+    df_pet.insert(3, 'pet_friendly_pct', sql_round(df_pet['pet_friendly_count'] * 100.0 / df_pet['total_count'], 1))
+    df_pet = frames.sql_types(df_pet, integers=['pet_friendly_count', 'total_count'])
     df_pet['pet_premium'] = ((df_pet['avg_price_pet'] / df_pet['avg_price_no_pet']) - 1) * 100
     
     print("Pet-Friendly Analysis by RV Type:")
@@ -251,12 +203,10 @@ def analyze_addons_amenities():
         'pet_analysis': df_pet.to_dict('records')
     }
     
-    with open('/home/chris/rvezy/data/processed/addon_amenity_analysis.json', 'w') as f:
+    with open(PROCESSED_DIR / 'addon_amenity_analysis.json', 'w') as f:
         json.dump(addon_amenity_data, f, indent=2)
     
-    print("\n✓ Add-on and amenity analysis exported to: /home/chris/rvezy/data/processed/addon_amenity_analysis.json")
-    
-    conn.close()
+    print(f"\n✓ Add-on and amenity analysis exported to: {PROCESSED_DIR / 'addon_amenity_analysis.json'}")
 
 if __name__ == "__main__":
     analyze_addons_amenities()
\ No newline at end of file
@@ -0,0 +1,239 @@
+import json
+import sqlite3
+from functools import wraps
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from query_cache import read_sql_query
+from rvezy_db import DB_PATH, connect
+from segment_summaries import CURRENT_YEAR, segment_sources
+
+# Tables the analyzers compute from, each read once per AnalyticsFrames.load().
+# Amenities come joined to their names, one row per listing and amenity.
+# Segment summaries come from segment_sources(), so they are never stale.
+TABLE_QUERIES = {
+    'listings': 'SELECT * FROM listings',
+    'hosts': 'SELECT * FROM hosts',
+    'pricing': 'SELECT * FROM pricing',
+    'amenities': '''
+        SELECT la.listing_id, a.amenity_id, a.name
+        FROM listing_amenities la
+        JOIN amenities a ON la.amenity_id = a.amenity_id
+    ''',
+    'addons': 'SELECT * FROM addons',
+    'segments': 'SELECT * FROM {segment_summaries}',
+    'segment_hosts': 'SELECT * FROM {segment_hosts}',
+}
+
+# Declared column types loaded as float64, so NULL is NaN throughout and
+# flags (stored 0/1) can be averaged like SQL's AVG(flag)
+NUMERIC_TYPES = ('INTEGER', 'REAL', 'BOOLEAN')
+
+# Cities the investment analysis treats as the Calgary market
+CALGARY_AREA = ['Calgary', 'Airdrie', 'Cochrane', 'Chestermere', 'Okotoks']
+
+WINTER_AMENITY = 'Full-Winter rental available'
+
+
+def memoized(method):
+    """Read-only property computed on first access and kept with the frames"""
+    @wraps(method)
+    def frame(self):
+        if method.__name__ not in self.memo:
+            self.memo[method.__name__] = method(self)
+        return self.memo[method.__name__]
+    return property(frame)
+
+
+class AnalyticsFrames:
+    """Listings, hosts, pricing, amenities, add-ons and segment summaries, loaded once for every analyzer.
+
+    Each table is a DataFrame with its numeric columns as float64. Frames
+    derived from them (joins, filters, per-host aggregates) are memoized
+    properties, so analyzers sharing one instance build each of them once.
+    """
+
+    def __init__(self, tables: Dict[str, pd.DataFrame], integer_columns: Iterable[str] = ()):
+        self.listings = tables['listings']
+        self.hosts = tables['hosts']
+        self.pricing = tables['pricing']
+        self.amenities = tables['amenities']
+        self.addons = tables['addons']
+        # Per (rv_type, location_city, price_tier) aggregates, see segment_summaries
+        self.segments = tables['segments']
+        self.segment_hosts = tables['segment_hosts']
+        # Columns declared INTEGER or BOOLEAN in the schema, for sql_types()
+        self.integer_columns = set(integer_columns)
+        self.memo = {}
+
+    @classmethod
+    def load(cls, conn: Optional[sqlite3.Connection] = None) -> 'AnalyticsFrames':
+        """Read every table in TABLE_QUERIES from the listings database"""
+        own_conn = conn is None
+        conn = conn or connect()
+        try:
+            tables = {}
+            integer_columns = set()
+            sources = segment_sources(conn)
+            for name, query in TABLE_QUERIES.items():
+                frame = read_sql_query(query.format(**sources), conn)
+                table = {'amenities': 'listing_amenities', 'segments': 'segment_summaries'}.get(name, name)
+                declared = {row[1]: row[2].upper() for row in conn.execute(f'PRAGMA table_info({table})')}
+                if name == 'amenities':
+                    declared['name'] = 'TEXT'
+                for column in frame.columns:
+                    if declared.get(column) in NUMERIC_TYPES:
+                        frame[column] = frame[column].astype('float64')
+                    if declared.get(column) in ('INTEGER', 'BOOLEAN'):
+                        integer_columns.add(column)
+                tables[name] = frame
+        finally:
+            if own_conn:
+                conn.close()
+        return cls(tables, integer_columns)
+
+    def sql_types(self, frame: pd.DataFrame, integers: Iterable[str] = ()) -> pd.DataFrame:
+        """Give a result the dtypes pd.read_sql_query would have.
+
+        Integer columns (schema INTEGER/BOOLEAN columns, plus the counts and
+        other integer results named in integers) become int64 when they have
+        no NULLs and stay float64 otherwise, as SQL results are read. Missing
+        text, and columns with no values at all, become None.
+        """
+        frame = frame.copy()
+        for column in frame.columns:
+            values = frame[column]
+            if values.dtype == object or (len(values) and values.isna().all()):
+                # NULL text (e.g. a NULL group key), and a column of nothing but NULLs, reads as None
+                frame[column] = values.astype('object').where(values.notna(), None)
+            elif column in self.integer_columns or column in integers:
+                if len(values) and values.notna().all():
+                    frame[column] = values.astype('int64')
+                elif not len(values):
+                    frame[column] = values.astype('object')
+        return frame
+
+    # Derived frames shared by the analyzers
+
+    @memoized
+    def priced(self) -> pd.DataFrame:
+        """Listings with a nightly price"""
+        return self.listings[self.listings['base_price'].notna()]
+
+    @memoized
+    def listings_hosts(self) -> pd.DataFrame:
+        """Listings joined to their host (listings without one are dropped, as by JOIN)"""
+        return self.listings.merge(self.hosts, on='host_id', how='inner', sort=False)
+
+    @memoized
+    def winter_ready_ids(self) -> pd.Index:
+        """listing_id of every listing offering full-winter rental"""
+        return pd.Index(self.amenities.loc[self.amenities['name'] == WINTER_AMENITY, 'listing_id'].unique())
+
+    @memoized
+    def host_portfolios(self) -> pd.DataFrame:
+        """Per-host aggregates of priced listings (hosts with at least one), in host_id order.
+
+        cities and rv_types list each distinct value once, cheapest listing
+        first, as GROUP_CONCAT(DISTINCT ...) reads them through the host/price index.
+        """
+        priced = self.listings_hosts[self.listings_hosts['base_price'].notna()]
+        priced = order_by(priced, ['host_id', 'base_price', 'listing_id'])
+        grouped = priced.groupby('host_id', sort=True)
+        portfolios = grouped.agg(
+            name=('name', 'first'),
+            joined_year=('joined_year', 'first'),
+            response_rate=('response_rate', 'first'),
+            is_superhost=('is_superhost', 'first'),
+            num_listings=('listing_id', 'nunique'),
+            cities=('location_city', group_concat),
+            rv_types=('rv_type', group_concat),
+            avg_price=('base_price', 'mean'),
+            min_price=('base_price', 'min'),
+            max_price=('base_price', 'max'),
+            total_daily_rate=('base_price', 'sum'),
+            avg_rating=('overall_rating', 'mean'),
+            total_reviews=('num_reviews', lambda values: values.sum(min_count=1)),
+            avg_reviews_per_rv=('num_reviews', 'mean'),
+            rv_type_diversity=('rv_type', 'nunique'),
+            delivery_rate=('delivery_available', 'mean'),
+        )
+        return portfolios.reset_index()
+
+
+def reviews_per_year(listings: pd.DataFrame) -> pd.Series:
+    """num_reviews / (CURRENT_YEAR - rv_year) per listing, NULL for the current year"""
+    age = (CURRENT_YEAR - listings['rv_year']).replace(0, np.nan)
+    return listings['num_reviews'] / age
+
+
+def group_concat(values: pd.Series) -> Optional[str]:
+    """GROUP_CONCAT(DISTINCT values): distinct non-NULL values in order, comma separated"""
+    distinct = values.dropna().drop_duplicates()
+    return ','.join(distinct) if len(distinct) else None
+
+
+def order_by(frame: pd.DataFrame, columns: List[str], ascending=True) -> pd.DataFrame:
+    """Stable sort with SQLite's NULL ordering (NULLs are smallest: first ascending, last descending)"""
+    if isinstance(ascending, bool):
+        ascending = [ascending] * len(columns)
+    for column, direction in reversed(list(zip(columns, ascending))):
+        frame = frame.sort_values(column, ascending=direction, kind='stable',
+                                  na_position='first' if direction else 'last')
+    return frame
+
+
+def ntile(position: pd.Series, size: pd.Series, buckets: int) -> pd.Series:
+    """NTILE(buckets) of the row at 0-based position in a partition of size rows.
+
+    As in SQLite, buckets are as even as possible and the larger ones come first.
+    """
+    small = size // buckets
+    large_rows = (size % buckets) * (small + 1)
+    in_large = position < large_rows
+    tile = (position // (small + 1)).where(in_large, size % buckets + (position - large_rows) // small.replace(0, 1))
+    return (tile + 1).astype('int64')
+
+
+# In-memory connection sql_round() rounds with, opened on first use and kept
+# for the process
+round_conn = None
+
+
+def sql_round(values, digits: int = 0):
+    """ROUND(x, digits) exactly as SQLite computes it.
+
+    SQLite rounds half away from zero on its own decimal expansion, which
+    differs from numpy's round-half-even at ties (e.g. 12.25 -> 12.3), so
+    values are rounded by an in-memory SQLite connection. Takes a scalar
+    or a Series.
+    """
+    global round_conn
+    # SQLite itself, not numpy's floor(|x| * 10**d + 0.5), which misses it at e.g. 79.695 -> 79.7
+    if round_conn is None:
+        round_conn = sqlite3.connect(':memory:', check_same_thread=False)
+    scalar = not isinstance(values, pd.Series)
+    series = pd.Series([values]) if scalar else values
+    payload = json.dumps([None if pd.isna(value) else float(value) for value in series])
+    rounded = [row[0] for row in round_conn.execute(
+        'SELECT round(value, ?) FROM json_each(?) ORDER BY key', (digits, payload))]
+    result = pd.Series(rounded, index=series.index, dtype='float64')
+    return result.iloc[0] if scalar else result
+
+
+# Frames loaded per database by shared_frames()
+loaded_frames = {}
+
+
+def shared_frames(db_path=None) -> AnalyticsFrames:
+    """The AnalyticsFrames of a database (DB_PATH by default), loaded on first use"""
+    key = str(db_path or DB_PATH)
+    if key not in loaded_frames:
+        conn = connect(db_path)
+        try:
+            loaded_frames[key] = AnalyticsFrames.load(conn)
+        finally:
+            conn.close()
+    return loaded_frames[key]
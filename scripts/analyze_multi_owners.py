@@ -1,41 +1,26 @@
-import sqlite3
+from typing import Optional
+
 import pandas as pd
-from pathlib import Path
 import numpy as np
 
-def analyze_multi_rv_owners():
+from analytics_frames import AnalyticsFrames, order_by, shared_frames, sql_round
+from rvezy_db import PROCESSED_DIR
+
+def analyze_multi_rv_owners(frames: Optional[AnalyticsFrames] = None):
     """Analyze hosts with multiple RV listings to identify rental businesses"""
     
-    db_path = Path("/home/chris/rvezy/data/processed/rvezy_listings.db")
-    conn = sqlite3.connect(db_path)
+    frames = frames or shared_frames()
+    listings = frames.listings
+    portfolios = frames.host_portfolios
     
     print("=== Multi-RV Owner Analysis ===\n")
     
     # 1. Find hosts with multiple listings
-    query_multi_hosts = """
-    SELECT 
-        h.host_id,
-        h.name as host_name,
-        h.joined_year,
-        h.response_rate,
-        h.is_superhost,
-        COUNT(DISTINCT l.listing_id) as num_listings,
-        GROUP_CONCAT(DISTINCT l.location_city) as cities,
-        AVG(l.base_price) as avg_price,
-        MIN(l.base_price) as min_price,
-        MAX(l.base_price) as max_price,
-        AVG(l.overall_rating) as avg_rating,
-        SUM(l.num_reviews) as total_reviews,
-        GROUP_CONCAT(DISTINCT l.rv_type) as rv_types
-    FROM hosts h
-    JOIN listings l ON h.host_id = l.host_id
-    WHERE l.base_price IS NOT NULL
-    GROUP BY h.host_id
-    HAVING COUNT(DISTINCT l.listing_id) >= 2
-    ORDER BY num_listings DESC, total_reviews DESC
-    """
-    
-    df_multi = pd.read_sql_query(query_multi_hosts, conn)
+    multi = portfolios[portfolios['num_listings'] >= 2].rename(columns={'name': 'host_name'})
+    df_multi = frames.sql_types(order_by(multi, ['num_listings', 'total_reviews'], ascending=False)[[
+        'host_id', 'host_name', 'joined_year', 'response_rate', 'is_superhost', 'num_listings', 'cities',
+        'avg_price', 'min_price', 'max_price', 'avg_rating', 'total_reviews', 'rv_types'
+    ]].reset_index(drop=True), integers=['num_listings', 'total_reviews'])
     
     print(f"Found {len(df_multi)} hosts with 2 or more RV listings")
     print(f"Total multi-owner listings: {df_multi['num_listings'].sum()}")
@@ -55,25 +40,12 @@ def analyze_multi_rv_owners():
         print(f"\n{owner['host_name']} ({owner['num_listings']} RVs):")
         
         # Get detailed listings for this owner
-        query_owner_details = """
-        SELECT 
-            rv_type,
-            rv_year,
-            rv_make,
-            rv_model,
-            base_price,
-            overall_rating,
-            num_reviews,
-            location_city,
-            sleeps,
-            delivery_available
-        FROM listings
-        WHERE host_id = ?
-        AND base_price IS NOT NULL
-        ORDER BY base_price DESC
-        """
-        
-        df_owner = pd.read_sql_query(query_owner_details, conn, params=[owner['host_id']])
+        # Ties come newest listing first, as read backwards through the host/price index
+        owner_listings = frames.priced[frames.priced['host_id'] == owner['host_id']]
+        df_owner = frames.sql_types(order_by(owner_listings, ['base_price', 'listing_id'], ascending=False)[[
+            'rv_type', 'rv_year', 'rv_make', 'rv_model', 'base_price', 'overall_rating', 'num_reviews',
+            'location_city', 'sleeps', 'delivery_available'
+        ]].reset_index(drop=True))
         print(df_owner.to_string(index=False))
         
         # Calculate portfolio metrics
@@ -87,63 +59,36 @@ def analyze_multi_rv_owners():
     # 4. Compare multi vs single owners
     print("\n=== Multi-Owner vs Single-Owner Comparison ===")
     
-    query_comparison = """
-    WITH owner_stats AS (
-        SELECT 
-            h.host_id,
-            COUNT(DISTINCT l.listing_id) as num_listings,
-            AVG(l.base_price) as avg_price,
-            AVG(l.overall_rating) as avg_rating,
-            AVG(l.num_reviews) as avg_reviews_per_rv,
-            AVG(h.response_rate) as avg_response_rate,
-            AVG(h.is_superhost) as superhost_rate
-        FROM hosts h
-        JOIN listings l ON h.host_id = l.host_id
-        WHERE l.base_price IS NOT NULL
-        GROUP BY h.host_id
-    )
-    SELECT 
-        CASE 
-            WHEN num_listings = 1 THEN 'Single RV Owners'
-            ELSE 'Multi RV Owners'
-        END as owner_type,
-        COUNT(*) as num_hosts,
-        AVG(avg_price) as avg_price,
-        AVG(avg_rating) as avg_rating,
-        AVG(avg_reviews_per_rv) as avg_reviews_per_rv,
-        AVG(avg_response_rate) as avg_response_rate,
-        AVG(superhost_rate) * 100 as superhost_percentage
-    FROM owner_stats
-    GROUP BY owner_type
-    """
-    
-    df_comparison = pd.read_sql_query(query_comparison, conn)
+    owner_stats = portfolios.assign(
+        owner_type=np.where(portfolios['num_listings'] == 1, 'Single RV Owners', 'Multi RV Owners'))
+    df_comparison = owner_stats.groupby('owner_type').agg(
+        num_hosts=('host_id', 'size'),
+        avg_price=('avg_price', 'mean'),
+        avg_rating=('avg_rating', 'mean'),
+        avg_reviews_per_rv=('avg_reviews_per_rv', 'mean'),
+        avg_response_rate=('response_rate', 'mean'),
+        superhost_percentage=('is_superhost', 'mean'),
+    ).reset_index()
+    df_comparison['superhost_percentage'] = df_comparison['superhost_percentage'] * 100
     print(df_comparison.to_string(index=False))
     
     # 5. Business model analysis
     print("\n=== Business Model Patterns ===")
     
     # Analyze pricing strategies
-    query_pricing_strategy = """
-    SELECT 
-        h.name as host_name,
-        COUNT(DISTINCT l.listing_id) as num_rvs,
-        ROUND(AVG(l.base_price), 2) as avg_price,
-        ROUND(MAX(l.base_price) - MIN(l.base_price), 2) as price_range,
-        ROUND(MIN(l.base_price), 2) as min_price,
-        ROUND(MAX(l.base_price), 2) as max_price,
-        COUNT(DISTINCT l.rv_type) as num_rv_types,
-        GROUP_CONCAT(DISTINCT l.rv_type) as rv_types
-    FROM hosts h
-    JOIN listings l ON h.host_id = l.host_id
-    WHERE l.base_price IS NOT NULL
-    GROUP BY h.host_id
-    HAVING COUNT(DISTINCT l.listing_id) >= 3
-    ORDER BY num_rvs DESC, avg_price DESC
-    LIMIT 15
-    """
-    
-    df_strategy = pd.read_sql_query(query_pricing_strategy, conn)
+    strategy = portfolios[portfolios['num_listings'] >= 3]
+    df_strategy = pd.DataFrame({
+        'host_name': strategy['name'],
+        'num_rvs': strategy['num_listings'],
+        'avg_price': sql_round(strategy['avg_price'], 2),
+        'price_range': sql_round(strategy['max_price'] - strategy['min_price'], 2),
+        'min_price': sql_round(strategy['min_price'], 2),
+        'max_price': sql_round(strategy['max_price'], 2),
+        'num_rv_types': strategy['rv_type_diversity'],
+        'rv_types': strategy['rv_types'],
+    })
+    df_strategy = frames.sql_types(order_by(df_strategy, ['num_rvs', 'avg_price'], ascending=False).head(15)
+                                   .reset_index(drop=True), integers=['num_rvs', 'num_rv_types'])
     
     print("Hosts with 3+ RVs - Pricing Strategy Analysis:")
     print(df_strategy.to_string(index=False))
@@ -151,72 +96,40 @@ def analyze_multi_rv_owners():
     # 6. Geographic concentration
     print("\n=== Geographic Concentration of Multi-Owners ===")
     
-    query_geo = """
-    SELECT 
-        l.location_city,
-        COUNT(DISTINCT h.host_id) as multi_owner_count,
-        COUNT(DISTINCT l.listing_id) as total_listings,
-        AVG(l.base_price) as avg_price
-    FROM hosts h
-    JOIN listings l ON h.host_id = l.host_id
-    WHERE h.host_id IN (
-        SELECT host_id 
-        FROM listings 
-        GROUP BY host_id 
-        HAVING COUNT(*) >= 2
-    )
-    AND l.location_city IS NOT NULL
-    GROUP BY l.location_city
-    HAVING COUNT(DISTINCT h.host_id) >= 2
-    ORDER BY multi_owner_count DESC
-    """
-    
-    df_geo = pd.read_sql_query(query_geo, conn)
+    host_listing_counts = listings.groupby('host_id').size()
+    multi_owner_ids = host_listing_counts.index[host_listing_counts >= 2]
+    hosted = frames.listings_hosts
+    multi_listings = hosted[hosted['host_id'].isin(multi_owner_ids) & hosted['location_city'].notna()]
+    df_geo = multi_listings.groupby('location_city').agg(
+        multi_owner_count=('host_id', 'nunique'),
+        total_listings=('listing_id', 'nunique'),
+        avg_price=('base_price', 'mean'),
+    ).reset_index()
+    df_geo = df_geo[df_geo['multi_owner_count'] >= 2]
+    # Ties come in reverse city order, as SQLite returns them from its grouping
+    df_geo = frames.sql_types(order_by(df_geo, ['multi_owner_count', 'location_city'], ascending=False)
+                              .reset_index(drop=True), integers=['multi_owner_count', 'total_listings'])
     print(df_geo.head(10).to_string(index=False))
     
     # 7. Revenue potential analysis
     print("\n=== Estimated Revenue Potential ===")
     
     # Calculate potential revenue for different owner types
-    query_revenue = """
-    WITH owner_revenue AS (
-        SELECT 
-            h.host_id,
-            h.name,
-            COUNT(DISTINCT l.listing_id) as num_rvs,
-            SUM(l.base_price) as total_daily_rate,
-            AVG(l.overall_rating) as avg_rating,
-            SUM(l.num_reviews) as total_reviews
-        FROM hosts h
-        JOIN listings l ON h.host_id = l.host_id
-        WHERE l.base_price IS NOT NULL
-        GROUP BY h.host_id
+    sizes = ['1 RV', '2 RVs', '3 RVs', '4+ RVs']
+    owner_revenue = portfolios.assign(
+        portfolio_size=[sizes[min(count, 4) - 1] for count in portfolios['num_listings']],
+        monthly=portfolios['total_daily_rate'] * 15,
+        annual=portfolios['total_daily_rate'] * 365 * 0.5,
     )
-    SELECT 
-        CASE 
-            WHEN num_rvs = 1 THEN '1 RV'
-            WHEN num_rvs = 2 THEN '2 RVs'
-            WHEN num_rvs = 3 THEN '3 RVs'
-            WHEN num_rvs >= 4 THEN '4+ RVs'
-        END as portfolio_size,
-        COUNT(*) as num_hosts,
-        AVG(total_daily_rate) as avg_daily_portfolio_rate,
-        AVG(total_daily_rate * 15) as est_monthly_revenue_50pct,
-        AVG(total_daily_rate * 365 * 0.5) as est_annual_revenue_50pct,
-        AVG(avg_rating) as avg_rating,
-        AVG(total_reviews) as avg_total_reviews
-    FROM owner_revenue
-    GROUP BY portfolio_size
-    ORDER BY 
-        CASE portfolio_size
-            WHEN '1 RV' THEN 1
-            WHEN '2 RVs' THEN 2
-            WHEN '3 RVs' THEN 3
-            WHEN '4+ RVs' THEN 4
-        END
-    """
+    df_revenue = owner_revenue.groupby('portfolio_size').agg(
+        num_hosts=('host_id', 'size'),
+        avg_daily_portfolio_rate=('total_daily_rate', 'mean'),
+        est_monthly_revenue_50pct=('monthly', 'mean'),
+        est_annual_revenue_50pct=('annual', 'mean'),
+        avg_rating=('avg_rating', 'mean'),
+        avg_total_reviews=('total_reviews', 'mean'),
+    ).reindex([size for size in sizes if size in set(owner_revenue['portfolio_size'])]).reset_index()
     
-    df_revenue = pd.read_sql_query(query_revenue, conn)
     print("Revenue Potential by Portfolio Size (assuming 50% occupancy):")
     print(df_revenue.to_string(index=False))
     
@@ -224,72 +137,42 @@ def analyze_multi_rv_owners():
     print("\n=== Success Factors for Multi-RV Businesses ===")
     
     # Analyze what makes successful multi-owners
-    query_success = """
-    WITH multi_owners AS (
-        SELECT 
-            h.host_id,
-            h.name,
-            h.is_superhost,
-            COUNT(DISTINCT l.listing_id) as num_rvs,
-            AVG(l.base_price) as avg_price,
-            AVG(l.overall_rating) as avg_rating,
-            SUM(l.num_reviews) as total_reviews,
-            AVG(l.num_reviews) as avg_reviews_per_rv,
-            COUNT(DISTINCT l.rv_type) as rv_type_diversity,
-            AVG(l.delivery_available) as delivery_rate
-        FROM hosts h
-        JOIN listings l ON h.host_id = l.host_id
-        WHERE l.base_price IS NOT NULL
-        GROUP BY h.host_id
-        HAVING COUNT(DISTINCT l.listing_id) >= 2
-    )
-    SELECT 
-        CASE 
-            WHEN avg_reviews_per_rv >= 20 THEN 'High Engagement (20+ reviews/RV)'
-            WHEN avg_reviews_per_rv >= 10 THEN 'Medium Engagement (10-19 reviews/RV)'
-            ELSE 'Low Engagement (<10 reviews/RV)'
-        END as engagement_level,
-        COUNT(*) as num_hosts,
-        AVG(num_rvs) as avg_portfolio_size,
-        AVG(avg_price) as avg_price,
-        AVG(avg_rating) as avg_rating,
-        AVG(is_superhost) * 100 as superhost_pct,
-        AVG(delivery_rate) * 100 as delivery_offered_pct
-    FROM multi_owners
-    GROUP BY engagement_level
-    ORDER BY avg_reviews_per_rv DESC
-    """
-    
-    df_success = pd.read_sql_query(query_success, conn)
+    multi_owners = portfolios[portfolios['num_listings'] >= 2]
+    engagement_levels = ['High Engagement (20+ reviews/RV)', 'Medium Engagement (10-19 reviews/RV)',
+                         'Low Engagement (<10 reviews/RV)']
+    reviews_per_rv = multi_owners['avg_reviews_per_rv']
+    engagement = np.select([reviews_per_rv >= 20, reviews_per_rv >= 10], engagement_levels[:2],
+                           default=engagement_levels[2])
+    df_success = multi_owners.assign(engagement_level=engagement).groupby('engagement_level').agg(
+        num_hosts=('host_id', 'size'),
+        avg_portfolio_size=('num_listings', 'mean'),
+        avg_price=('avg_price', 'mean'),
+        avg_rating=('avg_rating', 'mean'),
+        superhost_pct=('is_superhost', 'mean'),
+        delivery_offered_pct=('delivery_rate', 'mean'),
+    ).reindex([level for level in engagement_levels if level in set(engagement)]).reset_index()
+    df_success['superhost_pct'] = df_success['superhost_pct'] * 100
+    df_success['delivery_offered_pct'] = df_success['delivery_offered_pct'] * 100
     print(df_success.to_string(index=False))
     
     # Export detailed multi-owner data
     print("\n=== Exporting Multi-Owner Data ===")
     
     # Create comprehensive multi-owner dataset
-    query_export = """
-    SELECT 
-        h.*,
-        l.*,
-        (SELECT COUNT(*) FROM listings WHERE host_id = h.host_id) as host_total_listings
-    FROM listings l
-    JOIN hosts h ON l.host_id = h.host_id
-    WHERE h.host_id IN (
-        SELECT host_id 
-        FROM listings 
-        GROUP BY host_id 
-        HAVING COUNT(*) >= 2
-    )
-    ORDER BY h.host_id, l.base_price DESC
-    """
-    
-    df_export = pd.read_sql_query(query_export, conn)
-    export_path = '/home/chris/rvezy/data/processed/multi_owner_listings.csv'
+    # Host columns, then listing columns (host_id appears in both), each host's
+    # listings most expensive first
+    exported = hosted[hosted['host_id'].isin(multi_owner_ids)]
+    exported = order_by(exported, ['host_id', 'base_price', 'listing_id'], [True, False, False])
+    df_export = pd.concat([
+        frames.sql_types(exported[list(frames.hosts.columns)].reset_index(drop=True)),
+        frames.sql_types(exported[list(listings.columns)].reset_index(drop=True)),
+        frames.sql_types(pd.DataFrame({'host_total_listings': exported['host_id'].map(host_listing_counts).values}),
+                         integers=['host_total_listings']),
+    ], axis=1)
+    export_path = PROCESSED_DIR / 'multi_owner_listings.csv'
     df_export.to_csv(export_path, index=False)
     print(f"Exported {len(df_export)} multi-owner listings to {export_path}")
     
-    conn.close()
-    
     # Key insights summary
     print("\n=== KEY INSIGHTS ===")
     print("1. Multi-RV owners represent a significant business opportunity on RVezy")
@@ -0,0 +1,221 @@
+import argparse
+from pathlib import Path
+from typing import Dict
+
+import pandas as pd
+
+from extract_rvezy_data import LISTING_COLUMNS, RVezyDataExtractor, open_export
+
+# Batch extraction for notebooks: each field is one vectorized str.extract or
+# str.contains over the whole Content (or Title) column, using the patterns
+# defined on RVezyDataExtractor, and the result is returned as DataFrames
+# shaped like the database tables instead of being loaded into SQLite.
+#
+# Values match what extract_listing() produces for the same row. The
+# per-row extractor stays the loader for untrusted exports: it bounds the
+# work on adversarial rows (see benchmark_extraction_fuzz.py), whereas
+# str.extract runs each pattern as a plain search.
+
+Extractor = RVezyDataExtractor
+PATTERNS = Extractor.FIELD_PATTERNS
+
+# Single-group fields, by the type of the captured value
+INT_FIELDS = ['response_rate', 'num_slide_outs', 'weight_lbs', 'hitch_weight_lbs', 'length_ft']
+FLOAT_FIELDS = ['security_deposit', 'accuracy_rating', 'value_rating', 'cleanliness_rating',
+                'communication_rating', 'delivery_price_per_km']
+
+DISCOUNT_TYPES = ['midweek', 'weekly', 'monthly']
+
+
+def read_export(path) -> pd.DataFrame:
+    """URL, Title and Content columns of an export, compressed or not, as strings"""
+    with open_export(path) as f:
+        return pd.read_csv(f, dtype=str, keep_default_na=False)
+
+
+def extract(column: pd.Series, pattern: str) -> pd.DataFrame:
+    """First match of pattern in each value, one column per group (NaN where absent)"""
+    return column.str.extract(pattern, expand=True)
+
+
+def as_int(values: pd.Series) -> pd.Series:
+    return pd.to_numeric(values).astype('Int64')
+
+
+def as_float(values: pd.Series) -> pd.Series:
+    return pd.to_numeric(values).astype('float64')
+
+
+def contains(column: pd.Series, phrase: str) -> pd.Series:
+    return column.str.contains(phrase, regex=False)
+
+
+def extract_fields(rows: pd.DataFrame) -> pd.DataFrame:
+    """One row per export row: every listing column plus the host details"""
+    content = rows['Content']
+    title = rows['Title']
+    fields = pd.DataFrame({'url': rows['URL'], 'title': title}, index=rows.index)
+
+    host = extract(content, PATTERNS['host'])
+    fields['host_name'] = host[0]
+    fields['host_joined_year'] = as_int(host[1])
+    fields['is_superhost'] = contains(content, 'Superhost')
+
+    location = extract(content, PATTERNS['location'])
+    fields['location_city'] = location[0].str.strip()
+    fields['location_province'] = location[1]
+
+    # "Type of RV", else the first RV type mentioned anywhere in RV_TYPES order
+    rv_type = extract(content, PATTERNS['rv_type'])[0].str.strip()
+    for candidate in Extractor.RV_TYPES:
+        rv_type = rv_type.mask(rv_type.isna() & contains(content, candidate), candidate)
+    fields['rv_type'] = rv_type
+
+    title_match = extract(title, Extractor.TITLE_PATTERN)
+    fields['rv_year'] = as_int(title_match[0])
+    fields['rv_make'] = title_match[1].str.strip()
+    fields['rv_model'] = title_match[2].str.strip()
+    fields['base_price'] = as_float(extract(title, Extractor.PRICE_PATTERN)[0])
+
+    for name in INT_FIELDS:
+        fields[name] = as_int(extract(content, PATTERNS[name])[0])
+    for name in FLOAT_FIELDS:
+        fields[name] = as_float(extract(content, PATTERNS[name])[0])
+    fields['hitch_size'] = extract(content, PATTERNS['hitch_size'])[0].str.strip()
+
+    # Sleeps outside 1-20 is a parse artefact (e.g. run together with the length)
+    sleeps = as_int(extract(content, PATTERNS['sleeps'])[0])
+    fields['sleeps'] = sleeps.where((sleeps >= 1) & (sleeps <= 20))
+
+    rating = extract(content, PATTERNS['rating'])
+    fields['overall_rating'] = as_float(rating[0])
+    fields['num_reviews'] = as_int(rating[1])
+
+    # Delivery distance and price only count when delivery is offered
+    available = contains(content, 'No truck no problem') | contains(content.str.lower(), 'delivery')
+    fields['delivery_available'] = available
+    fields['delivery_max_km'] = as_int(extract(content, PATTERNS['delivery_max_km'])[0]).where(available)
+    fields['delivery_price_per_km'] = fields['delivery_price_per_km'].where(available)
+
+    fields['pet_friendly'] = contains(content, 'Pet friendly') & ~contains(content, 'No pets')
+    fields['flexible_pickup'] = contains(content, 'Flexible pickup time')
+    fields['flexible_dropoff'] = contains(content, 'Flexible drop-off time')
+    fields['towing_experience_required'] = contains(content, 'Towing experience required')
+    return fields
+
+
+def extract_pricing(content: pd.Series, listing_ids: pd.Series) -> pd.DataFrame:
+    frames = []
+    for discount_type in DISCOUNT_TYPES:
+        match = extract(content, PATTERNS[discount_type]).dropna()
+        frames.append(pd.DataFrame({
+            'listing_id': listing_ids[match.index],
+            'discount_type': discount_type,
+            'discount_percent': as_int(match[1]),
+            'discounted_price': as_float(match[0]),
+        }))
+    return pd.concat(frames).sort_values('listing_id', kind='stable')
+
+
+def extract_amenities(content: pd.Series, listing_ids: pd.Series) -> pd.DataFrame:
+    frames = [pd.DataFrame({'listing_id': listing_ids[contains(content, amenity)], 'amenity': amenity})
+              for amenity in Extractor.AMENITIES]
+    return pd.concat(frames).sort_values('listing_id', kind='stable')
+
+
+def extract_addons(content: pd.Series, listing_ids: pd.Series) -> pd.DataFrame:
+    """Name/price pairs from the text between the first "Add-ons" and the next "RV rules"."""
+    start_heading, end_heading = Extractor.SECTION_HEADINGS['addons']
+    if content.empty:
+        return pd.DataFrame(columns=['listing_id', 'name', 'price'])
+    start = content.str.partition(start_heading)
+    # The end heading is looked for from the section's second character
+    end = start[2].str[1:].str.partition(end_heading)
+    section = start[2].str[:1] + end[0]
+    section = section[(start[1] != '') & (end[1] != '')]
+
+    match = section.str.extractall(Extractor.ADDON_PATTERN)
+    rows = match.index.get_level_values(0)
+    return pd.DataFrame({
+        'listing_id': listing_ids[rows].values,
+        'name': match[0].str.strip().values,
+        'price': as_float(match[1]).values,
+    })
+
+
+def extract_beds(content: pd.Series, listing_ids: pd.Series) -> pd.DataFrame:
+    """Every bed match, grouped by type in BED_TYPES order within a listing"""
+    match = content.str.extractall(Extractor.BED_PATTERN)
+    beds = pd.DataFrame({
+        'listing_id': listing_ids[match.index.get_level_values(0)].values,
+        'bed_type': match[1].values,
+        'bed_size': match[2].values,
+        'quantity': as_int(match[0]).values,
+    })
+    beds['rank'] = beds['bed_type'].map(Extractor.BED_TYPES.index)
+    return beds.sort_values(['listing_id', 'rank'], kind='stable').drop(columns='rank')
+
+
+def extract_frames(rows: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Extract an export's rows (URL, Title, Content) into normalized DataFrames.
+
+    Returns listings, hosts, pricing, amenities, addons and beds, with the
+    columns of the matching tables. As in the database, a URL that appears
+    more than once keeps its first position (listing_id) and its last
+    row's values, and a host keeps the details it was first seen with.
+    Ids are numbered from 1 within the result; listings without a host
+    name and join year have no host_id.
+    """
+    rows = rows[['URL', 'Title', 'Content']].fillna('').astype(str).reset_index(drop=True)
+    fields = extract_fields(rows)
+
+    hosts = fields[['host_name', 'host_joined_year', 'response_rate', 'is_superhost']].dropna(
+        subset=['host_name', 'host_joined_year']).drop_duplicates(['host_name', 'host_joined_year'])
+    hosts = hosts.rename(columns={'host_name': 'name', 'host_joined_year': 'joined_year'})
+    hosts.insert(0, 'host_id', range(1, len(hosts) + 1))
+    host_ids = hosts.set_index(['name', 'joined_year'])['host_id']
+
+    fields['listing_id'] = pd.factorize(fields['url'])[0] + 1
+    fields['host_id'] = pd.Series(
+        host_ids.reindex(pd.MultiIndex.from_frame(fields[['host_name', 'host_joined_year']])).values,
+        index=fields.index).astype('Int64')
+    latest = fields.drop_duplicates('url', keep='last').sort_values('listing_id')
+    listing_ids = latest['listing_id']
+    content = rows['Content'][latest.index]
+
+    columns = ['listing_id'] + [column for column in LISTING_COLUMNS if column != 'source_file_id']
+    return {
+        'listings': latest[columns].reset_index(drop=True),
+        'hosts': hosts.reset_index(drop=True),
+        'pricing': extract_pricing(content, listing_ids).reset_index(drop=True),
+        'amenities': extract_amenities(content, listing_ids).reset_index(drop=True),
+        'addons': extract_addons(content, listing_ids).reset_index(drop=True),
+        'beds': extract_beds(content, listing_ids).reset_index(drop=True),
+    }
+
+
+def extract_export(path) -> Dict[str, pd.DataFrame]:
+    """extract_frames() over an export file"""
+    return extract_frames(read_export(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized extraction of an export into normalized tables")
+    parser.add_argument('--input', required=True, help="PandaScraper CSV export (optionally compressed)")
+    parser.add_argument('--output-dir', help="write each table to <output-dir>/<table>.csv")
+    args = parser.parse_args()
+
+    frames = extract_export(args.input)
+    for name, frame in frames.items():
+        print(f"{name:<10} {len(frame):>9,} rows")
+
+    if args.output_dir:
+        output_dir = Path(args.output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for name, frame in frames.items():
+            frame.to_csv(output_dir / f"{name}.csv", index=False)
+        print(f"\n✓ Tables written to {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import argparse
+import math
+import random
+import sys
+import time
+from typing import Callable, Dict, List
+
+from extract_rvezy_data import FIELD_REGEXES, RVezyDataExtractor, literal_prefix
+
+# Adversarial rows: each repeats the start of a pattern (or the characters one
+# of its groups accepts) without ever completing it, which is what makes a
+# backtracking regex retry from every offset. size is the content length.
+ADVERSARIAL_ROWS: Dict[str, Callable[[int], Dict[str, str]]] = {
+    'title_words': lambda size: {'Title': 'Rent my 2020 ' + 'a ' * (size // 2), 'Content': ''},
+    'title_restarts': lambda size: {'Title': 'Rent my 2020 a ' * (size // 15) + '! from', 'Content': ''},
+    'addon_names': lambda size: {'Title': '', 'Content': 'Add-ons' + 'ab ' * (size // 3) + 'RV rules'},
+    'addon_headings': lambda size: {'Title': '', 'Content': 'Add-ons ' * (size // 8)},
+    'location_ft': lambda size: {'Title': '', 'Content': 'aft ' * (size // 4)},
+    'rv_type_restarts': lambda size: {'Title': '', 'Content': 'Type of RV ' * (size // 11)},
+    'rv_type_spaces': lambda size: {'Title': '', 'Content': 'Type of RV' + ' ' * size},
+    'hitch_spaces': lambda size: {'Title': '', 'Content': 'Hitch Size' + ' ' * size},
+    'delivery_digits': lambda size: {'Title': '', 'Content': 'Delivery$' + '1' * size},
+    'rating_digits': lambda size: {'Title': '', 'Content': '1.' * (size // 2)},
+    'response_digits': lambda size: {'Title': '', 'Content': '1' * size + '%'},
+    'bed_words': lambda size: {'Title': '', 'Content': '1 bed' * (size // 5)},
+}
+
+
+def fragment_soup(size: int, seed: int) -> Dict[str, str]:
+    """Random mix of every field's literal prefix, group characters and near-miss terminators"""
+    fragments = [literal_prefix(regex.pattern) for regex in FIELD_REGEXES.values()]
+    fragments += ['Rent my 2020 ', ' from', 'Add-ons', 'RV rules', ': $', '$', '"', ', AB', 'ft',
+                  'Accommodations', 'What', ' per km', '% off', ' reviews)', '(', '.', '1', '12', ' ',
+                  'a', 'Jay', '-', '\n', 'bed', 'Queen']
+    rnd = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size:
+        fragment = rnd.choice(fragments)
+        parts.append(fragment)
+        length += len(fragment)
+    text = ''.join(parts)
+    return {'Title': text[:size // 10], 'Content': text}
+
+
+def time_row(extractor: RVezyDataExtractor, row: Dict[str, str], repeat: int) -> float:
+    """Best-of-repeat seconds to parse one row"""
+    best = math.inf
+    for _ in range(repeat):
+        # Fresh copies so scan_content cannot reuse the previous scan
+        fresh = {'URL': 'fuzz', 'Title': ''.join(list(row['Title'])), 'Content': ''.join(list(row['Content']))}
+        start = time.perf_counter()
+        extractor.extract_listing(fresh)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def growth_exponent(sizes: List[int], seconds: List[float]) -> float:
+    """Slope of log(time) against log(size) over the two largest sizes (1 = linear, 2 = quadratic)"""
+    return math.log(seconds[-1] / seconds[-2]) / math.log(sizes[-1] / sizes[-2])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that listing extraction stays linear on adversarial rows")
+    parser.add_argument('--sizes', default='8000,16000,32000,64000', help="comma-separated content lengths")
+    parser.add_argument('--repeat', type=int, default=3, help="timings per row (best is kept)")
+    parser.add_argument('--soups', type=int, default=5, help="random fragment-soup rows per size")
+    parser.add_argument('--seed', type=int, default=42, help="fragment-soup seed")
+    parser.add_argument('--max-exponent', type=float, default=1.35,
+                        help="fail when time grows faster than size**max_exponent")
+    parser.add_argument('--row-budget-ms', type=float, default=1000,
+                        help="fail when any row takes longer than this (the extractor's default budget)")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    extractor = RVezyDataExtractor()
+    rows = dict(ADVERSARIAL_ROWS)
+    for i in range(args.soups):
+        rows[f'soup_{i}'] = lambda size, i=i: fragment_soup(size, args.seed + i)
+
+    print(f"{'row':<20}" + ''.join(f"{size:>11,}" for size in sizes) + f"{'exponent':>10}")
+    failures = []
+    for name, make_row in rows.items():
+        seconds = [time_row(extractor, make_row(size), args.repeat) for size in sizes]
+        exponent = growth_exponent(sizes, seconds)
+        print(f"{name:<20}" + ''.join(f"{value * 1000:>9.2f}ms" for value in seconds) + f"{exponent:>10.2f}")
+        if exponent > args.max_exponent:
+            failures.append(f"{name}: time grows as size^{exponent:.2f}")
+        if seconds[-1] * 1000 > args.row_budget_ms:
+            failures.append(f"{name}: {seconds[-1] * 1000:.0f}ms exceeds the {args.row_budget_ms:g}ms row budget")
+
+    if failures:
+        print("\nSuper-linear or over-budget rows:")
+        for message in failures:
+            print(f"  {message}")
+        sys.exit(1)
+    print("\nAll rows parse in linear time")
+
+
+if __name__ == "__main__":
+    main()
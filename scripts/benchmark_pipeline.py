@@ -0,0 +1,186 @@
+import argparse
+import csv
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from generate_synthetic_export import generate_rows, load_distributions
+from rvezy_db import PROCESSED_DIR
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+# Pipeline stages in run order: name -> script (extract also gets --input)
+STAGES = {
+    'extract': 'extract_rvezy_data.py',
+    'pricing_optimizer': 'pricing_optimizer.py',
+    'investment_analyzer': 'investment_analyzer.py',
+    'analyze_multi_owners': 'analyze_multi_owners.py',
+    'seasonal_revenue_analyzer': 'seasonal_revenue_analyzer.py',
+    'top_performer_analyzer': 'top_performer_analyzer.py',
+    'addon_amenity_analyzer': 'addon_amenity_analyzer.py',
+    'run_analyses': 'run_analyses.py',
+    'query_database': 'query_database.py',
+    'generate_dashboard_data': 'generate_dashboard_data.py',
+    'generate_comprehensive_dashboard': 'generate_comprehensive_dashboard.py',
+}
+
+
+def build_fixture(work_dir: Path, rows: int, seed: int) -> Path:
+    """Synthetic export of the given size, generated once and reused across runs"""
+    path = work_dir / f"synthetic_{rows}_{seed}.csv"
+    if not path.exists():
+        print(f"Generating {rows:,}-row fixture {path}")
+        partial = path.with_suffix('.partial')
+        with open(partial, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=['URL', 'Title', 'Content'])
+            writer.writeheader()
+            writer.writerows(generate_rows(rows, seed, load_distributions()))
+        partial.rename(path)
+    return path
+
+
+def run_stage(command: List[str], env: Dict, log_path: Path) -> Dict:
+    """Run one stage as a child process; wall time, CPU time and peak RSS come from wait4"""
+    with open(log_path, 'w') as log:
+        start = time.perf_counter()
+        process = subprocess.Popen(command, env=env, stdout=log, stderr=subprocess.STDOUT)
+        _, status, usage = os.wait4(process.pid, 0)
+        seconds = time.perf_counter() - start
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    max_rss_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    return {
+        'seconds': round(seconds, 3),
+        'cpu_seconds': round(usage.ru_utime + usage.ru_stime, 3),
+        'max_rss_mb': round(max_rss_mb, 1),
+        'ok': os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0,
+    }
+
+
+def run_pipeline(fixture: Path, work_dir: Path, stages: List[str]) -> Dict[str, Dict]:
+    """Run the selected stages against a fresh database built from fixture"""
+    db_path = work_dir / 'rvezy_listings.db'
+    output_dir = work_dir / 'output'
+    output_dir.mkdir(exist_ok=True)
+    for path in work_dir.glob('rvezy_listings.db*'):
+        path.unlink()
+
+    # Point every script at the benchmark database and output folders
+    env = dict(os.environ, RVEZY_DB=str(db_path), RVEZY_PROCESSED_DIR=str(work_dir),
+               RVEZY_OUTPUT_DIR=str(output_dir))
+    results = {}
+    for stage in STAGES:
+        if stage not in stages and stage != 'extract':
+            continue
+        command = [sys.executable, str(SCRIPTS_DIR / STAGES[stage])]
+        if stage == 'extract':
+            command += ['--input', str(fixture), '--db', str(db_path)]
+        result = run_stage(command, env, work_dir / f"{stage}.log")
+        if stage in stages:
+            results[stage] = result
+        if not result['ok']:
+            print(f"  {stage} failed, see {work_dir / f'{stage}.log'}")
+            if stage == 'extract':
+                break
+    return results
+
+
+def load_history(path: Path) -> List[Dict]:
+    if path.exists():
+        with open(path, 'r') as f:
+            return json.load(f)
+    return []
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPTS_DIR,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ''
+
+
+def find_regressions(history: List[Dict], run: Dict, threshold: float, window: int) -> List[str]:
+    """Stages slower or larger than the median of the last `window` passing runs by more than threshold"""
+    regressions = []
+    for stage, result in run['results'].items():
+        previous = [
+            past['results'][stage] for past in history
+            if past['rows'] == run['rows'] and past['results'].get(stage, {}).get('ok')
+        ][-window:]
+        if not result['ok']:
+            regressions.append(f"{stage}: failed")
+            continue
+        if not previous:
+            continue
+        for metric in ('seconds', 'max_rss_mb'):
+            baseline = statistics.median(past[metric] for past in previous)
+            if baseline and result[metric] > baseline * (1 + threshold):
+                regressions.append(f"{stage}: {metric} {result[metric]} vs baseline {baseline} "
+                                   f"({(result[metric] / baseline - 1) * 100:+.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time and memory-profile every pipeline stage on fixed-size synthetic data")
+    parser.add_argument('--rows', default='1000,10000', help="comma-separated fixture sizes")
+    parser.add_argument('--seed', type=int, default=42, help="fixture seed (keep fixed to compare runs)")
+    parser.add_argument('--stages', default=','.join(STAGES),
+                        help="comma-separated stages to record (extract always runs first)")
+    parser.add_argument('--work-dir', default=str(PROCESSED_DIR / 'benchmark'),
+                        help="fixtures, benchmark database, stage logs and outputs")
+    parser.add_argument('--history', default=None, help="JSON history file (default: <work-dir>/history.json)")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="fail when a stage is this much slower or larger than its baseline (0.25 = 25%%)")
+    parser.add_argument('--window', type=int, default=5, help="baseline = median of this many previous runs")
+    parser.add_argument('--no-record', action='store_true', help="compare only; do not append to the history")
+    args = parser.parse_args()
+
+    work_dir = Path(args.work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    history_path = Path(args.history) if args.history else work_dir / 'history.json'
+    history = load_history(history_path)
+    stages = [stage for stage in args.stages.split(',') if stage]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    regressions = []
+    for rows in [int(size) for size in args.rows.split(',')]:
+        fixture = build_fixture(work_dir, rows, args.seed)
+        print(f"\n=== {rows:,} rows ===")
+        run = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'rows': rows,
+            'seed': args.seed,
+            'results': run_pipeline(fixture, work_dir, stages),
+        }
+        for stage, result in run['results'].items():
+            status = '' if result['ok'] else '  FAILED'
+            print(f"  {stage:<34} {result['seconds']:>8.2f}s  cpu {result['cpu_seconds']:>7.2f}s  "
+                  f"peak {result['max_rss_mb']:>7.1f} MB{status}")
+        regressions += [f"{rows:,} rows, {message}" for message in
+                        find_regressions(history, run, args.threshold, args.window)]
+        history.append(run)
+
+    if not args.no_record:
+        with open(history_path, 'w') as f:
+            json.dump(history, f, indent=2)
+        print(f"\n✓ Results appended to {history_path}")
+
+    if regressions:
+        print("\nRegressions:")
+        for message in regressions:
+            print(f"  {message}")
+        sys.exit(1)
+    print("\nNo regressions beyond threshold")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import heapq
+import json
+import logging
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+
+class ETLProfiler:
+    """Opt-in timing and match-rate counters for an ETL run.
+
+    Times are exclusive: a timed call made inside another timed call (for
+    example scan_content inside extract_host_info, or SQL inside
+    write_batch) is charged to the inner name only.
+    """
+
+    def __init__(self, patterns: List[str], slowest: int = 20):
+        self.patterns = patterns
+        self.slowest = slowest
+        self.started = time.perf_counter()
+        self.seconds = defaultdict(lambda: defaultdict(float))
+        self.calls = defaultdict(lambda: defaultdict(int))
+        self.hits = defaultdict(int)
+        self.rows = 0
+        self.slow_rows = []
+        # Time spent in timed calls nested inside each active timed call
+        self.child_seconds = []
+
+    def timed(self, section: str, name: str, func: Callable) -> Callable:
+        """Wrap func so its calls are counted and timed under section/name"""
+        def wrapper(*args, **kwargs):
+            self.child_seconds.append(0.0)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                self.seconds[section][name] += elapsed - self.child_seconds.pop()
+                self.calls[section][name] += 1
+                if self.child_seconds:
+                    self.child_seconds[-1] += elapsed
+        return wrapper
+
+    def add_row(self, url: str, seconds: float, hits: Iterable[str]) -> None:
+        """Record one parsed row: its parse time and the patterns that matched"""
+        self.rows += 1
+        for pattern in hits:
+            self.hits[pattern] += 1
+        entry = (seconds, url)
+        if len(self.slow_rows) < self.slowest:
+            heapq.heappush(self.slow_rows, entry)
+        elif entry > self.slow_rows[0]:
+            heapq.heapreplace(self.slow_rows, entry)
+
+    def report(self) -> Dict:
+        """Profile as a JSON-serialisable dict, costliest entries first"""
+        def section(name):
+            return {
+                key: {'seconds': round(seconds, 6), 'calls': self.calls[name][key]}
+                for key, seconds in sorted(self.seconds[name].items(), key=lambda item: -item[1])
+            }
+
+        return {
+            'rows': self.rows,
+            'wall_seconds': round(time.perf_counter() - self.started, 3),
+            'methods': section('methods'),
+            'sql': section('sql'),
+            'patterns': {
+                pattern: {'hits': self.hits[pattern], 'misses': self.rows - self.hits[pattern]}
+                for pattern in self.patterns
+            },
+            'never_matched': [pattern for pattern in self.patterns if not self.hits[pattern]],
+            'slowest_rows': [
+                {'url': url, 'seconds': round(seconds, 6)}
+                for seconds, url in sorted(self.slow_rows, reverse=True)
+            ],
+        }
+
+    def write(self, path: Path) -> None:
+        """Write the JSON report and log its headline numbers"""
+        report = self.report()
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+        logger.info(f"\nProfile of {report['rows']} rows ({report['wall_seconds']}s wall):")
+        for name, stats in list(report['methods'].items())[:10]:
+            logger.info(f"  {name}: {stats['seconds']:.3f}s over {stats['calls']} calls")
+        sql_seconds = sum(stats['seconds'] for stats in report['sql'].values())
+        logger.info(f"  SQL statements: {sql_seconds:.3f}s")
+        if report['never_matched']:
+            logger.info(f"  Patterns that never matched: {', '.join(report['never_matched'])}")
+        for row in report['slowest_rows'][:5]:
+            logger.info(f"  Slow row {row['seconds'] * 1000:.1f}ms: {row['url']}")
+        logger.info(f"Profile written to {path}")
+
+
+class TimedCursor:
+    """sqlite3 cursor proxy that times each statement through an ETLProfiler"""
+
+    def __init__(self, cursor, profiler: ETLProfiler):
+        self.cursor = cursor
+        self.profiler = profiler
+
+    def statement(self, sql: str) -> str:
+        """Short label for a statement: its first 60 characters, whitespace collapsed"""
+        return ' '.join(sql.split())[:60]
+
+    def execute(self, sql: str, *args):
+        return self.profiler.timed('sql', self.statement(sql), self.cursor.execute)(sql, *args)
+
+    def executemany(self, sql: str, *args):
+        return self.profiler.timed('sql', self.statement(sql), self.cursor.executemany)(sql, *args)
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
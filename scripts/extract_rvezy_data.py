@@ -1,32 +1,331 @@
+import argparse
+import bz2
 import csv
+import glob
+import gzip
+import hashlib
 import re
 import sqlite3
 import json
+import lzma
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 import logging
 
+from etl_profiler import ETLProfiler, TimedCursor
+from listing_snapshots import (SnapshotRecorder, TRACKED_FIELDS, create_snapshot_table,
+                               scrape_date_from_filename)
+from rvezy_db import DB_PATH, bump_data_version, create_data_version_table
+from segment_summaries import create_segment_tables, refresh_segment_summaries
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Content cells of long listings overflow csv's default 128 KiB field limit.
+# sys.maxsize does not fit a C long on Windows, so fall back to 2**31 - 1.
+try:
+    csv.field_size_limit(sys.maxsize)
+except OverflowError:
+    csv.field_size_limit(2**31 - 1)
+
+# Column order of the listings insert; host_id and source_file_id are
+# resolved at write time
+LISTING_COLUMNS = (
+    'url', 'title', 'host_id', 'location_city', 'location_province',
+    'rv_type', 'rv_year', 'rv_make', 'rv_model', 'length_ft', 'sleeps',
+    'num_slide_outs', 'weight_lbs', 'hitch_size', 'hitch_weight_lbs',
+    'base_price', 'security_deposit', 'pet_friendly', 'delivery_available',
+    'delivery_max_km', 'delivery_price_per_km', 'overall_rating', 'num_reviews',
+    'accuracy_rating', 'value_rating', 'cleanliness_rating', 'communication_rating',
+    'flexible_pickup', 'flexible_dropoff', 'towing_experience_required', 'source_file_id'
+)
+
+# Positions of the snapshot-tracked fields in a record's listing tuple,
+# which holds LISTING_COLUMNS without host_id and source_file_id
+SNAPSHOT_POSITIONS = tuple(
+    [column for column in LISTING_COLUMNS if column != 'host_id'].index(field) for field in TRACKED_FIELDS
+)
+
+
+class DimensionCache:
+    """Write-through cache mapping a lookup table's natural key to its id.
+    
+    Warmed from the table on load(); a key is inserted (INSERT OR IGNORE)
+    and resolved only the first time it is seen. Keys containing NULL are
+    never cached because UNIQUE and '=' never match NULL: the row is
+    inserted as before and resolves to None.
+    """
+    
+    def __init__(self, cursor: sqlite3.Cursor, table: str, id_column: str,
+                 key_columns: Tuple[str, ...], value_columns: Tuple[str, ...] = ()):
+        self.cursor = cursor
+        self.ids = {}
+        self.load_sql = (f"SELECT {id_column}, {', '.join(key_columns)} FROM {table} "
+                         f"WHERE {' AND '.join(c + ' IS NOT NULL' for c in key_columns)}")
+        columns = key_columns + value_columns
+        self.insert_sql = (f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) "
+                           f"VALUES ({', '.join('?' * len(columns))})")
+        self.select_sql = (f"SELECT {id_column} FROM {table} "
+                           f"WHERE {' AND '.join(c + ' = ?' for c in key_columns)}")
+    
+    def load(self) -> None:
+        """(Re)load every resolvable key from the table, e.g. after a rollback"""
+        self.cursor.execute(self.load_sql)
+        self.ids = {tuple(row[1:]): row[0] for row in self.cursor.fetchall()}
+    
+    def resolve(self, key: Tuple, values: Tuple = ()) -> Optional[int]:
+        """Return the id for key, inserting key + values the first time it is seen"""
+        if key in self.ids:
+            return self.ids[key]
+        self.cursor.execute(self.insert_sql, key + values)
+        if None in key:
+            return None
+        if self.cursor.rowcount == 1:
+            self.ids[key] = self.cursor.lastrowid
+        else:
+            self.cursor.execute(self.select_sql, key)
+            self.ids[key] = self.cursor.fetchone()[0]
+        return self.ids[key]
+
+
+def load_vocabulary(path: Path) -> Dict[str, List[str]]:
+    """Load the amenity and RV type vocabulary matched in listing content"""
+    with open(path, 'r', encoding='utf-8') as file:
+        vocabulary = json.load(file)
+    return {'amenities': list(vocabulary['amenities']), 'rv_types': list(vocabulary['rv_types'])}
+
+
+VOCABULARY = load_vocabulary(Path(__file__).with_name('vocabulary.json'))
+
+
 class RVezyDataExtractor:
-    def __init__(self, input_file: str, output_db: str):
-        self.input_file = Path(input_file)
-        self.output_db = Path(output_db)
+    # Structured fields in the Content blob; the first match of each is used.
+    # Patterns must run in linear time on any input: no two adjacent
+    # quantifiers may match the same characters (the (?!\s) after a \s*
+    # stops it giving characters back to the group that follows).
+    FIELD_PATTERNS = {
+        'host': r'Hosted by ([A-Za-z]+)Joined in (\d{4})',
+        'response_rate': r'(\d+)% response rate',
+        'rv_type': r'Type of RV\s*(?!\s)([A-Za-z\s]+?)(?:Accommodations|What)',
+        'num_slide_outs': r'# of slide outs\s*(\d+)',
+        'weight_lbs': r'Weight\s*(\d+)\s*lbs',
+        'hitch_weight_lbs': r'Hitch Weight\s*(\d+)\s*lbs',
+        'length_ft': r'Length\(ft\)\s*(\d+)\s*ft',
+        'sleeps': r'Sleeps\s*(\d{1,2})(?:\s|$|[^0-9])',
+        'hitch_size': r'Hitch Size\s*(?!\s)([0-9\s/"]+")',
+        'location': r'ft([A-Za-z\-\s]+), ([A-Z]{2})',
+        'security_deposit': r'Security Deposit\$(\d+)',
+        'midweek': r'Midweek\$(\d+)/Night(\d+)% off',
+        'weekly': r'Weekly\$(\d+)/Night(\d+)% off',
+        'monthly': r'Monthly\$(\d+)/Night(\d+)% off',
+        'rating': r'(\d+\.\d+)\((\d+) reviews\)',
+        'accuracy_rating': r'Accuracy(\d+\.\d+)',
+        'value_rating': r'Value(\d+\.\d+)',
+        'cleanliness_rating': r'Cleanliness(\d+\.\d+)',
+        'communication_rating': r'Communication(\d+\.\d+)',
+        'delivery_max_km': r'delivery up to (\d+) km',
+        'delivery_price_per_km': r'Delivery\$(\d+(?:\.\d*)?) per km'
+    }
+    
+    # Patterns applied to the listing title. The make runs to the first space
+    # (the shortest make a lazy group would try first), so only the model
+    # group searches ahead for " from"; search_title() bounds the retries.
+    TITLE_PATTERN = r'Rent my (\d{4}) ([A-Za-z\-\s](?:(?! )[A-Za-z\-\s])*) ([A-Za-z0-9\-\s]+?) from'
+    PRICE_PATTERN = r'from \$(\d+)/night'
+    
+    # Add-on name/price pairs inside the "Add-ons ... RV rules" section
+    ADDON_SECTION_PATTERN = r'Add-ons(.+?)RV rules'
+    # An add-on name starts where its run of letters and spaces starts: a
+    # later start in the same run would end at the same place and fail the same way
+    ADDON_PATTERN = r'(?<![A-Za-z\s])([A-Za-z\s]+):\s*\$(\d+)'
+    
+    # Sections located once per listing by their literal headings: name ->
+    # (start heading, end heading). A section runs from its first start
+    # heading to the next end heading at least one character later, which is
+    # the span the matching *_SECTION_PATTERN (DOTALL) would capture.
+    SECTION_HEADINGS = {
+        'addons': ('Add-ons', 'RV rules'),
+    }
+    
+    BED_TYPES = ['bed', 'dinette bed', 'pullout sofa', 'bunk bed']
+    BED_PATTERN = r'(\d+) (bed|dinette bed|pullout sofa|bunk bed)([A-Za-z]+)'
+    
+    # Phrases whose mere presence sets a flag
+    FLAG_PHRASES = [
+        'Superhost', 'No truck no problem', 'Flexible pickup time',
+        'Flexible drop-off time', 'Towing experience required', 'Pet friendly', 'No pets'
+    ]
+    
+    # Tables holding per-listing rows, replaced when a listing is re-ingested
+    CHILD_TABLES = ['pricing', 'listing_amenities', 'addons', 'beds']
+    
+    # Secondary and covering indexes for the analysis scripts' filters and
+    # joins, built after the bulk load (name -> indexed table and columns)
+    INDEXES = {
+        'idx_listings_type_price': 'listings (rv_type, base_price)',
+        'idx_listings_city_type_price': 'listings (location_city, rv_type, base_price)',
+        'idx_listings_price': 'listings (base_price)',
+        'idx_listings_host_price': 'listings (host_id, base_price)',
+        'idx_listings_reviews': 'listings (num_reviews)',
+        'idx_listing_amenities_amenity': 'listing_amenities (amenity_id, listing_id)',
+        'idx_addons_name_listing': 'addons (name, listing_id, price)',
+    }
+    
+    # Connection settings while bulk loading, and the durable settings
+    # (SQLite's defaults) restored once the load is committed
+    BULK_LOAD_PRAGMAS = [
+        'PRAGMA journal_mode = WAL',
+        'PRAGMA synchronous = OFF',
+        'PRAGMA cache_size = -262144',
+        'PRAGMA temp_store = MEMORY',
+    ]
+    DURABLE_PRAGMAS = [
+        'PRAGMA journal_mode = DELETE',
+        'PRAGMA synchronous = FULL',
+    ]
+    
+    # Amenities to look for, and fallback RV types in priority order when
+    # "Type of RV" is missing (edit vocabulary.json to extend either list)
+    AMENITIES = VOCABULARY['amenities']
+    RV_TYPES = VOCABULARY['rv_types']
+    
+    # Version of each extract_* method's output, for the extraction cache.
+    # Bump a method's version whenever it returns something different for
+    # the same title and content (as the sleeps range check did for
+    # extract_rv_specs); only that method is then re-run on cached rows.
+    EXTRACTOR_VERSIONS = {
+        'extract_host_info': 1,
+        'extract_rv_specs': 1,
+        'extract_location': 1,
+        'extract_pricing': 1,
+        'extract_amenities': 1,
+        'extract_reviews': 1,
+        'extract_delivery_info': 1,
+        'extract_rules': 1,
+        'extract_addons': 1,
+        'extract_beds': 1,
+    }
+    
+    def __init__(self, input_file: Optional[str] = None, output_db: Optional[str] = None,
+                 batch_size: int = 500, workers: int = 1, chunk_size: int = 100, incremental: bool = False,
+                 bulk_load: bool = False, scrape_date: Optional[str] = None,
+                 profile: bool = False, resume: bool = False, row_budget_ms: float = 1000,
+                 extraction_cache: bool = False):
+        # A single export, a directory of exports or a glob pattern, and the
+        # database to write. Without them the extractor only parses rows (as in
+        # the parser processes) and nothing is listed or opened on disk.
+        self.input_file = Path(input_file) if input_file else None
+        self.input_files = expand_inputs(input_file) if input_file else []
+        self.output_db = Path(output_db) if output_db else None
+        # Listings written per transaction; 1 commits after every row
+        self.batch_size = max(1, batch_size)
+        # Parser processes (1 parses in this process) and rows sent per task
+        self.workers = max(1, workers)
+        self.chunk_size = max(1, chunk_size)
+        # Skip rows whose content fingerprint matches the stored one
+        self.incremental = incremental
+        # Load with relaxed durability and no secondary indexes (see BULK_LOAD_PRAGMAS)
+        self.bulk_load = bulk_load
+        self.indexes_dropped = False
+        # Date recorded in listing_snapshots (ISO), from each file's name by default
+        self.scrape_date_override = scrape_date
+        self.scrape_date = scrape_date or scrape_date_from_filename(input_file or '')
+        # Snapshot recorders by scrape date
+        self.snapshots = {}
+        # Input files as (source_file_id, path), newest scrape first, their
+        # scrape dates, and the source file each URL is loaded from
+        self.sources = []
+        self.source_dates = {}
+        self.listing_sources = {}
+        # Continue each input file from its last committed checkpoint
+        self.resume = resume
+        # (source_file_id, byte offset) just after the last row read, and the
+        # raw rows of the batch being written, kept for the dead-letter file
+        self.read_position = None
+        self.batch_rows = {}
+        # Rows that failed to parse or write, with their error, for replay
+        self.dead_letter_path = self.dead_letters = None
+        # Rows that took longer than this to parse are quarantined, not loaded (0 = no limit)
+        self.row_budget = row_budget_ms / 1000
+        self.quarantine_path = self.quarantined = None
+        # Opt-in cache of each extract_* method's result by content hash, in
+        # a database of its own (attached as "cache") so it outlives rebuilds
+        self.extraction_cache = extraction_cache
+        self.extraction_cache_path = None
+        if output_db:
+            stem = os.path.splitext(output_db)[0]
+            self.dead_letter_path = Path(stem + '.dead_letter.csv')
+            self.dead_letters = RowLog(self.dead_letter_path, DEAD_LETTER_COLUMNS)
+            self.quarantine_path = Path(stem + '.quarantine.csv')
+            self.quarantined = RowLog(self.quarantine_path, QUARANTINE_COLUMNS)
+            self.extraction_cache_path = Path(stem + '.extract_cache.db')
+        # Opt-in timing and pattern match counts, written next to the DB
+        self.profiler = None
+        if profile:
+            self.profiler = ETLProfiler(PROFILED_PATTERNS)
+            for name in PROFILED_METHODS:
+                setattr(self, name, self.profiler.timed('methods', name, getattr(self, name)))
+            if self.workers > 1:
+                logger.warning("Profiling parses in this process; ignoring --workers")
+                self.workers = 1
         self.conn = None
         self.cursor = None
+        # Id caches for the lookup tables, keyed by table name
+        self.dimensions = {}
+        # Last scan_content result, shared by the extract_* methods
+        self.scanned_content = None
+        self.scan_result = None
+        # Cached results usable for the row being extracted, and the results
+        # computed for it that the writer should add to the cache
+        self.cached_results = {}
+        self.computed_results = None
         
     def __enter__(self):
         self.conn = sqlite3.connect(self.output_db)
         self.cursor = self.conn.cursor()
+        if self.extraction_cache:
+            self.cursor.execute('ATTACH DATABASE ? AS cache', (str(self.extraction_cache_path),))
+        if self.profiler:
+            self.cursor = TimedCursor(self.cursor, self.profiler)
         self.create_tables()
+        # Seeding data_version opens a transaction, and the bulk-load
+        # synchronous pragma cannot be changed inside one
+        self.conn.commit()
+        self.dimensions = {
+            'hosts': DimensionCache(self.cursor, 'hosts', 'host_id', ('name', 'joined_year'),
+                                    ('response_rate', 'is_superhost')),
+            'amenities': DimensionCache(self.cursor, 'amenities', 'amenity_id', ('name',)),
+        }
+        for cache in self.dimensions.values():
+            cache.load()
+        if self.bulk_load:
+            for pragma in self.BULK_LOAD_PRAGMAS:
+                self.cursor.execute(pragma)
+            self.drop_indexes()
         return self
         
     def __exit__(self, exc_type, exc_val, exc_tb):
         if self.conn:
+            # Whatever this run wrote, cached query results now miss
+            bump_data_version(self.cursor)
             self.conn.commit()
+            if self.bulk_load:
+                if self.indexes_dropped:
+                    self.create_indexes()
+                # Leaving WAL mode checkpoints the log back into the DB file
+                for pragma in self.DURABLE_PRAGMAS:
+                    self.cursor.execute(pragma)
             self.conn.close()
+        if self.dead_letters:
+            self.dead_letters.close()
+            self.quarantined.close()
             
     def create_tables(self):
         """Create database schema"""
@@ -77,7 +376,39 @@ class RVezyDataExtractor:
                 flexible_pickup BOOLEAN,
                 flexible_dropoff BOOLEAN,
                 towing_experience_required BOOLEAN,
-                FOREIGN KEY (host_id) REFERENCES hosts(host_id)
+                source_file_id INTEGER,
+                FOREIGN KEY (host_id) REFERENCES hosts(host_id),
+                FOREIGN KEY (source_file_id) REFERENCES source_files(source_file_id)
+            )
+        ''')
+        
+        # Databases created before per-file provenance lack source_file_id
+        self.cursor.execute('PRAGMA table_info(listings)')
+        if 'source_file_id' not in [column[1] for column in self.cursor.fetchall()]:
+            self.cursor.execute('ALTER TABLE listings ADD COLUMN source_file_id INTEGER '
+                                'REFERENCES source_files(source_file_id)')
+        
+        # Export files loaded into the database
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS source_files (
+                source_file_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                path TEXT UNIQUE,
+                scrape_date TEXT,
+                loaded_at TEXT,
+                rows_read INTEGER,
+                rows_superseded INTEGER
+            )
+        ''')
+        
+        # Resume point of each source file, saved with every batch commit.
+        # byte_offset is in the decompressed export and always on a row boundary.
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS load_checkpoints (
+                source_file_id INTEGER PRIMARY KEY,
+                byte_offset INTEGER,
+                completed BOOLEAN NOT NULL DEFAULT 0,
+                updated_at TEXT,
+                FOREIGN KEY (source_file_id) REFERENCES source_files(source_file_id)
             )
         ''')
         
@@ -135,6 +466,149 @@ class RVezyDataExtractor:
             )
         ''')
         
+        # Child rows are found by listing_id when a listing is re-ingested, so
+        # these indexes are kept even during a bulk load
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_pricing_listing_type
+            ON pricing (listing_id, discount_type, discount_percent)
+        ''')
+        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_addons_listing ON addons (listing_id)')
+        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_beds_listing ON beds (listing_id)')
+        
+        # Price/review history, one row per listing per changed scrape date
+        create_snapshot_table(self.cursor)
+        
+        # Per-segment aggregates for the analyses, kept current by refresh_segments()
+        create_segment_tables(self.cursor)
+        
+        # Counter bumped with every write, part of the query_cache key
+        create_data_version_table(self.cursor)
+        
+        # Content fingerprint of the last version loaded for each URL
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS listing_fingerprints (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL
+            )
+        ''')
+        
+        # Extraction cache: latest result of each extract_* method per content hash
+        if self.extraction_cache:
+            self.cursor.execute('''
+                CREATE TABLE IF NOT EXISTS cache.extraction_cache (
+                    content_hash TEXT NOT NULL,
+                    extractor TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    result TEXT NOT NULL,
+                    PRIMARY KEY (content_hash, extractor)
+                ) WITHOUT ROWID
+            ''')
+        
+    def create_indexes(self):
+        """Create the analysis indexes and refresh the query planner statistics"""
+        for name, target in self.INDEXES.items():
+            self.cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {target}')
+        self.cursor.execute('ANALYZE')
+        self.conn.commit()
+        self.indexes_dropped = False
+        
+    def drop_indexes(self):
+        """Drop the analysis indexes so a bulk load does not maintain them row by row"""
+        for name in self.INDEXES:
+            self.cursor.execute(f'DROP INDEX IF EXISTS {name}')
+        self.conn.commit()
+        self.indexes_dropped = True
+        
+    def refresh_segments(self):
+        """Recompute the segment summaries of the listings written since the last refresh"""
+        refreshed = refresh_segment_summaries(self.cursor)
+        self.conn.commit()
+        logger.info(f"Refreshed {refreshed} segment summaries")
+        
+    def compact(self):
+        """Purge child rows orphaned by earlier INSERT OR REPLACE loads, then VACUUM"""
+        for table in self.CHILD_TABLES:
+            self.cursor.execute(f'''
+                DELETE FROM {table} WHERE listing_id NOT IN (SELECT listing_id FROM listings)
+            ''')
+            logger.info(f"Removed {self.cursor.rowcount} orphaned rows from {table}")
+        self.conn.commit()
+        self.cursor.execute('VACUUM')
+        self.create_indexes()
+        
+    def scan_content(self, content: str) -> Dict:
+        """Find every structured field and flag phrase in one pass over content.
+        
+        Returns a dict with 'fields' (field name -> first match of its pattern,
+        the same match re.search would return) and 'phrases' (the flag,
+        amenity, RV type and delivery phrases that occur in content). The
+        result for the most recent content is reused by all extract_* methods.
+        """
+        if content is self.scanned_content:
+            return self.scan_result
+        
+        fields = {}
+        phrases = set()
+        # Offset before which a RUN_FIELDS key is known not to match
+        skip_until = {}
+        pos = 0
+        while True:
+            match = CONTENT_SCANNER.search(content, pos)
+            if not match:
+                break
+            start = match.start()
+            # Several branches may match at this offset; check each one that
+            # can start with the characters found here
+            if content[start] in PHRASE_MATCHER.root:
+                phrases.update(PHRASE_MATCHER.matches_at(content, start))
+            for phrase in CASELESS_PHRASES_BY_CHAR.get(content[start], []):
+                if content[start:start + len(phrase)].lower() == phrase:
+                    phrases.add(phrase)
+            candidates = (SCANNER_BRANCHES_BY_PREFIX.get(content[start:start + 2], [])
+                          + SCANNER_BRANCHES_BY_CHAR.get(content[start], []))
+            for kind, key, _ in candidates:
+                if key not in fields and start >= skip_until.get(key, 0):
+                    if kind == 'field':
+                        field_match = FIELD_REGEXES[key].match(content, start)
+                        if not field_match and key in RUN_FIELDS:
+                            prefix_end = start + len(literal_prefix(FIELD_REGEXES[key].pattern))
+                            skip_until[key] = RUN_FIELDS[key].match(content, prefix_end).end()
+                    else:
+                        anchor, allowed = ANCHORED_FIELDS[key]
+                        anchor_match = anchor.match(content, start)
+                        if not anchor_match:
+                            continue
+                        begin = start
+                        while begin > 0 and allowed(content[begin - 1]):
+                            begin -= 1
+                        field_match = FIELD_REGEXES[key].search(content, begin, anchor_match.end())
+                    if field_match:
+                        fields[key] = field_match
+            pos = start + 1
+        
+        self.scanned_content = content
+        self.scan_result = {'fields': fields, 'phrases': phrases, 'sections': self.index_sections(content)}
+        return self.scan_result
+    
+    def index_sections(self, content: str) -> Dict[str, Tuple[int, int]]:
+        """Locate each section in SECTION_HEADINGS, as (start, end) offsets into content.
+        
+        A section is missing when its start heading never appears, or no end
+        heading follows it; either is found by one str.find, so a missing
+        section costs a single scan rather than a regex search that tries
+        every start heading to the end of the content.
+        """
+        sections = {}
+        for name, (start_heading, end_heading) in self.SECTION_HEADINGS.items():
+            start = content.find(start_heading)
+            if start < 0:
+                continue
+            start += len(start_heading)
+            end = content.find(end_heading, start + 1)
+            if end >= 0:
+                sections[name] = (start, end)
+        return sections
+    
     def extract_host_info(self, content: str) -> Dict:
         """Extract host information from content"""
         host_info = {
@@ -143,20 +617,21 @@ class RVezyDataExtractor:
             'response_rate': None,
             'is_superhost': False
         }
+        scan = self.scan_content(content)
         
         # Extract host name and join year
-        host_match = re.search(r'Hosted by ([A-Za-z]+)Joined in (\d{4})', content)
+        host_match = scan['fields'].get('host')
         if host_match:
             host_info['name'] = host_match.group(1)
             host_info['joined_year'] = int(host_match.group(2))
         
         # Extract response rate
-        response_match = re.search(r'(\d+)% response rate', content)
+        response_match = scan['fields'].get('response_rate')
         if response_match:
             host_info['response_rate'] = int(response_match.group(1))
         
         # Check if superhost
-        if 'Superhost' in content:
+        if 'Superhost' in scan['phrases']:
             host_info['is_superhost'] = True
             
         return host_info
@@ -175,43 +650,34 @@ class RVezyDataExtractor:
             'hitch_size': None,
             'hitch_weight_lbs': None
         }
+        scan = self.scan_content(content)
         
         # Extract year, make, model from title
-        title_match = re.search(r'Rent my (\d{4}) ([A-Za-z\-\s]+?) ([A-Za-z0-9\-\s]+?) from', title)
+        title_match = search_title(title)
         if title_match:
             specs['rv_year'] = int(title_match.group(1))
             specs['rv_make'] = title_match.group(2).strip()
             specs['rv_model'] = title_match.group(3).strip()
         
         # Extract RV type from structured field
-        rv_type_match = re.search(r'Type of RV\s*([A-Za-z\s]+?)(?:Accommodations|What)', content)
+        rv_type_match = scan['fields'].get('rv_type')
         if rv_type_match:
             specs['rv_type'] = rv_type_match.group(1).strip()
         else:
             # Fallback to searching in content for common types
-            rv_types = ['Travel Trailer', 'Class A', 'Class B', 'Class C', 'Fifth Wheel', 
-                       'Toy Hauler', 'Campervan', 'Tent Trailer', 'Micro Trailer', 
-                       'Hybrid', 'Truck Camper', 'RV Cottage']
-            for rv_type in rv_types:
-                if rv_type in content:
+            for rv_type in self.RV_TYPES:
+                if rv_type in scan['phrases']:
                     specs['rv_type'] = rv_type
                     break
         
         # Extract specifications
-        patterns = {
-            'num_slide_outs': r'# of slide outs\s*(\d+)',
-            'weight_lbs': r'Weight\s*(\d+)\s*lbs',
-            'hitch_weight_lbs': r'Hitch Weight\s*(\d+)\s*lbs',
-            'length_ft': r'Length\(ft\)\s*(\d+)\s*ft'
-        }
-        
-        for key, pattern in patterns.items():
-            match = re.search(pattern, content)
+        for key in ('num_slide_outs', 'weight_lbs', 'hitch_weight_lbs', 'length_ft'):
+            match = scan['fields'].get(key)
             if match:
                 specs[key] = int(match.group(1))
         
         # Extract sleeps with proper pattern to avoid concatenation with length
-        sleeps_match = re.search(r'Sleeps\s*(\d{1,2})(?:\s|$|[^0-9])', content)
+        sleeps_match = scan['fields'].get('sleeps')
         if sleeps_match:
             sleeps_value = int(sleeps_match.group(1))
             # Validate sleeps value is reasonable
@@ -221,7 +687,7 @@ class RVezyDataExtractor:
                 print(f"Warning: Invalid sleeps value {sleeps_value} found, skipping")
         
         # Extract hitch size
-        hitch_match = re.search(r'Hitch Size\s*([0-9\s/"]+")', content)
+        hitch_match = scan['fields'].get('hitch_size')
         if hitch_match:
             specs['hitch_size'] = hitch_match.group(1).strip()
             
@@ -229,8 +695,7 @@ class RVezyDataExtractor:
     
     def extract_location(self, content: str) -> Tuple[str, str]:
         """Extract city and province"""
-        # Pattern for location extraction
-        location_match = re.search(r'ft([A-Za-z\-\s]+), ([A-Z]{2})', content)
+        location_match = self.scan_content(content)['fields'].get('location')
         if location_match:
             city = location_match.group(1).strip()
             province = location_match.group(2)
@@ -244,26 +709,21 @@ class RVezyDataExtractor:
             'security_deposit': None,
             'discounts': []
         }
+        scan = self.scan_content(content)
         
         # Extract base price from title
-        price_match = re.search(r'from \$(\d+)/night', title)
+        price_match = PRICE_REGEX.search(title)
         if price_match:
             pricing['base_price'] = float(price_match.group(1))
         
         # Extract security deposit
-        deposit_match = re.search(r'Security Deposit\$(\d+)', content)
+        deposit_match = scan['fields'].get('security_deposit')
         if deposit_match:
             pricing['security_deposit'] = float(deposit_match.group(1))
         
         # Extract discounts
-        discount_patterns = [
-            (r'Midweek\$(\d+)/Night(\d+)% off', 'midweek'),
-            (r'Weekly\$(\d+)/Night(\d+)% off', 'weekly'),
-            (r'Monthly\$(\d+)/Night(\d+)% off', 'monthly')
-        ]
-        
-        for pattern, discount_type in discount_patterns:
-            match = re.search(pattern, content)
+        for discount_type in ('midweek', 'weekly', 'monthly'):
+            match = scan['fields'].get(discount_type)
             if match:
                 pricing['discounts'].append({
                     'type': discount_type,
@@ -275,24 +735,8 @@ class RVezyDataExtractor:
     
     def extract_amenities(self, content: str) -> List[str]:
         """Extract amenities list"""
-        amenities = []
-        
-        # Common amenities to look for
-        amenity_list = [
-            'Air conditioner', 'Heater', 'Awning', 'Solar', 'Inverter',
-            'Inside shower', 'Outside shower', 'Toilet', 'TV & DVD',
-            'Refrigerator', 'Freezer', 'Stove range', 'Microwave', 'Oven',
-            'Kitchen sink', 'Dining table', 'Linens provided', 'Camping chairs',
-            'Pet friendly', 'Family friendly', 'Backup camera', 'Leveling jacks',
-            'Tow hitch', 'On board generator', 'CD player', 'Radio', 'Aux input',
-            'USB input', 'Extra storage', 'Full-Winter rental available'
-        ]
-        
-        for amenity in amenity_list:
-            if amenity in content:
-                amenities.append(amenity)
-                
-        return amenities
+        phrases = self.scan_content(content)['phrases']
+        return [amenity for amenity in self.AMENITIES if amenity in phrases]
     
     def extract_reviews(self, content: str) -> Dict:
         """Extract review information"""
@@ -304,23 +748,17 @@ class RVezyDataExtractor:
             'cleanliness_rating': None,
             'communication_rating': None
         }
+        scan = self.scan_content(content)
         
         # Extract overall rating and number of reviews
-        rating_match = re.search(r'(\d+\.\d+)\((\d+) reviews\)', content)
+        rating_match = scan['fields'].get('rating')
         if rating_match:
             reviews['overall_rating'] = float(rating_match.group(1))
             reviews['num_reviews'] = int(rating_match.group(2))
         
         # Extract individual ratings
-        rating_types = {
-            'accuracy_rating': r'Accuracy(\d+\.\d+)',
-            'value_rating': r'Value(\d+\.\d+)',
-            'cleanliness_rating': r'Cleanliness(\d+\.\d+)',
-            'communication_rating': r'Communication(\d+\.\d+)'
-        }
-        
-        for key, pattern in rating_types.items():
-            match = re.search(pattern, content)
+        for key in ('accuracy_rating', 'value_rating', 'cleanliness_rating', 'communication_rating'):
+            match = scan['fields'].get(key)
             if match:
                 reviews[key] = float(match.group(1))
                 
@@ -333,17 +771,19 @@ class RVezyDataExtractor:
             'max_km': None,
             'price_per_km': None
         }
+        scan = self.scan_content(content)
         
-        if 'No truck no problem' in content or 'delivery' in content.lower():
+        # "delivery" in any case counts (a CASELESS_PHRASES entry)
+        if 'No truck no problem' in scan['phrases'] or 'delivery' in scan['phrases']:
             delivery['available'] = True
             
             # Extract max delivery distance
-            km_match = re.search(r'delivery up to (\d+) km', content)
+            km_match = scan['fields'].get('delivery_max_km')
             if km_match:
                 delivery['max_km'] = int(km_match.group(1))
             
             # Extract delivery price
-            price_match = re.search(r'Delivery\$(\d+\.?\d*) per km', content)
+            price_match = scan['fields'].get('delivery_price_per_km')
             if price_match:
                 delivery['price_per_km'] = float(price_match.group(1))
                 
@@ -351,11 +791,12 @@ class RVezyDataExtractor:
     
     def extract_rules(self, content: str) -> Dict:
         """Extract RV rules"""
+        phrases = self.scan_content(content)['phrases']
         rules = {
-            'flexible_pickup': 'Flexible pickup time' in content,
-            'flexible_dropoff': 'Flexible drop-off time' in content,
-            'towing_experience_required': 'Towing experience required' in content,
-            'pets_allowed': 'Pet friendly' in content and 'No pets' not in content
+            'flexible_pickup': 'Flexible pickup time' in phrases,
+            'flexible_dropoff': 'Flexible drop-off time' in phrases,
+            'towing_experience_required': 'Towing experience required' in phrases,
+            'pets_allowed': 'Pet friendly' in phrases and 'No pets' not in phrases
         }
         
         return rules
@@ -364,13 +805,11 @@ class RVezyDataExtractor:
         """Extract add-ons and their prices"""
         addons = []
         
-        # Pattern for add-ons
-        addon_pattern = r'([A-Za-z\s]+):\s*\$(\d+)'
-        addon_section = re.search(r'Add-ons(.+?)RV rules', content, re.DOTALL)
-        
-        if addon_section:
-            addon_text = addon_section.group(1)
-            for match in re.finditer(addon_pattern, addon_text):
+        # Only the "Add-ons ... RV rules" slice is searched
+        section = self.scan_content(content)['sections'].get('addons')
+        if section:
+            addon_text = content[section[0]:section[1]]
+            for match in ADDON_REGEX.finditer(addon_text):
                 addons.append({
                     'name': match.group(1).strip(),
                     'price': float(match.group(2))
@@ -382,137 +821,683 @@ class RVezyDataExtractor:
         """Extract bed information"""
         beds = []
         
-        # Pattern for beds
-        bed_patterns = [
-            (r'(\d+) bed([A-Za-z]+)', 'bed'),
-            (r'(\d+) dinette bed([A-Za-z]+)', 'dinette bed'),
-            (r'(\d+) pullout sofa([A-Za-z]+)', 'pullout sofa'),
-            (r'(\d+) bunk bed([A-Za-z]+)', 'bunk bed')
-        ]
-        
-        for pattern, bed_type in bed_patterns:
-            matches = re.finditer(pattern, content)
-            for match in matches:
-                beds.append({
-                    'quantity': int(match.group(1)),
-                    'bed_type': bed_type,
-                    'bed_size': match.group(2)
-                })
+        # One pass for all bed types (matches of different types never
+        # overlap), anchored on the type word rather than the leading digits
+        pos = 0
+        while True:
+            anchor = BED_ANCHOR_REGEX.search(content, pos)
+            if not anchor:
+                break
+            begin = anchor.start() - 1
+            if begin > 0 and content[begin] == ' ' and content[begin - 1].isdecimal():
+                while begin > 0 and content[begin - 1].isdecimal():
+                    begin -= 1
+                match = BED_REGEX.match(content, begin)
+                if match:
+                    beds.append({
+                        'quantity': int(match.group(1)),
+                        'bed_type': match.group(2),
+                        'bed_size': match.group(3)
+                    })
+                    pos = match.end()
+                    continue
+            pos = anchor.start() + 1
+        
+        # Keep the original grouping: all beds of one type, in BED_TYPES order
+        beds.sort(key=lambda bed: self.BED_TYPES.index(bed['bed_type']))
                 
         return beds
     
-    def process_listing(self, row: Dict) -> None:
-        """Process a single listing and insert into database"""
-        try:
-            url = row['URL']
-            title = row['Title']
-            content = row['Content']
-            
-            # Extract all information
-            host_info = self.extract_host_info(content)
-            rv_specs = self.extract_rv_specs(content, title)
-            city, province = self.extract_location(content)
-            pricing = self.extract_pricing(content, title)
-            amenities = self.extract_amenities(content)
-            reviews = self.extract_reviews(content)
-            delivery = self.extract_delivery_info(content)
-            rules = self.extract_rules(content)
-            addons = self.extract_addons(content)
-            beds = self.extract_beds(content)
-            
-            # Insert host if not exists
-            self.cursor.execute('''
-                INSERT OR IGNORE INTO hosts (name, joined_year, response_rate, is_superhost)
+    def run_extractor(self, name: str, *args):
+        """Call one extract_* method, unless the row has a current cached result for it"""
+        if name in self.cached_results:
+            return self.cached_results[name]
+        result = getattr(self, name)(*args)
+        if self.computed_results is not None:
+            self.computed_results[name] = result
+        return result
+    
+    def extract_listing(self, row: Dict) -> Dict:
+        """Parse a single CSV row into a plain record ready for insertion.
+        
+        A row carrying 'cached_extractions' (see with_cached_extractions) only
+        runs the extractors missing from it, and the record's 'extractions'
+        holds what was run, for the writer to cache.
+        """
+        url = row['URL']
+        title = row['Title']
+        content = row['Content']
+        self.cached_results = row.get('cached_extractions') or {}
+        self.computed_results = {} if 'cached_extractions' in row else None
+        
+        # Extract all information
+        host_info = self.run_extractor('extract_host_info', content)
+        rv_specs = self.run_extractor('extract_rv_specs', content, title)
+        city, province = self.run_extractor('extract_location', content)
+        pricing = self.run_extractor('extract_pricing', content, title)
+        amenities = self.run_extractor('extract_amenities', content)
+        reviews = self.run_extractor('extract_reviews', content)
+        delivery = self.run_extractor('extract_delivery_info', content)
+        rules = self.run_extractor('extract_rules', content)
+        addons = self.run_extractor('extract_addons', content)
+        beds = self.run_extractor('extract_beds', content)
+        
+        # Values in LISTING_COLUMNS order, minus host_id
+        listing = (
+            url, title, city, province,
+            rv_specs['rv_type'], rv_specs['rv_year'], rv_specs['rv_make'],
+            rv_specs['rv_model'], rv_specs['length_ft'], rv_specs['sleeps'],
+            rv_specs['num_slide_outs'], rv_specs['weight_lbs'], rv_specs['hitch_size'],
+            rv_specs['hitch_weight_lbs'], pricing['base_price'], pricing['security_deposit'],
+            rules['pets_allowed'], delivery['available'], delivery['max_km'],
+            delivery['price_per_km'], reviews['overall_rating'], reviews['num_reviews'],
+            reviews['accuracy_rating'], reviews['value_rating'], reviews['cleanliness_rating'],
+            reviews['communication_rating'], rules['flexible_pickup'], rules['flexible_dropoff'],
+            rules['towing_experience_required']
+        )
+        
+        return {
+            'url': url,
+            'content_hash': content_fingerprint(row),
+            'host': (host_info['name'], host_info['joined_year'],
+                     host_info['response_rate'], host_info['is_superhost']),
+            'listing': listing,
+            'discounts': [(d['type'], d['percent'], d['price']) for d in pricing['discounts']],
+            'amenities': amenities,
+            'addons': [(a['name'], a['price']) for a in addons],
+            'beds': [(b['bed_type'], b['bed_size'], b['quantity']) for b in beds],
+            'extractions': self.computed_results
+        }
+    
+    def insert_records(self, records: List[Dict]) -> None:
+        """Insert a batch of extracted records with executemany (no commit)"""
+        # Resolve hosts from every record, so first-seen host details win
+        # exactly as they would row by row
+        hosts = self.dimensions['hosts']
+        host_ids = {}
+        for record in records:
+            host_ids[record['host'][:2]] = hosts.resolve(record['host'][:2], record['host'][2:])
+        
+        # A URL repeated within one batch keeps only its last occurrence, as
+        # row-by-row INSERT OR REPLACE would
+        latest = {}
+        for record in reversed(records):
+            latest.setdefault(record['url'], record)
+        all_records, records = records, list(reversed(latest.values()))
+        
+        # Upsert listings; an existing URL keeps its listing_id
+        urls = [record['url'] for record in records]
+        existing_ids = self.lookup_listing_ids(urls)
+        self.cursor.executemany(f'''
+            INSERT INTO listings ({', '.join(LISTING_COLUMNS)})
+            VALUES ({', '.join('?' * len(LISTING_COLUMNS))})
+            ON CONFLICT(url) DO UPDATE SET
+                {', '.join(f'{column} = excluded.{column}' for column in LISTING_COLUMNS if column != 'url')}
+        ''', [
+            record['listing'][:2] + (host_ids[record['host'][:2]],) + record['listing'][2:]
+            + (self.listing_sources.get(record['url']),)
+            for record in records
+        ])
+        
+        listing_ids = self.lookup_listing_ids(urls)
+        
+        # Re-ingested listings get a fresh set of child rows
+        for table in self.CHILD_TABLES:
+            self.cursor.executemany(f'DELETE FROM {table} WHERE listing_id = ?',
+                                    [(listing_id,) for listing_id in existing_ids.values()])
+        
+        # Snapshot tracked fields that changed since the previous scrape date,
+        # dated by the export each listing came from
+        snapshots = {}
+        for record in records:
+            scrape_date = self.source_dates.get(self.listing_sources.get(record['url']), self.scrape_date)
+            snapshots.setdefault(scrape_date, []).append(
+                (record['url'], tuple(record['listing'][i] for i in SNAPSHOT_POSITIONS)))
+        for scrape_date, rows in snapshots.items():
+            self.snapshot_recorder(scrape_date).record(rows)
+        
+        # Insert pricing discounts
+        self.cursor.executemany('''
+            INSERT INTO pricing (listing_id, discount_type, discount_percent, discounted_price)
+            VALUES (?, ?, ?, ?)
+        ''', [(listing_ids[record['url']],) + discount
+              for record in records for discount in record['discounts']])
+        
+        # Insert amenities
+        amenities = self.dimensions['amenities']
+        amenity_ids = {}
+        for record in all_records:
+            for amenity in record['amenities']:
+                amenity_ids[amenity] = amenities.resolve((amenity,))
+        self.cursor.executemany('''
+            INSERT OR IGNORE INTO listing_amenities (listing_id, amenity_id) 
+            VALUES (?, ?)
+        ''', [(listing_ids[record['url']], amenity_ids[amenity])
+              for record in records for amenity in record['amenities']])
+        
+        # Insert add-ons
+        self.cursor.executemany('''
+            INSERT INTO addons (listing_id, name, price) VALUES (?, ?, ?)
+        ''', [(listing_ids[record['url']],) + addon
+              for record in records for addon in record['addons']])
+        
+        # Insert beds
+        self.cursor.executemany('''
+            INSERT INTO beds (listing_id, bed_type, bed_size, quantity) VALUES (?, ?, ?, ?)
+        ''', [(listing_ids[record['url']],) + bed
+              for record in records for bed in record['beds']])
+        
+        # Record fingerprints in the same transaction as the listing rows
+        self.cursor.executemany('''
+            INSERT OR REPLACE INTO listing_fingerprints (url, content_hash) VALUES (?, ?)
+        ''', [(record['url'], record['content_hash']) for record in records])
+        bump_data_version(self.cursor)
+        
+        # Cache the extractor results computed for these rows
+        if self.extraction_cache:
+            self.cursor.executemany('''
+                INSERT OR REPLACE INTO cache.extraction_cache (content_hash, extractor, version, result)
                 VALUES (?, ?, ?, ?)
-            ''', (host_info['name'], host_info['joined_year'], 
-                  host_info['response_rate'], host_info['is_superhost']))
-            
-            # Get host_id
+            ''', [(record['content_hash'], name, self.EXTRACTOR_VERSIONS[name], json.dumps(result))
+                  for record in all_records for name, result in (record.get('extractions') or {}).items()])
+    
+    def lookup_listing_ids(self, urls: List[str]) -> Dict[str, int]:
+        """Map listing URLs to their current listing_id"""
+        listing_ids = {}
+        # Chunked to stay under SQLite's bound-parameter limit
+        for i in range(0, len(urls), 500):
+            chunk = urls[i:i + 500]
+            self.cursor.execute(f'''
+                SELECT url, listing_id FROM listings WHERE url IN ({', '.join('?' * len(chunk))})
+            ''', chunk)
+            listing_ids.update(self.cursor.fetchall())
+        return listing_ids
+    
+    def snapshot_recorder(self, scrape_date: str) -> SnapshotRecorder:
+        """Snapshot recorder for one scrape date, loaded on first use"""
+        if scrape_date not in self.snapshots:
+            self.snapshots[scrape_date] = SnapshotRecorder(self.cursor, scrape_date)
+            self.snapshots[scrape_date].load()
+        return self.snapshots[scrape_date]
+    
+    def write_batch(self, records: List[Dict], checkpoint: Optional[Tuple[int, int]] = None) -> int:
+        """Write a batch of records in a single transaction.
+        
+        If the batch fails it is rolled back and retried one record at a time,
+        so a bad row is dead-lettered and skipped without losing the rest.
+        A (source_file_id, byte offset) checkpoint is saved in the same
+        transaction. Returns the number of records written.
+        """
+        if not records:
+            if checkpoint:
+                self.save_checkpoint(checkpoint)
+                self.conn.commit()
+            return 0
+        
+        try:
+            self.insert_records(records)
+            if checkpoint:
+                self.save_checkpoint(checkpoint)
+            self.conn.commit()
+            return len(records)
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            # Ids and snapshots cached during the failed transaction no longer exist
+            for cache in self.dimensions.values():
+                cache.load()
+            for recorder in self.snapshots.values():
+                recorder.load()
+            if len(records) == 1:
+                url = records[0]['url']
+                self.dead_letter(self.batch_rows.get(url, {'URL': url}), str(e))
+                return 0
+            logger.warning(f"Batch insert failed ({str(e)}), retrying {len(records)} listings individually")
+        
+        written = sum(self.write_batch([record]) for record in records)
+        if checkpoint:
+            self.save_checkpoint(checkpoint)
+            self.conn.commit()
+        return written
+    
+    def save_checkpoint(self, checkpoint: Tuple[int, int]) -> None:
+        """Record that every row before checkpoint has been handled (no commit).
+        
+        Sources are read in order, so those before the checkpoint's file are complete.
+        """
+        source_file_id, offset = checkpoint
+        now = time.strftime('%Y-%m-%d %H:%M:%S')
+        for candidate, _ in self.sources:
+            if candidate == source_file_id:
+                break
             self.cursor.execute('''
-                SELECT host_id FROM hosts WHERE name = ? AND joined_year = ?
-            ''', (host_info['name'], host_info['joined_year']))
-            host_id = self.cursor.fetchone()
-            host_id = host_id[0] if host_id else None
-            
-            # Insert listing
+                UPDATE load_checkpoints SET completed = 1, updated_at = ?
+                WHERE source_file_id = ? AND NOT completed
+            ''', (now, candidate))
+        self.cursor.execute('''
+            UPDATE load_checkpoints SET byte_offset = ?, updated_at = ? WHERE source_file_id = ?
+        ''', (offset, now, source_file_id))
+    
+    def dead_letter(self, row: Dict, error: str) -> None:
+        """Log a failed row and append it, with its error, to the dead-letter CSV"""
+        url = row.get('URL', 'Unknown')
+        logger.error(f"Error processing listing {url}: {error}")
+        self.dead_letters.append(dict(
+            row, source_file_id=self.listing_sources.get(url), error=error,
+            failed_at=time.strftime('%Y-%m-%d %H:%M:%S')
+        ))
+    
+    def quarantine(self, row: Dict, seconds: float) -> None:
+        """Set aside a row that blew the parse-time budget, for inspection"""
+        url = row.get('URL', 'Unknown')
+        logger.warning(f"Quarantined listing {url}: parsing took {seconds * 1000:.1f}ms "
+                       f"(budget {self.row_budget * 1000:g}ms)")
+        self.quarantined.append(dict(
+            row, source_file_id=self.listing_sources.get(url), parse_ms=round(seconds * 1000, 1),
+            quarantined_at=time.strftime('%Y-%m-%d %H:%M:%S')
+        ))
+    
+    def try_extract_listing(self, row: Dict) -> Tuple[str, Optional[Dict], Optional[str]]:
+        """Parse a row, returning (url, record, error) instead of raising.
+        
+        The record's parse_seconds is checked against the row budget by the
+        writer. Python cannot interrupt a running regex, so the budget is
+        applied after the row is parsed; the linear-time patterns keep that
+        overrun proportional to the row's size.
+        """
+        try:
+            start = time.perf_counter()
+            if self.profiler:
+                record = self.profile_listing(row)
+            else:
+                record = self.extract_listing(row)
+            record['parse_seconds'] = time.perf_counter() - start
+            return row.get('URL', 'Unknown'), record, None
+        except Exception as e:
+            return row.get('URL', 'Unknown'), None, str(e)
+    
+    def profile_listing(self, row: Dict) -> Dict:
+        """extract_listing, recording the row's parse time and which patterns matched"""
+        start = time.perf_counter()
+        record = self.extract_listing(row)
+        elapsed = time.perf_counter() - start
+        
+        scan = self.scan_content(row['Content'])
+        hits = list(scan['fields']) + [f"phrase:{phrase}" for phrase in scan['phrases']]
+        if search_title(row['Title']):
+            hits.append('title')
+        if PRICE_REGEX.search(row['Title']):
+            hits.append('price')
+        if 'addons' in scan['sections']:
+            hits.append('addon_section')
+        if record['addons']:
+            hits.append('addon')
+        if record['beds']:
+            hits.append('bed')
+        self.profiler.add_row(row['URL'], elapsed, hits)
+        return record
+    
+    def parse_rows(self, rows: Iterator[Dict]) -> Iterator[Tuple[str, Optional[Dict], Optional[str]]]:
+        """Parse rows in input order, in worker processes when workers > 1.
+        
+        Rows are sent to the pool in chunks of chunk_size. At most two chunks
+        per worker are in flight, so memory stays bounded on large files and
+        the workers keep parsing while the caller writes to SQLite.
+        """
+        if self.workers <= 1:
+            for row in rows:
+                yield self.try_extract_listing(row)
+            return
+        
+        chunks = iter(lambda: list(islice(rows, self.chunk_size)), [])
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(parse_chunk, chunk))
+                if len(pending) >= self.workers * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+    
+    def register_sources(self) -> None:
+        """Record the input files in source_files, newest scrape first"""
+        if not self.input_files:
+            raise FileNotFoundError(f"No exports match {self.input_file}")
+        dated = []
+        for path in self.input_files:
+            if not path.is_file():
+                raise FileNotFoundError(f"Export not found: {path}")
+            dated.append((self.scrape_date_override or scrape_date_from_filename(path), path.name, path))
+        dated.sort(reverse=True)
+        
+        self.sources = []
+        self.source_dates = {}
+        for scrape_date, _, path in dated:
             self.cursor.execute('''
-                INSERT OR REPLACE INTO listings (
-                    url, title, host_id, location_city, location_province,
-                    rv_type, rv_year, rv_make, rv_model, length_ft, sleeps,
-                    num_slide_outs, weight_lbs, hitch_size, hitch_weight_lbs,
-                    base_price, security_deposit, pet_friendly, delivery_available,
-                    delivery_max_km, delivery_price_per_km, overall_rating, num_reviews,
-                    accuracy_rating, value_rating, cleanliness_rating, communication_rating,
-                    flexible_pickup, flexible_dropoff, towing_experience_required
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                url, title, host_id, city, province,
-                rv_specs['rv_type'], rv_specs['rv_year'], rv_specs['rv_make'],
-                rv_specs['rv_model'], rv_specs['length_ft'], rv_specs['sleeps'],
-                rv_specs['num_slide_outs'], rv_specs['weight_lbs'], rv_specs['hitch_size'],
-                rv_specs['hitch_weight_lbs'], pricing['base_price'], pricing['security_deposit'],
-                rules['pets_allowed'], delivery['available'], delivery['max_km'],
-                delivery['price_per_km'], reviews['overall_rating'], reviews['num_reviews'],
-                reviews['accuracy_rating'], reviews['value_rating'], reviews['cleanliness_rating'],
-                reviews['communication_rating'], rules['flexible_pickup'], rules['flexible_dropoff'],
-                rules['towing_experience_required']
-            ))
-            
-            listing_id = self.cursor.lastrowid
-            
-            # Insert pricing discounts
-            for discount in pricing['discounts']:
-                self.cursor.execute('''
-                    INSERT INTO pricing (listing_id, discount_type, discount_percent, discounted_price)
-                    VALUES (?, ?, ?, ?)
-                ''', (listing_id, discount['type'], discount['percent'], discount['price']))
-            
-            # Insert amenities
-            for amenity in amenities:
-                self.cursor.execute('INSERT OR IGNORE INTO amenities (name) VALUES (?)', (amenity,))
-                self.cursor.execute('SELECT amenity_id FROM amenities WHERE name = ?', (amenity,))
-                amenity_id = self.cursor.fetchone()[0]
-                self.cursor.execute('''
-                    INSERT OR IGNORE INTO listing_amenities (listing_id, amenity_id) 
-                    VALUES (?, ?)
-                ''', (listing_id, amenity_id))
+                INSERT INTO source_files (path, scrape_date, loaded_at) VALUES (?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    scrape_date = excluded.scrape_date, loaded_at = excluded.loaded_at
+            ''', (str(path.resolve()), scrape_date, time.strftime('%Y-%m-%d %H:%M:%S')))
+            self.cursor.execute('SELECT source_file_id FROM source_files WHERE path = ?',
+                                (str(path.resolve()),))
+            source_file_id = self.cursor.fetchone()[0]
+            self.sources.append((source_file_id, path))
+            self.source_dates[source_file_id] = scrape_date
+        self.conn.commit()
+    
+    def read_exports(self, counts: Optional[Dict] = None,
+                     checkpoints: Optional[Dict] = None) -> Iterator[Dict]:
+        """Rows of every input file, newest scrape first.
+        
+        Each URL is loaded from the newest export that contains it: rows of
+        older exports for a URL already seen are skipped before parsing
+        (record_superseded_history() reads them for listing_snapshots only).
+        All of a URL's rows within that export are kept, so duplicates inside
+        one file behave as in a single-file load. Fills counts with
+        source_file_id -> (rows read, rows superseded) and keeps
+        read_position at the row just yielded.
+        
+        checkpoints (source_file_id -> (byte offset, completed)) resumes a
+        load: completed files are skipped and the others continue from
+        their offset. URLs already loaded from a skipped part are claimed
+        from the listings table so older exports still cannot overwrite them.
+        """
+        self.listing_sources = {}
+        for source_file_id, path in self.sources:
+            offset, completed = (checkpoints or {}).get(source_file_id, (0, False))
+            if offset or completed:
+                self.cursor.execute('SELECT url FROM listings WHERE source_file_id = ?', (source_file_id,))
+                for (url,) in self.cursor.fetchall():
+                    self.listing_sources.setdefault(url, source_file_id)
+            if completed:
+                continue
             
-            # Insert add-ons
-            for addon in addons:
-                self.cursor.execute('''
-                    INSERT INTO addons (listing_id, name, price) VALUES (?, ?, ?)
-                ''', (listing_id, addon['name'], addon['price']))
+            read = superseded = 0
+            with open_export(path, binary=True) as file:
+                reader = ExportReader(file)
+                if offset:
+                    reader.seek(offset)
+                for row in reader:
+                    read += 1
+                    url = row.get('URL')
+                    if self.listing_sources.setdefault(url, source_file_id) != source_file_id:
+                        superseded += 1
+                        continue
+                    self.read_position = (source_file_id, reader.offset)
+                    yield row
+            if counts is not None and not offset:
+                counts[source_file_id] = (read, superseded)
+    
+    def record_superseded_history(self) -> None:
+        """Snapshot the rows of older exports that read_exports() skipped.
+        
+        Run after the load: listings keep the newest export's row, but each
+        superseded row's tracked fields are still recorded under its own
+        scrape date, so a backfill of several days keeps their history. The
+        recorders compare a date with the snapshot before it, so dates are
+        recorded oldest first, and each URL's newest date (from the loaded
+        listing) is re-recorded after its older ones.
+        """
+        observations = {}
+        for source_file_id, path in reversed(self.sources):
+            scrape_date = self.source_dates[source_file_id]
             
-            # Insert beds
-            for bed in beds:
-                self.cursor.execute('''
-                    INSERT INTO beds (listing_id, bed_type, bed_size, quantity) VALUES (?, ?, ?, ?)
-                ''', (listing_id, bed['bed_type'], bed['bed_size'], bed['quantity']))
+            def superseded_rows():
+                with open_export(path, binary=True) as file:
+                    for row in ExportReader(file):
+                        if self.listing_sources.get(row.get('URL'), source_file_id) != source_file_id:
+                            yield row
             
+            for url, record, error in self.parse_rows(superseded_rows()):
+                if record:
+                    observations.setdefault(scrape_date, {})[url] = tuple(
+                        record['listing'][i] for i in SNAPSHOT_POSITIONS)
+        if not observations:
+            return
+        
+        urls = list({url for rows in observations.values() for url in rows})
+        for i in range(0, len(urls), 500):
+            chunk = urls[i:i + 500]
+            self.cursor.execute(f'''
+                SELECT url, source_file_id, {', '.join(TRACKED_FIELDS)} FROM listings
+                WHERE url IN ({', '.join('?' * len(chunk))})
+            ''', chunk)
+            for url, source_file_id, *values in self.cursor.fetchall():
+                # Only listings this run loaded; a failed row left an older version
+                if source_file_id == self.listing_sources.get(url) and source_file_id in self.source_dates:
+                    observations.setdefault(self.source_dates[source_file_id], {})[url] = tuple(values)
+        
+        recorded = 0
+        for scrape_date in sorted(observations):
+            self.snapshots[scrape_date] = SnapshotRecorder(self.cursor, scrape_date)
+            self.snapshots[scrape_date].load()
+            self.snapshots[scrape_date].record(list(observations[scrape_date].items()))
+            recorded += len(observations[scrape_date])
+        self.conn.commit()
+        logger.info(f"Recorded snapshot history of {len(urls)} listings across "
+                    f"{len(observations)} scrape dates ({recorded} observations)")
+    
+    def load_checkpoints(self) -> Dict[int, Tuple[int, bool]]:
+        """Saved (byte offset, completed) of this run's sources, or start them afresh"""
+        source_ids = [source_file_id for source_file_id, _ in self.sources]
+        if not self.resume:
+            self.cursor.executemany('''
+                INSERT OR REPLACE INTO load_checkpoints (source_file_id, byte_offset, completed, updated_at)
+                VALUES (?, 0, 0, ?)
+            ''', [(source_file_id, time.strftime('%Y-%m-%d %H:%M:%S')) for source_file_id in source_ids])
             self.conn.commit()
-            
-        except Exception as e:
-            logger.error(f"Error processing listing {row.get('URL', 'Unknown')}: {str(e)}")
+            return {}
+        self.cursor.execute(f'''
+            SELECT source_file_id, byte_offset, completed FROM load_checkpoints
+            WHERE source_file_id IN ({', '.join('?' * len(source_ids))})
+        ''', source_ids)
+        checkpoints = {row[0]: (row[1] or 0, bool(row[2])) for row in self.cursor.fetchall()}
+        for source_file_id, path in self.sources:
+            offset, completed = checkpoints.get(source_file_id, (0, False))
+            if completed:
+                logger.info(f"Resume: {path.name} already loaded")
+            elif offset:
+                logger.info(f"Resume: {path.name} from byte {offset:,}")
+        return checkpoints
     
-    def process_file(self):
-        """Process the entire CSV file"""
+    def skip_unchanged(self, rows: Iterator[Dict], stats: Dict) -> Iterator[Dict]:
+        """Yield only rows whose URL is new or whose content changed since the last load.
+        
+        Decided row by row in the same pass over the exports: a row whose
+        fingerprint matches the stored one is skipped, unless an earlier row
+        of its URL was yielded. A URL scraped more than once therefore always
+        ends with its last occurrence written, as in a full load. Once rows
+        is exhausted, fills stats with added, changed, unchanged and removed
+        URL counts, judged by each URL's last occurrence; removed listings
+        are reported but left in the database.
+        """
+        self.cursor.execute('SELECT url, content_hash FROM listing_fingerprints')
+        stored = dict(self.cursor.fetchall())
+        latest = {}
+        yielded = set()
+        
+        for row in rows:
+            url = row.get('URL')
+            latest[url] = content_fingerprint(row)
+            if url in yielded or stored.get(url) != latest[url]:
+                yielded.add(url)
+                yield row
+        
+        stats['added'] = sum(1 for url in latest if url not in stored)
+        stats['changed'] = sum(1 for url, content_hash in latest.items()
+                               if url in stored and stored[url] != content_hash)
+        stats['unchanged'] = len(latest) - stats['added'] - stats['changed']
+        # URLs in any export read, or claimed from a part a resumed load skipped
+        stats['removed'] = sum(1 for url in stored if url not in self.listing_sources)
+    
+    def process_listing(self, row: Dict) -> None:
+        """Process a single listing and insert into database"""
+        url, record, error = self.try_extract_listing(row)
+        if error:
+            self.dead_letter(row, error)
+            return
+        
+        self.batch_rows = {url: row}
+        self.write_batch([record])
+    
+    def load_rows(self, rows: Iterator[Dict]) -> int:
+        """Parse rows and write them in batches, checkpointing each commit.
+        
+        Failed rows go to the dead-letter file. Returns the number of rows processed.
+        """
         total_processed = 0
+        batch = []
+        self.batch_rows = {}
+        # Raw row and read position of each row handed to the parser, in order
+        pending = deque()
+        checkpoint = None
+        if self.extraction_cache:
+            rows = self.with_cached_extractions(rows)
         
-        with open(self.input_file, 'r', encoding='utf-8') as file:
-            csv_reader = csv.DictReader(file)
+        for url, record, error in self.parse_rows(self.track_positions(rows, pending)):
+            row, checkpoint = pending.popleft()
+            if error:
+                self.dead_letter(row, error)
+            elif self.row_budget and record['parse_seconds'] > self.row_budget:
+                self.quarantine(row, record['parse_seconds'])
+            else:
+                batch.append(record)
+                self.batch_rows[url] = row
+            total_processed += 1
             
-            for row in csv_reader:
-                self.process_listing(row)
-                total_processed += 1
-                
-                if total_processed % 50 == 0:
-                    logger.info(f"Processed {total_processed} listings...")
+            if len(batch) >= self.batch_size:
+                self.write_batch(batch, checkpoint)
+                batch = []
+                self.batch_rows = {}
+            
+            if total_processed % 50 == 0:
+                logger.info(f"Processed {total_processed} listings...")
+        
+        self.write_batch(batch, checkpoint)
+        self.batch_rows = {}
+        return total_processed
+    
+    def with_cached_extractions(self, rows: Iterator[Dict]) -> Iterator[Dict]:
+        """Attach each row's cached extractor results whose version is still current"""
+        for row in rows:
+            self.cursor.execute('''
+                SELECT extractor, version, result FROM cache.extraction_cache WHERE content_hash = ?
+            ''', (content_fingerprint(row),))
+            row['cached_extractions'] = {
+                name: json.loads(result) for name, version, result in self.cursor.fetchall()
+                if self.EXTRACTOR_VERSIONS.get(name) == version
+            }
+            yield row
+    
+    def track_positions(self, rows: Iterator[Dict], pending: deque) -> Iterator[Dict]:
+        """Pass rows through, queueing each with the read position it ends at"""
+        for row in rows:
+            pending.append((row, self.read_position))
+            yield row
+    
+    def process_file(self):
+        """Process every input file, committing once per batch.
+        
+        This process is the only SQLite writer; parsing runs in a process
+        pool when workers > 1, shared by all input files.
+        """
+        stats = {}
+        counts = {}
+        
+        self.register_sources()
+        if len(self.sources) > 1:
+            logger.info(f"Reading {len(self.sources)} exports, newest scrape first")
+        checkpoints = self.load_checkpoints()
         
+        rows = self.read_exports(counts, checkpoints)
+        if self.incremental:
+            rows = self.skip_unchanged(rows, stats)
+        total_processed = self.load_rows(rows)
+        if len(self.sources) > 1:
+            self.record_superseded_history()
+        
+        self.cursor.executemany('''
+            UPDATE load_checkpoints SET completed = 1, updated_at = ? WHERE source_file_id = ?
+        ''', [(time.strftime('%Y-%m-%d %H:%M:%S'), source_file_id) for source_file_id, _ in self.sources])
+        self.cursor.executemany('''
+            UPDATE source_files SET rows_read = ?, rows_superseded = ? WHERE source_file_id = ?
+        ''', [(read, superseded, source_file_id)
+              for source_file_id, (read, superseded) in counts.items()])
+        self.create_indexes()
+        self.refresh_segments()
+        
+        if len(self.sources) > 1:
+            for source_file_id, path in self.sources:
+                read, superseded = counts.get(source_file_id, (0, 0))
+                logger.info(f"  {path.name} ({self.source_dates[source_file_id]}): {read} rows, "
+                            f"{superseded} superseded by newer exports")
         logger.info(f"Total listings processed: {total_processed}")
+        if self.dead_letters.count:
+            logger.info(f"{self.dead_letters.count} failed rows written to {self.dead_letter_path} "
+                        f"(re-run with --replay-dead-letter after fixing the parser)")
+        if self.quarantined.count:
+            logger.info(f"{self.quarantined.count} rows over the {self.row_budget * 1000:g}ms parse budget "
+                        f"written to {self.quarantine_path}")
+        if self.incremental:
+            logger.info(f"Incremental refresh: {stats['added']} added, {stats['changed']} changed, "
+                        f"{stats['unchanged']} unchanged, {stats['removed']} removed")
+        
+        if self.profiler:
+            self.profiler.write(self.output_db.with_suffix('.profile.json'))
         
         # Print summary statistics
         self.print_summary()
     
+    def replay_dead_letter(self) -> None:
+        """Re-process the rows in the dead-letter file, e.g. after a parser fix.
+        
+        Rows keep the source file (and so the scrape date) they failed in.
+        Rows that fail again are written to a fresh dead-letter file.
+        """
+        self.replay_rows(self.dead_letter_path, 'dead-lettered')
+    
+    def replay_quarantine(self) -> None:
+        """Load the rows quarantined for blowing the parse budget, with no budget.
+        
+        Like replay_dead_letter, rows keep the source file and scrape date
+        they were quarantined from; rows that fail go to the dead-letter file.
+        """
+        self.row_budget = 0
+        self.replay_rows(self.quarantine_path, 'quarantined')
+    
+    def replay_rows(self, path: Path, kind: str) -> None:
+        """Re-process the rows set aside in a dead-letter or quarantine CSV"""
+        replaying = path.with_suffix('.replaying.csv')
+        # A replaying file left by an interrupted replay is finished first
+        if not replaying.exists():
+            if not path.exists():
+                logger.info(f"No {kind} rows at {path}")
+                return
+            path.rename(replaying)
+        
+        self.cursor.execute('SELECT source_file_id, scrape_date FROM source_files')
+        self.source_dates = dict(self.cursor.fetchall())
+        self.listing_sources = {}
+        
+        def rows():
+            with open_export(replaying) as file:
+                for row in csv.DictReader(file):
+                    if row.get('source_file_id'):
+                        self.listing_sources[row.get('URL')] = int(row['source_file_id'])
+                    yield row
+        
+        self.read_position = None
+        total_processed = self.load_rows(rows())
+        self.create_indexes()
+        self.refresh_segments()
+        replaying.unlink()
+        
+        logger.info(f"Replayed {total_processed} {kind} rows, "
+                    f"{total_processed - self.dead_letters.count - self.quarantined.count} now loaded")
+        if self.dead_letters.count:
+            logger.info(f"{self.dead_letters.count} rows still failing, see {self.dead_letter_path}")
+        if self.quarantined.count:
+            logger.info(f"{self.quarantined.count} rows quarantined again, see {self.quarantine_path}")
+    
     def print_summary(self):
         """Print summary statistics of the extracted data"""
         logger.info("\n=== Data Extraction Summary ===")
@@ -555,14 +1540,410 @@ class RVezyDataExtractor:
         logger.info(f"\nPrice Range: ${min_price:.2f} - ${max_price:.2f}, Average: ${avg_price:.2f}")
 
 
-def main():
-    input_file = "/home/chris/rvezy/data/raw/RVEzy Listings Text 06302025.csv"
-    output_db = "/home/chris/rvezy/data/processed/rvezy_listings.db"
+def literal_prefix(pattern: str) -> str:
+    """Leading characters every match of a regex must start with"""
+    prefix = ''
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\' and i + 1 < len(pattern) and not pattern[i + 1].isalnum():
+            char, step = pattern[i + 1], 2
+        elif char in '\\()[]{}?*+|.^$':
+            break
+        else:
+            step = 1
+        # A quantified character may be absent or repeated
+        if i + step < len(pattern) and pattern[i + step] in '?*+{':
+            break
+        prefix += char
+        i += step
+    return prefix
+
+
+class PhraseMatcher:
+    """Trie of literal phrases, for finding many phrases in one pass.
+    
+    branches() compiles the trie into regex alternatives that share common
+    prefixes, so a scanner built from them does work proportional to the
+    phrase length at each offset, not to the vocabulary size. matches_at()
+    then walks the trie from an offset and yields every phrase starting
+    there, including phrases that are prefixes of longer ones.
+    """
+    
+    END = ''
+    
+    def __init__(self, phrases: List[str]):
+        self.root = {}
+        for phrase in phrases:
+            node = self.root
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[self.END] = phrase
+    
+    def branches(self) -> List[str]:
+        """One regex alternative per distinct first character"""
+        return [re.escape(char) + self.pattern(child) for char, child in sorted(self.root.items())]
+    
+    def pattern(self, node: Dict) -> str:
+        """Regex matching the rest of any phrase below node"""
+        alternatives = [re.escape(char) + self.pattern(child)
+                        for char, child in sorted(node.items()) if char != self.END]
+        if not alternatives:
+            return ''
+        if len(alternatives) == 1 and self.END not in node:
+            return alternatives[0]
+        group = '(?:' + '|'.join(alternatives) + ')'
+        return group + '?' if self.END in node else group
+    
+    def matches_at(self, text: str, start: int) -> Iterator[str]:
+        """Yield every phrase that occurs in text at start"""
+        node = self.root
+        for i in range(start, len(text)):
+            node = node.get(text[i])
+            if node is None:
+                return
+            if self.END in node:
+                yield node[self.END]
+
+
+# Patterns are compiled once at import. CONTENT_SCANNER is one alternation of
+# every field pattern and phrase, so scan_content finds them all in a single
+# left-to-right pass instead of a separate search per field. The scanner only
+# locates candidate offsets; the field's own regex is re-run at each offset,
+# so the capturing groups the field branches carry are never read. Every
+# field branch must start with a literal character (no leading \d, [ or
+# group): scan_content finds the branches to re-check by the characters at
+# the match, and the import fails if one has no literal prefix.
+FIELD_REGEXES = {name: re.compile(pattern) for name, pattern in RVezyDataExtractor.FIELD_PATTERNS.items()}
+TITLE_REGEX = re.compile(RVezyDataExtractor.TITLE_PATTERN)
+PRICE_REGEX = re.compile(RVezyDataExtractor.PRICE_PATTERN)
+ADDON_REGEX = re.compile(RVezyDataExtractor.ADDON_PATTERN)
+BED_REGEX = re.compile(RVezyDataExtractor.BED_PATTERN)
+
+# Fields whose pattern starts with digits, or with a prefix as common as
+# "ft", are located by a literal-led anchor later in the pattern; the match
+# start is then found by scanning back over the characters allowed before
+# the anchor. Each scan-back stops at a character the pattern cannot cross,
+# so no character is scanned back over twice.
+LOCATION_CHARS = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz-')
+ANCHORED_FIELDS = {
+    'response_rate': (re.compile(r'% response rate'), str.isdecimal),
+    'rating': (re.compile(r'\(\d+ reviews\)'), lambda char: char.isdecimal() or char == '.'),
+    'location': (re.compile(r', [A-Z]{2}'), lambda char: char in LOCATION_CHARS or char.isspace()),
+}
+
+# Fields whose group searches ahead through a run of characters for a
+# terminator. The scanner looks for their literal prefix only; when a match
+# fails, every later start inside the same run fails too, so the rest of the
+# run (this regex, from the end of the prefix) is skipped for that field.
+RUN_FIELDS = {
+    'rv_type': re.compile(r'\s*[A-Za-z\s]*'),
+}
+
+# Title matches start with this; the make group and the run the model group
+# searches through are matched separately to skip hopeless retries
+TITLE_START_REGEX = re.compile(r'Rent my \d{4} ')
+TITLE_MAKE_REGEX = re.compile(r'[A-Za-z\-\s](?:(?! )[A-Za-z\-\s])* ')
+TITLE_RUN_REGEX = re.compile(r'[A-Za-z0-9\-\s]*')
+
+# Beds are located the same way, by their type word
+BED_ANCHOR_REGEX = re.compile('|'.join(sorted(RVezyDataExtractor.BED_TYPES, key=len, reverse=True)))
+
+SCANNER_PHRASES = list(dict.fromkeys(
+    RVezyDataExtractor.FLAG_PHRASES + RVezyDataExtractor.AMENITIES + RVezyDataExtractor.RV_TYPES
+))
+
+PHRASE_MATCHER = PhraseMatcher(SCANNER_PHRASES)
+
+# Lowercase letter-only phrases found in any casing, recorded in scan_content's
+# phrases as written here. Each gets two scanner branches, one per case of
+# its first letter, spelling out the cases of the rest (d[eE][lL]...): a
+# branch led by (?i:) or a character class stops re from skipping ahead by
+# the branches' first characters, which more than doubles the scan time.
+CASELESS_PHRASES = ['delivery']
+CASELESS_PHRASES_BY_CHAR = {}
+for phrase in CASELESS_PHRASES:
+    for char in {phrase[0], phrase[0].upper()}:
+        CASELESS_PHRASES_BY_CHAR.setdefault(char, []).append(phrase)
+
+# (kind, key, scanner pattern) for every branch of CONTENT_SCANNER; phrase
+# branches come from PHRASE_MATCHER, one per first character
+SCANNER_BRANCHES = (
+    [('anchored', name, anchor.pattern) for name, (anchor, _) in ANCHORED_FIELDS.items()]
+    + [('field', name, re.escape(literal_prefix(regex.pattern)) if name in RUN_FIELDS else regex.pattern)
+       for name, regex in FIELD_REGEXES.items() if name not in ANCHORED_FIELDS]
+    + [('phrase', branch[0], branch) for branch in PHRASE_MATCHER.branches()]
+    + [('caseless', phrase, first + ''.join(f'[{char}{char.upper()}]' for char in phrase[1:]))
+       for phrase in CASELESS_PHRASES for first in (phrase[0], phrase[0].upper())]
+)
+CONTENT_SCANNER = re.compile('|'.join(pattern for _, _, pattern in SCANNER_BRANCHES))
+
+# Field branches indexed by the two characters they start with, so
+# scan_content only re-checks branches that can match where the scanner
+# stopped. Branches with a shorter literal prefix are indexed by their first
+# character. Phrases are resolved by walking PHRASE_MATCHER (or through
+# CASELESS_PHRASES_BY_CHAR) instead.
+SCANNER_BRANCHES_BY_PREFIX = {}
+SCANNER_BRANCHES_BY_CHAR = {}
+for branch in SCANNER_BRANCHES:
+    kind, key, pattern = branch
+    if kind in ('phrase', 'caseless'):
+        continue
+    prefix = literal_prefix(pattern)[:2]
+    if not prefix:
+        raise ValueError(f"Scanner branch {key!r} does not start with a literal character; "
+                         f"locate it through ANCHORED_FIELDS instead")
+    if len(prefix) == 2:
+        SCANNER_BRANCHES_BY_PREFIX.setdefault(prefix, []).append(branch)
+    else:
+        SCANNER_BRANCHES_BY_CHAR.setdefault(prefix, []).append(branch)
+
+# Methods timed and patterns counted when profiling
+PROFILED_METHODS = [
+    'scan_content', 'extract_host_info', 'extract_rv_specs', 'extract_location',
+    'extract_pricing', 'extract_amenities', 'extract_reviews', 'extract_delivery_info',
+    'extract_rules', 'extract_addons', 'extract_beds', 'extract_listing', 'write_batch'
+]
+PROFILED_PATTERNS = (
+    list(FIELD_REGEXES) + ['title', 'price', 'addon_section', 'addon', 'bed']
+    + [f"phrase:{phrase}" for phrase in SCANNER_PHRASES + CASELESS_PHRASES]
+)
+
+
+def search_title(title: str) -> Optional[re.Match]:
+    """TITLE_REGEX.search(title), in time linear in the title length.
+    
+    When the make matched but the model group found no " from" before its
+    run of letters, digits, dashes and spaces ended, every later start inside
+    that run fails the same way, so the search resumes after the run.
+    """
+    pos = 0
+    while True:
+        start = TITLE_START_REGEX.search(title, pos)
+        if not start:
+            return None
+        match = TITLE_REGEX.match(title, start.start())
+        if match:
+            return match
+        make = TITLE_MAKE_REGEX.match(title, start.end())
+        if make:
+            pos = TITLE_RUN_REGEX.match(title, make.end()).end()
+        else:
+            pos = start.start() + 1
+
+
+def content_fingerprint(row: Dict) -> str:
+    """Hash of the scraped title and content, used to detect changed listings"""
+    return hashlib.sha1(f"{row.get('Title') or ''}\x1f{row.get('Content') or ''}".encode('utf-8')).hexdigest()
+
+
+# Compressed export formats: (file extensions, leading magic bytes, opener)
+COMPRESSED_FORMATS = [
+    (('.gz', '.gzip'), b'\x1f\x8b', gzip.open),
+    (('.bz2',), b'BZh', bz2.open),
+    (('.xz', '.lzma'), b'\xfd7zXZ\x00', lzma.open),
+]
+
+
+def open_export(path, binary: bool = False):
+    """Text (or binary) stream over a CSV export, decompressing gzip, bz2 and xz on the fly.
+    
+    The format is taken from the file extension, else sniffed from the
+    first bytes, so renamed or extension-less archives still stream.
+    """
+    suffix = Path(path).suffix.lower()
+    with open(path, 'rb') as f:
+        head = f.read(6)
+    for extensions, magic, opener in COMPRESSED_FORMATS:
+        if suffix in extensions or head.startswith(magic):
+            return opener(path, 'rb') if binary else opener(path, 'rt', encoding='utf-8')
+    return open(path, 'rb') if binary else open(path, 'r', encoding='utf-8')
+
+
+class ExportReader:
+    """csv.DictReader over a binary export stream that tracks a resumable byte offset.
+    
+    Lines are decoded as UTF-8 with universal newlines, exactly as the text
+    mode of open_export reads them. offset is the position just after the
+    last row returned; a row ending at a lone '\\r' inside a line leaves the
+    previous offset, so seeking to offset always lands on a row boundary.
+    Offsets of compressed exports are in the decompressed stream.
+    """
+    
+    def __init__(self, file):
+        self.file = file
+        self.position = 0
+        self.at_line_end = True
+        self.reader = csv.DictReader(self.lines())
+        # Read the header now so seek() can skip straight to the data
+        self.reader.fieldnames
+        self.offset = self.position
+    
+    def seek(self, offset: int) -> None:
+        """Continue reading from a previously returned offset"""
+        self.file.seek(offset)
+        self.position = self.offset = offset
+    
+    def lines(self) -> Iterator[str]:
+        for line in iter(self.file.readline, b''):
+            self.position += len(line)
+            text = line.decode('utf-8')
+            if '\r' not in text:
+                self.at_line_end = True
+                yield text
+                continue
+            pieces = text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+            last = pieces.pop()
+            pieces = [piece + '\n' for piece in pieces] + ([last] if last else [])
+            for i, piece in enumerate(pieces):
+                self.at_line_end = i == len(pieces) - 1
+                yield piece
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self) -> Dict:
+        row = next(self.reader)
+        if self.at_line_end:
+            self.offset = self.position
+        return row
+
+
+# Columns of the dead-letter and quarantine CSVs: the raw row, where it came
+# from and why it was not loaded
+DEAD_LETTER_COLUMNS = ['URL', 'Title', 'Content', 'source_file_id', 'error', 'failed_at']
+QUARANTINE_COLUMNS = ['URL', 'Title', 'Content', 'source_file_id', 'parse_ms', 'quarantined_at']
+
+
+class RowLog:
+    """Append-only CSV of rows set aside during a load, opened on first use"""
+    
+    def __init__(self, path: Path, columns: List[str]):
+        self.path = path
+        self.columns = columns
+        self.file = None
+        self.writer = None
+        self.count = 0
+    
+    def append(self, row: Dict) -> None:
+        if self.writer is None:
+            is_new = not self.path.exists() or self.path.stat().st_size == 0
+            self.file = open(self.path, 'a', encoding='utf-8', newline='')
+            self.writer = csv.DictWriter(self.file, self.columns, extrasaction='ignore')
+            if is_new:
+                self.writer.writeheader()
+        self.writer.writerow(row)
+        # Flushed per row so a crash cannot lose a row the checkpoint has passed
+        self.file.flush()
+        self.count += 1
+    
+    def close(self) -> None:
+        if self.file:
+            self.file.close()
+            self.file = self.writer = None
+
+
+def expand_inputs(pattern: str) -> List[Path]:
+    """Export files named by a path, a directory of exports or a glob pattern"""
+    path = Path(pattern)
+    if path.is_dir():
+        suffixes = ['.csv'] + ['.csv' + extension
+                               for extensions, _, _ in COMPRESSED_FORMATS for extension in extensions]
+        return sorted(child for child in path.iterdir()
+                      if child.is_file() and child.name.lower().endswith(tuple(suffixes)))
+    if any(char in pattern for char in '*?['):
+        return sorted(Path(match) for match in glob.glob(pattern) if Path(match).is_file())
+    return [path]
+
+
+# Extractor used by parse_chunk inside each worker process
+worker_extractor = None
+
+
+def parse_chunk(rows: List[Dict]) -> List[Tuple[str, Optional[Dict], Optional[str]]]:
+    """Parse a chunk of CSV rows into plain records (runs in a worker process)"""
+    global worker_extractor
+    if worker_extractor is None:
+        worker_extractor = RVezyDataExtractor()
+    return [worker_extractor.try_extract_listing(row) for row in rows]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract RVezy listings from a PandaScraper CSV export into SQLite")
+    parser.add_argument('--input', default="/home/chris/rvezy/data/raw/RVEzy Listings Text 06302025.csv",
+                        help="CSV export to process (may be gzip, bz2 or xz compressed), or a directory "
+                             "or quoted glob of exports; each URL is loaded from its newest export")
+    parser.add_argument('--db', default=str(DB_PATH),
+                        help="SQLite database to write")
+    parser.add_argument('--batch-size', type=int, default=500, help="listings written per transaction")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="parser processes (1 = parse in-process; default 1 for a single export, "
+                             "one per CPU for several)")
+    parser.add_argument('--chunk-size', type=int, default=100, help="rows sent to a worker per task")
+    parser.add_argument('--scrape-date', help="date of the export (YYYY-MM-DD) for listing_snapshots; "
+                                              "defaults to the MMDDYYYY stamp in each file name, else today")
+    parser.add_argument('--bulk-load', action='store_true',
+                        help="load with WAL, synchronous=OFF and indexes deferred to the end (full rebuilds)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="only parse and write listings that are new or changed since the last run")
+    parser.add_argument('--profile', action='store_true',
+                        help="time each extractor and SQL statement, count pattern matches and "
+                             "write <db>.profile.json (parses in-process)")
+    parser.add_argument('--resume', action='store_true',
+                        help="continue an interrupted load of the same input from its last committed batch")
+    parser.add_argument('--row-budget-ms', type=float, default=1000,
+                        help="quarantine rows that take longer than this to parse to <db>.quarantine.csv "
+                             "instead of loading them (0 = no limit)")
+    parser.add_argument('--extraction-cache', action='store_true',
+                        help="cache each extractor's result by content hash in <db>.extract_cache.db and "
+                             "re-run only extractors whose EXTRACTOR_VERSIONS entry changed")
+    parser.add_argument('--replay-dead-letter', action='store_true',
+                        help="re-process the rows in <db>.dead_letter.csv instead of extracting")
+    parser.add_argument('--replay-quarantine', action='store_true',
+                        help="load the rows in <db>.quarantine.csv with no parse budget instead of extracting")
+    parser.add_argument('--compact', action='store_true',
+                        help="purge orphaned child rows and VACUUM the database instead of extracting")
+    args = parser.parse_args(argv)
+    
+    input_file = args.input
+    output_db = args.db
+    
+    if args.compact:
+        logger.info(f"Compacting database: {output_db}")
+        with RVezyDataExtractor(input_file, output_db) as extractor:
+            extractor.compact()
+        logger.info("Compaction completed successfully!")
+        return
+    
+    if args.replay_dead_letter:
+        with RVezyDataExtractor(input_file, output_db, batch_size=args.batch_size,
+                                workers=args.workers or 1, chunk_size=args.chunk_size,
+                                bulk_load=args.bulk_load, row_budget_ms=args.row_budget_ms,
+                                extraction_cache=args.extraction_cache) as extractor:
+            extractor.replay_dead_letter()
+        return
+    
+    if args.replay_quarantine:
+        with RVezyDataExtractor(input_file, output_db, batch_size=args.batch_size,
+                                workers=args.workers or 1, chunk_size=args.chunk_size,
+                                bulk_load=args.bulk_load,
+                                extraction_cache=args.extraction_cache) as extractor:
+            extractor.replay_quarantine()
+        return
     
     logger.info(f"Starting data extraction from {input_file}")
     logger.info(f"Output database: {output_db}")
     
-    with RVezyDataExtractor(input_file, output_db) as extractor:
+    workers = args.workers
+    if workers is None:
+        workers = (os.cpu_count() or 1) if len(expand_inputs(input_file)) > 1 else 1
+    
+    with RVezyDataExtractor(input_file, output_db, batch_size=args.batch_size,
+                            workers=workers, chunk_size=args.chunk_size,
+                            incremental=args.incremental, bulk_load=args.bulk_load,
+                            scrape_date=args.scrape_date, profile=args.profile,
+                            resume=args.resume, row_budget_ms=args.row_budget_ms,
+                            extraction_cache=args.extraction_cache) as extractor:
         extractor.process_file()
     
     logger.info("Data extraction completed successfully!")
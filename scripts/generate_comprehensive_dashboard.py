@@ -1,14 +1,14 @@
-import sqlite3
-import pandas as pd
 import json
-from pathlib import Path
 import numpy as np
 
+from query_cache import read_sql_query
+from rvezy_db import OUTPUT_DIR, connect
+from segment_summaries import segment_sources
+
 def generate_comprehensive_dashboard_data():
     """Generate comprehensive data for the enhanced dashboard"""
     
-    db_path = Path("/home/chris/rvezy/data/processed/rvezy_listings.db")
-    conn = sqlite3.connect(db_path)
+    conn = connect()
     
     dashboard_data = {}
     
@@ -16,29 +16,29 @@ def generate_comprehensive_dashboard_data():
     
     # 1. Market Overview with all RV types
     print("1. Generating market overview...")
-    market_overview = pd.read_sql_query("""
+    market_overview = read_sql_query("""
         SELECT 
             rv_type,
-            COUNT(*) as count,
-            AVG(base_price) as avg_price,
-            MIN(base_price) as min_price,
-            MAX(base_price) as max_price,
-            ROUND(AVG(base_price) - MIN(base_price), 2) as price_range,
-            AVG(num_reviews) as avg_reviews,
-            SUM(num_reviews) as total_reviews,
-            COUNT(CASE WHEN num_reviews >= 20 THEN 1 END) * 100.0 / COUNT(*) as success_rate,
-            AVG(CASE WHEN overall_rating >= 0 AND overall_rating <= 5 THEN overall_rating END) as avg_rating
-        FROM listings
-        WHERE base_price IS NOT NULL
+            SUM(listing_count) as count,
+            SUM(price_sum) / SUM(listing_count) as avg_price,
+            MIN(min_price) as min_price,
+            MAX(max_price) as max_price,
+            ROUND(SUM(price_sum) / SUM(listing_count) - MIN(min_price), 2) as price_range,
+            SUM(review_sum) * 1.0 / SUM(review_count) as avg_reviews,
+            SUM(review_sum) as total_reviews,
+            SUM(successful_count) * 100.0 / SUM(listing_count) as success_rate,
+            SUM(valid_rating_sum) / SUM(valid_rating_count) as avg_rating
+        FROM {segment_summaries}
+        WHERE price_tier IS NOT NULL
         GROUP BY rv_type
         ORDER BY count DESC
-    """, conn).to_dict('records')
+    """.format(**segment_sources(conn)), conn).to_dict('records')
     
     dashboard_data['market_overview'] = market_overview
     
     # 2. All listings for interactive charts
     print("2. Fetching all listings for interactive charts...")
-    all_listings = pd.read_sql_query("""
+    all_listings = read_sql_query("""
         SELECT 
             l.listing_id,
             l.url,
@@ -66,26 +66,43 @@ def generate_comprehensive_dashboard_data():
     # 3. Price distributions by RV type
     print("3. Generating price distributions...")
     price_distributions = {}
-    rv_types = pd.read_sql_query("SELECT DISTINCT rv_type FROM listings WHERE rv_type IS NOT NULL", conn)['rv_type'].tolist()
+    rv_types = read_sql_query("SELECT DISTINCT rv_type FROM listings WHERE rv_type IS NOT NULL", conn)['rv_type'].tolist()
+    
+    # Quartiles come from one grouped pass with the median/percentile aggregates
+    price_stats = read_sql_query("""
+        SELECT 
+            rv_type,
+            COUNT(*) as count,
+            MIN(base_price) as min,
+            MAX(base_price) as max,
+            median(base_price) as median,
+            percentile(base_price, 25) as q1,
+            percentile(base_price, 75) as q3
+        FROM listings
+        WHERE rv_type IS NOT NULL AND base_price IS NOT NULL
+        GROUP BY rv_type
+        HAVING COUNT(*) >= 3
+    """, conn).set_index('rv_type').to_dict('index')
+    type_prices = read_sql_query("""
+        SELECT rv_type, base_price 
+        FROM listings 
+        WHERE rv_type IS NOT NULL AND base_price IS NOT NULL
+        ORDER BY rv_type, base_price
+    """, conn).groupby('rv_type')['base_price'].apply(list)
     
     for rv_type in rv_types:
-        prices = pd.read_sql_query("""
-            SELECT base_price 
-            FROM listings 
-            WHERE rv_type = ? AND base_price IS NOT NULL
-            ORDER BY base_price
-        """, conn, params=[rv_type])['base_price'].tolist()
-        
-        if len(prices) >= 3:
+        if rv_type in price_stats:
+            stats = price_stats[rv_type]
+            prices = type_prices[rv_type]
             price_distributions[rv_type] = {
                 'prices': prices,
-                'count': len(prices),
-                'min': min(prices),
-                'max': max(prices),
+                'count': stats['count'],
+                'min': stats['min'],
+                'max': stats['max'],
                 'mean': np.mean(prices),
-                'median': np.median(prices),
-                'q1': np.percentile(prices, 25),
-                'q3': np.percentile(prices, 75),
+                'median': stats['median'],
+                'q1': stats['q1'],
+                'q3': stats['q3'],
                 'std': np.std(prices)
             }
     
@@ -93,7 +110,7 @@ def generate_comprehensive_dashboard_data():
     
     # 4. Specifications Analysis
     print("4. Generating specifications analysis...")
-    specs_analysis = pd.read_sql_query("""
+    specs_analysis = read_sql_query("""
         SELECT 
             rv_type,
             COUNT(*) as count,
@@ -118,7 +135,7 @@ def generate_comprehensive_dashboard_data():
     # 5. Price threshold analysis with all listings for slider
     print("5. Generating price threshold analysis...")
     # Get all listings with price for dynamic filtering
-    price_threshold_listings = pd.read_sql_query("""
+    price_threshold_listings = read_sql_query("""
         SELECT 
             l.listing_id,
             l.url,
@@ -170,7 +187,7 @@ def generate_comprehensive_dashboard_data():
     
     # 6. Investment opportunities with comprehensive data
     print("6. Generating investment opportunities...")
-    investment_opps = pd.read_sql_query("""
+    investment_opps = read_sql_query("""
         SELECT 
             rv_type,
             COUNT(*) as market_size,
@@ -231,7 +248,7 @@ def generate_comprehensive_dashboard_data():
     print("6b. Generating ROI calculator data...")
     
     # Get detailed category averages for ROI calculations
-    category_averages = pd.read_sql_query("""
+    category_averages = read_sql_query("""
         SELECT 
             rv_type,
             COUNT(*) as count,
@@ -303,7 +320,7 @@ def generate_comprehensive_dashboard_data():
     
     # 7. Add-ons comprehensive analysis
     print("7. Generating add-ons analysis...")
-    addons_analysis = pd.read_sql_query("""
+    addons_analysis = read_sql_query("""
         SELECT 
             a.name,
             COUNT(DISTINCT a.listing_id) as listings_offering,
@@ -329,7 +346,7 @@ def generate_comprehensive_dashboard_data():
     top_addons = ['Wifi', 'Portable BBQ', 'Starlink Satellites Internet', 'YYC', 'Fuel Refill Prepayment']
     
     for addon_name in top_addons:
-        listings_with_addon = pd.read_sql_query("""
+        listings_with_addon = read_sql_query("""
             SELECT DISTINCT
                 l.url,
                 l.rv_type,
@@ -352,7 +369,7 @@ def generate_comprehensive_dashboard_data():
     
     # 8. Top performers with all details
     print("8. Generating top performers...")
-    top_performers = pd.read_sql_query("""
+    top_performers = read_sql_query("""
         SELECT 
             l.listing_id,
             l.url,
@@ -384,7 +401,7 @@ def generate_comprehensive_dashboard_data():
     # 9. Multi-owner analysis
     print("9. Generating multi-owner analysis...")
     # Use a CTE to ensure proper grouping
-    multi_owners = pd.read_sql_query("""
+    multi_owners = read_sql_query("""
         WITH host_listings AS (
             SELECT 
                 h.host_id,
@@ -421,7 +438,7 @@ def generate_comprehensive_dashboard_data():
     
     # Get portfolios
     for owner in multi_owners:
-        portfolio = pd.read_sql_query("""
+        portfolio = read_sql_query("""
             SELECT 
                 url,
                 rv_type,
@@ -444,7 +461,7 @@ def generate_comprehensive_dashboard_data():
     
     # 10. Your listing analysis
     print("10. Generating your listing analysis...")
-    your_listing = pd.read_sql_query("""
+    your_listing = read_sql_query("""
         WITH your_price AS (SELECT 97 as price)
         SELECT 
             (SELECT COUNT(*) FROM listings WHERE rv_type = 'Travel Trailer' AND base_price < 97) as cheaper_tt,
@@ -467,7 +484,7 @@ def generate_comprehensive_dashboard_data():
     print("11. Generating price by specifications analysis...")
     
     # Price by capacity
-    price_by_capacity = pd.read_sql_query("""
+    price_by_capacity = read_sql_query("""
         SELECT 
             sleeps,
             COUNT(*) as count,
@@ -486,7 +503,7 @@ def generate_comprehensive_dashboard_data():
     """, conn).to_dict('records')
     
     # Price by age
-    price_by_age = pd.read_sql_query("""
+    price_by_age = read_sql_query("""
         SELECT 
             CASE 
                 WHEN rv_year >= 2020 THEN '2020s (0-5 years)'
@@ -515,7 +532,7 @@ def generate_comprehensive_dashboard_data():
     """, conn).to_dict('records')
     
     # Price by weight
-    price_by_weight = pd.read_sql_query("""
+    price_by_weight = read_sql_query("""
         SELECT 
             CASE 
                 WHEN weight_lbs < 3000 THEN 'Ultra-light (<3000 lbs)'
@@ -544,7 +561,7 @@ def generate_comprehensive_dashboard_data():
     # Get spec analysis by RV type for filtering
     spec_by_rv_type = {}
     for rv_type in rv_types:
-        spec_data = pd.read_sql_query("""
+        spec_data = read_sql_query("""
             SELECT 
                 rv_type,
                 COUNT(*) as count,
@@ -568,7 +585,7 @@ def generate_comprehensive_dashboard_data():
     }
     
     # Save all data
-    output_path = Path("/home/chris/rvezy/output/comprehensive_dashboard_data.json")
+    output_path = OUTPUT_DIR / "comprehensive_dashboard_data.json"
     
     # Convert NaN to None for JSON compatibility
     def clean_for_json(obj):
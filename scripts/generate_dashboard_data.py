@@ -1,14 +1,13 @@
-import sqlite3
-import pandas as pd
 import json
-from pathlib import Path
 import numpy as np
 
+from query_cache import read_sql_query
+from rvezy_db import OUTPUT_DIR, connect
+
 def generate_dashboard_data():
     """Generate comprehensive JSON data for the dashboard"""
     
-    db_path = Path("/home/chris/rvezy/data/processed/rvezy_listings.db")
-    conn = sqlite3.connect(db_path)
+    conn = connect()
     
     dashboard_data = {}
     
@@ -16,7 +15,7 @@ def generate_dashboard_data():
     
     # 1. Market Overview
     print("1. Generating market overview...")
-    market_overview = pd.read_sql_query("""
+    market_overview = read_sql_query("""
         SELECT 
             COUNT(*) as total_listings,
             COUNT(CASE WHEN location_city = 'Calgary' THEN 1 END) as calgary_listings,
@@ -35,7 +34,7 @@ def generate_dashboard_data():
     
     # 2. RV Type Distribution
     print("2. Generating RV type distribution...")
-    rv_types = pd.read_sql_query("""
+    rv_types = read_sql_query("""
         SELECT 
             rv_type,
             COUNT(*) as count,
@@ -55,7 +54,7 @@ def generate_dashboard_data():
     
     # 3. Top Listings with URLs
     print("3. Generating top listings...")
-    top_listings = pd.read_sql_query("""
+    top_listings = read_sql_query("""
         SELECT 
             l.url,
             l.rv_type,
@@ -85,7 +84,7 @@ def generate_dashboard_data():
     
     # 4. Multi-Owner Analysis with Portfolio Details
     print("4. Generating multi-owner analysis...")
-    multi_owners = pd.read_sql_query("""
+    multi_owners = read_sql_query("""
         SELECT 
             h.host_id,
             h.name as host_name,
@@ -114,7 +113,7 @@ def generate_dashboard_data():
     
     # Get detailed portfolio for each multi-owner
     for owner in multi_owners:
-        portfolio = pd.read_sql_query("""
+        portfolio = read_sql_query("""
             SELECT 
                 url,
                 rv_type,
@@ -148,14 +147,18 @@ def generate_dashboard_data():
     
     # 5. Add-Ons Comprehensive Analysis
     print("5. Generating add-ons analysis...")
-    addons = pd.read_sql_query("""
+    addons = read_sql_query("""
         SELECT 
             a.name,
             COUNT(*) as listings_count,
             MIN(CASE WHEN a.price > 0 AND a.price < 500 THEN a.price END) as min_price,
             AVG(CASE WHEN a.price > 0 AND a.price < 500 THEN a.price END) as avg_price,
             MAX(CASE WHEN a.price < 500 THEN a.price END) as max_price,
-            GROUP_CONCAT(DISTINCT l.rv_type) as rv_types_offering
+            GROUP_CONCAT(DISTINCT l.rv_type) as rv_types_offering,
+            COALESCE((
+                SELECT median(p.price) FROM addons p
+                WHERE p.name = a.name AND p.price > 0 AND p.price < 500
+            ), 0.0) as median_price
         FROM addons a
         JOIN listings l ON a.listing_id = l.listing_id
         WHERE a.name != '' AND a.name IS NOT NULL
@@ -164,22 +167,11 @@ def generate_dashboard_data():
         ORDER BY listings_count DESC
     """, conn)
     
-    # Calculate median prices
-    for addon_name in addons['name'].unique():
-        prices = pd.read_sql_query("""
-            SELECT price 
-            FROM addons 
-            WHERE name = ? AND price > 0 AND price < 500
-        """, conn, params=[addon_name])['price']
-        
-        median_price = prices.median() if len(prices) > 0 else 0
-        addons.loc[addons['name'] == addon_name, 'median_price'] = median_price
-    
     dashboard_data['addons'] = addons.to_dict('records')
     
     # 6. Revenue by Sleeping Capacity
     print("6. Generating revenue by sleeping capacity...")
-    revenue_by_sleeps = pd.read_sql_query("""
+    revenue_by_sleeps = read_sql_query("""
         WITH clean_sleeps AS (
             SELECT 
                 CASE 
@@ -210,7 +202,7 @@ def generate_dashboard_data():
     
     # 7. Winter-Ready Premium Analysis
     print("7. Generating winter-ready analysis...")
-    winter_analysis = pd.read_sql_query("""
+    winter_analysis = read_sql_query("""
         WITH winter_ready AS (
             SELECT DISTINCT l.listing_id, l.rv_type, l.base_price
             FROM listings l
@@ -244,7 +236,7 @@ def generate_dashboard_data():
     
     # 8. Price Tier Requirements
     print("8. Generating price tier requirements...")
-    tier_requirements = pd.read_sql_query("""
+    tier_requirements = read_sql_query("""
         WITH price_tiers AS (
             SELECT 
                 listing_id,
@@ -298,7 +290,7 @@ def generate_dashboard_data():
     
     # 9. Top RVs by Revenue Potential
     print("9. Generating top RVs by revenue...")
-    top_rvs_by_revenue = pd.read_sql_query("""
+    top_rvs_by_revenue = read_sql_query("""
         SELECT 
             l.url,
             l.rv_type,
@@ -325,7 +317,7 @@ def generate_dashboard_data():
     
     # 10. Your Listing Analysis (assuming $97/night Travel Trailer)
     print("10. Generating your listing analysis...")
-    your_listing = pd.read_sql_query("""
+    your_listing = read_sql_query("""
         WITH your_price AS (SELECT 97 as price)
         SELECT 
             (SELECT COUNT(*) FROM listings WHERE rv_type = 'Travel Trailer' AND base_price < 97) as cheaper_count,
@@ -348,7 +340,7 @@ def generate_dashboard_data():
     
     # 11. Budget Segment Analysis
     print("11. Generating budget segment analysis...")
-    budget_segment = pd.read_sql_query("""
+    budget_segment = read_sql_query("""
         SELECT 
             rv_type,
             COUNT(*) as count,
@@ -372,7 +364,7 @@ def generate_dashboard_data():
     print("12. Generating competitive intelligence...")
     
     # Tent Trailer operators
-    tent_trailer_operators = pd.read_sql_query("""
+    tent_trailer_operators = read_sql_query("""
         SELECT 
             h.name as host_name,
             h.is_superhost,
@@ -389,7 +381,7 @@ def generate_dashboard_data():
     """, conn).to_dict('records')
     
     # Success factors by segment
-    success_factors = pd.read_sql_query("""
+    success_factors = read_sql_query("""
         SELECT 
             rv_type,
             COUNT(CASE WHEN num_reviews >= 20 THEN 1 END) as high_performers,
@@ -411,7 +403,7 @@ def generate_dashboard_data():
     
     # 13. Investment Opportunities
     print("13. Generating investment opportunities...")
-    investment_opportunities = pd.read_sql_query("""
+    investment_opportunities = read_sql_query("""
         SELECT 
             rv_type,
             COUNT(*) as market_size,
@@ -433,7 +425,7 @@ def generate_dashboard_data():
     dashboard_data['investment_opportunities'] = investment_opportunities
     
     # Save all data
-    output_path = Path("/home/chris/rvezy/output/dashboard_data.json")
+    output_path = OUTPUT_DIR / "dashboard_data.json"
     
     # Convert NaN to None for JSON compatibility
     def clean_for_json(obj):
@@ -0,0 +1,256 @@
+import argparse
+import csv
+import gzip
+import json
+import random
+import sys
+from typing import Dict, Iterator, List
+
+from extract_rvezy_data import VOCABULARY
+
+# Distributions the generator draws from. A --config JSON file may override
+# any top-level key; weights are relative, probabilities are 0-1.
+DEFAULT_DISTRIBUTIONS = {
+    # RV type -> relative weight (roughly the Calgary market mix)
+    'rv_types': {
+        'Travel Trailer': 68, 'Class C': 8, 'Tent Trailer': 4, 'Fifth Wheel': 4,
+        'Class A': 3, 'Class B': 3, 'Campervan': 3, 'Hybrid': 2, 'Toy Hauler': 2,
+        'Micro Trailer': 1, 'Truck Camper': 1, 'RV Cottage': 1
+    },
+    # Nightly price per RV type: [median, spread]; drawn log-normally and
+    # clipped to price_range
+    'prices': {
+        'Travel Trailer': [140, 0.35], 'Class A': [320, 0.3], 'Class B': [230, 0.3],
+        'Class C': [240, 0.3], 'Fifth Wheel': [180, 0.3], 'Toy Hauler': [200, 0.3],
+        'Campervan': [170, 0.3], 'Tent Trailer': [95, 0.25], 'Micro Trailer': [110, 0.25],
+        'Hybrid': [130, 0.3], 'Truck Camper': [160, 0.3], 'RV Cottage': [150, 0.3]
+    },
+    'price_range': [45, 600],
+    'cities': {
+        'Calgary': 55, 'Airdrie': 10, 'Cochrane': 8, 'Okotoks': 7, 'Chestermere': 6,
+        'Red Deer': 5, 'Strathmore': 3, 'High River': 3, 'Canmore': 3
+    },
+    'province': 'AB',
+    'makes': {
+        'Jayco': ['Jay Flight 264BH', 'Jay Feather 22RB', 'Redhawk 26XD'],
+        'Forest River': ['Salem 27RE', 'Rockwood Mini Lite 2104S', 'Sunseeker 2400W'],
+        'Keystone': ['Hideout 28BHS', 'Passport 199ML', 'Cougar 29RKS'],
+        'Coachmen': ['Freelander 21RS', 'Clipper 12RB', 'Apex Nano 203RBK'],
+        'Winnebago': ['Minnie 2500FL', 'Travato 59K', 'View 24D'],
+        'Thor': ['Four Winds 28A', 'Chateau 22E', 'Gemini 23TW']
+    },
+    'rv_year_range': [1995, 2025],
+    # Probability each vocabulary amenity is listed (amenities not named
+    # here use amenity_probability)
+    'amenity_probability': 0.4,
+    'amenities': {
+        'Refrigerator': 0.9, 'Stove range': 0.85, 'Heater': 0.85, 'Kitchen sink': 0.85,
+        'Microwave': 0.75, 'Toilet': 0.8, 'Awning': 0.75, 'Full-Winter rental available': 0.1
+    },
+    # Add-on name -> [probability, median price]
+    'addons': {
+        'Propane Refill Prepayment': [0.35, 35], 'Emptying Septic Prepayment': [0.3, 60],
+        'Portable BBQ': [0.3, 25], 'Bedding and Linens': [0.4, 30], 'Portable Generator': [0.2, 75],
+        'YYC': [0.15, 80], 'Wifi': [0.15, 20], 'Starlink Satellites Internet': [0.08, 50],
+        'Fuel Refill Prepayment': [0.15, 90], 'Bike Rack': [0.15, 20]
+    },
+    'addon_section_probability': 0.75,
+    'bed_types': {'bed': 50, 'dinette bed': 20, 'pullout sofa': 15, 'bunk bed': 15},
+    'bed_sizes': {'Queen': 50, 'Double': 30, 'Twin': 15, 'King': 5},
+    'beds_per_listing': [1, 4],
+    # Discount type -> [probability, min percent, max percent]
+    'discounts': {'midweek': [0.3, 5, 15], 'weekly': [0.55, 5, 20], 'monthly': [0.45, 10, 30]},
+    # Listings per host follow a Pareto tail (lower alpha = bigger fleets)
+    'fleet_alpha': 2.5,
+    'max_fleet': 25,
+    # Hosts are keyed by (name, joined year), so names are built from 2-3
+    # syllables to keep large exports from merging unrelated hosts
+    'host_name_syllables': ['jo', 'an', 'na', 'mar', 'ia', 'li', 'ah', 'med', 'ka', 'ren',
+                            'da', 've', 'pri', 'ya', 'tom', 'em', 'ily', 'raj', 'chris',
+                            'su', 'ed', 'ward', 'mi', 'ke', 'jes', 'si', 'ca', 'ben', 'ro', 'sa'],
+    'host_joined_range': [2015, 2025],
+    'superhost_probability': 0.25,
+    'response_rate_range': [60, 100],
+    'reviews_probability': 0.8,
+    'reviews_mean': 15,
+    'rating_range': [3.8, 5.0],
+    'delivery_probability': 0.4,
+    'rules': {'Flexible pickup time': 0.35, 'Flexible drop-off time': 0.3,
+              'Towing experience required': 0.5, 'Pet friendly': 0.3, 'No pets': 0.4},
+    # Share of rows that re-scrape an earlier URL, as real exports do
+    'duplicate_rate': 0.02,
+    # Free-text paragraphs (description, rules, reviews) per listing
+    'paragraphs_range': [3, 12]
+}
+
+FILLER_SENTENCES = [
+    "Perfect for families looking to explore the Rockies.",
+    "The trailer is cleaned and sanitized between every trip.",
+    "Please return the unit with full propane tanks and empty tanks.",
+    "Pickup is available from our acreage just outside the city.",
+    "We provide a full walkthrough and tow vehicle check before you leave.",
+    "Great for weekend getaways to Kananaskis and Banff.",
+    "No smoking inside the unit; cleaning fees apply otherwise.",
+    "Our guests loved the spacious layout and comfortable beds.",
+    "Generator use is restricted during campground quiet hours.",
+    "Kitchen comes stocked with dishes, cutlery, pots and pans."
+]
+
+
+def load_distributions(config_path: str = None) -> Dict:
+    """Default distributions, with any top-level keys overridden from a JSON file"""
+    distributions = dict(DEFAULT_DISTRIBUTIONS)
+    if config_path:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            distributions.update(json.load(f))
+    return distributions
+
+
+def weighted(rnd: random.Random, weights: Dict):
+    """Draw a key from a {value: weight} dict"""
+    return rnd.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def make_host(rnd: random.Random, dist: Dict) -> Dict:
+    """One host and the number of listings (fleet size) they own"""
+    return {
+        'name': ''.join(rnd.choices(dist['host_name_syllables'], k=rnd.randint(2, 3))).capitalize(),
+        'joined': rnd.randint(*dist['host_joined_range']),
+        'response_rate': rnd.randint(*dist['response_rate_range']),
+        'superhost': rnd.random() < dist['superhost_probability'],
+        'fleet': min(dist['max_fleet'], int(rnd.paretovariate(dist['fleet_alpha'])))
+    }
+
+
+def make_listing(rnd: random.Random, dist: Dict, host: Dict, amenities: List[str]) -> Dict:
+    """Title and Content text for one synthetic listing"""
+    rv_type = weighted(rnd, dist['rv_types'])
+    median, spread = dist['prices'].get(rv_type, [150, 0.3])
+    low, high = dist['price_range']
+    price = int(min(high, max(low, rnd.lognormvariate(0, spread) * median)))
+    make = rnd.choice(list(dist['makes']))
+    model = rnd.choice(dist['makes'][make])
+    year = rnd.randint(*dist['rv_year_range'])
+    towable = 'Trailer' in rv_type or rv_type in ('Fifth Wheel', 'Toy Hauler', 'Hybrid')
+
+    parts = [f"Rent my {year} {make} {model}", ' '.join(rnd.sample(FILLER_SENTENCES, 3))]
+    parts.append(f"Type of RV{rv_type}Accommodations")
+    parts.append(f"Sleeps{rnd.randint(2, 10)}Length(ft){rnd.randint(12, 40)} ft"
+                 f"{weighted(rnd, dist['cities'])}, {dist['province']}")
+    if towable:
+        parts.append(f"Weight{rnd.randint(1500, 12000)} lbsHitch Weight{rnd.randint(200, 1400)} lbs"
+                     f"Hitch Size2\"# of slide outs{rnd.randint(0, 3)}")
+
+    parts.append(f"Hosted by {host['name']}Joined in {host['joined']}"
+                 f"{host['response_rate']}% response rate")
+    if host['superhost']:
+        parts.append("Superhost")
+
+    if rnd.random() < dist['reviews_probability']:
+        low_rating, high_rating = dist['rating_range']
+        ratings = [round(rnd.uniform(low_rating, high_rating), 1) for _ in range(5)]
+        reviews = max(1, int(rnd.expovariate(1 / dist['reviews_mean'])))
+        parts.append(f"{ratings[0]}({reviews} reviews)Accuracy{ratings[1]}Value{ratings[2]}"
+                     f"Cleanliness{ratings[3]}Communication{ratings[4]}")
+
+    for discount_type, (probability, low_pct, high_pct) in dist['discounts'].items():
+        if rnd.random() < probability:
+            percent = rnd.randint(low_pct, high_pct)
+            parts.append(f"{discount_type.capitalize()}${int(price * (100 - percent) / 100)}/Night{percent}% off")
+    parts.append(f"Security Deposit${rnd.randint(5, 30) * 100}")
+
+    if rnd.random() < dist['delivery_probability']:
+        parts.append(f"No truck no problemdelivery up to {rnd.randint(20, 300)} km"
+                     f"Delivery${rnd.randint(1, 5)}.{rnd.choice([0, 5])} per km")
+
+    for rule, probability in dist['rules'].items():
+        if rnd.random() < probability:
+            parts.append(rule)
+    parts.append(''.join(
+        amenity for amenity in amenities
+        if rnd.random() < dist['amenities'].get(amenity, dist['amenity_probability'])
+    ))
+
+    beds = []
+    for _ in range(rnd.randint(*dist['beds_per_listing'])):
+        beds.append(f"{rnd.randint(1, 2)} {weighted(rnd, dist['bed_types'])}{weighted(rnd, dist['bed_sizes'])}")
+    parts.append(''.join(beds))
+
+    if rnd.random() < dist['addon_section_probability']:
+        addons = [f"{name}: ${max(5, int(rnd.lognormvariate(0, 0.4) * median_price))}"
+                  for name, (probability, median_price) in dist['addons'].items()
+                  if rnd.random() < probability]
+        parts.append("Add-ons" + ''.join(addons) + "RV rules")
+
+    for _ in range(rnd.randint(*dist['paragraphs_range'])):
+        parts.append(' '.join(rnd.choices(FILLER_SENTENCES, k=rnd.randint(3, 8))))
+
+    return {
+        'Title': f"Rent my {year} {make} {model} from ${price}/night | RVezy",
+        'Content': '\n'.join(parts)
+    }
+
+
+def generate_rows(rows: int, seed: int, dist: Dict) -> Iterator[Dict]:
+    """Yield rows one at a time, so any number can be streamed to disk.
+    
+    A re-scraped URL repeats its listing exactly: each listing is drawn
+    from its own seeded generator.
+    """
+    rnd = random.Random(seed)
+    amenities = VOCABULARY['amenities']
+    # Host of each listing id; a new host is added once the last fleet is full
+    listing_hosts = []
+    fleet_left = 0
+    for _ in range(rows):
+        if listing_hosts and rnd.random() < dist['duplicate_rate']:
+            listing_id = rnd.randrange(len(listing_hosts))
+        else:
+            listing_id = len(listing_hosts)
+            if not fleet_left:
+                host = make_host(rnd, dist)
+                fleet_left = host['fleet']
+            listing_hosts.append(host)
+            fleet_left -= 1
+        row = make_listing(random.Random(f"{seed}-{listing_id}"), dist, listing_hosts[listing_id], amenities)
+        row['URL'] = f"https://www.rvezy.com/rv-rental/synthetic-{seed}-{listing_id}"
+        yield row
+
+
+def open_output(path: str):
+    """Text stream for the CSV: stdout for '-', gzip for *.gz, else a plain file"""
+    if path == '-':
+        return sys.stdout
+    if path.endswith('.gz'):
+        return gzip.open(path, 'wt', encoding='utf-8', newline='')
+    return open(path, 'w', encoding='utf-8', newline='')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic PandaScraper-style RVezy export for load testing")
+    parser.add_argument('--rows', type=int, default=10000, help="rows to write (re-scraped duplicates included)")
+    parser.add_argument('--output', default="/home/chris/rvezy/data/raw/RVEzy Listings Synthetic.csv",
+                        help="CSV path ('.gz' compresses, '-' writes to stdout); an MMDDYYYY stamp in "
+                             "the name sets the extractor's scrape date")
+    parser.add_argument('--seed', type=int, default=42, help="random seed; the same seed gives the same file")
+    parser.add_argument('--config', help="JSON file overriding keys of DEFAULT_DISTRIBUTIONS")
+    args = parser.parse_args()
+
+    dist = load_distributions(args.config)
+    output = open_output(args.output)
+    try:
+        writer = csv.DictWriter(output, fieldnames=['URL', 'Title', 'Content'])
+        writer.writeheader()
+        for i, row in enumerate(generate_rows(args.rows, args.seed, dist), 1):
+            writer.writerow(row)
+            if i % 100000 == 0:
+                print(f"Wrote {i:,} rows", file=sys.stderr)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(f"Wrote {args.rows:,} synthetic listings to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,57 @@
-import sqlite3
+from typing import Optional
+
 import pandas as pd
 import numpy as np
-from pathlib import Path
 
-def analyze_investment_opportunities():
+from analytics_frames import CALGARY_AREA, AnalyticsFrames, ntile, order_by, shared_frames, sql_round
+from rvezy_db import PROCESSED_DIR
+
+def analyze_investment_opportunities(frames: Optional[AnalyticsFrames] = None):
     """Analyze the best RV types and models for investment based on market data"""
     
-    db_path = Path("/home/chris/rvezy/data/processed/rvezy_listings.db")
-    conn = sqlite3.connect(db_path)
+    frames = frames or shared_frames()
+    listings = frames.listings
+    area = listings[listings['location_city'].isin(CALGARY_AREA)]
+    priced_area = area[area['base_price'].notna()]
+    typed_area = priced_area[priced_area['rv_type'].notna()]
     
     print("=== RVezy Investment Opportunity Analysis ===\n")
     
     # 1. Market Overview by RV Type
     print("=== Market Overview by RV Type ===")
     
-    query_overview = """
-    SELECT 
-        rv_type,
-        COUNT(*) as listing_count,
-        AVG(base_price) as avg_daily_rate,
-        MIN(base_price) as min_price,
-        MAX(base_price) as max_price,
-        AVG(overall_rating) as avg_rating,
-        SUM(num_reviews) as total_reviews,
-        AVG(num_reviews) as avg_reviews,
-        AVG(CAST(num_reviews AS FLOAT) / NULLIF((2025 - rv_year), 0)) as reviews_per_year,
-        COUNT(DISTINCT host_id) as unique_hosts
-    FROM listings
-    WHERE location_city IN ('Calgary', 'Airdrie', 'Cochrane', 'Chestermere', 'Okotoks')
-    AND base_price IS NOT NULL
-    AND rv_type IS NOT NULL
-    GROUP BY rv_type
-    ORDER BY avg_daily_rate DESC
-    """
-    
-    df_overview = pd.read_sql_query(query_overview, conn)
+    # Summed from the priced Calgary-area segments rather than the listings
+    segments = frames.segments
+    area_segments = segments[segments['location_city'].isin(CALGARY_AREA) & segments['rv_type'].notna()
+                             & segments['price_tier'].notna()]
+    segment_hosts = frames.segment_hosts
+    area_hosts = segment_hosts[segment_hosts['location_city'].isin(CALGARY_AREA) & segment_hosts['rv_type'].notna()
+                               & segment_hosts['price_tier'].notna()]
+    totals = area_segments.groupby('rv_type').agg(
+        listing_count=('listing_count', 'sum'),
+        price_sum=('price_sum', 'sum'),
+        min_price=('min_price', 'min'),
+        max_price=('max_price', 'max'),
+        rating_count=('rating_count', 'sum'),
+        rating_sum=('rating_sum', 'sum'),
+        review_count=('review_count', 'sum'),
+        review_sum=('review_sum', lambda values: values.sum(min_count=1)),
+        reviews_per_year_count=('reviews_per_year_count', 'sum'),
+        reviews_per_year_sum=('reviews_per_year_sum', 'sum'),
+    )
+    df_overview = pd.DataFrame({
+        'listing_count': totals['listing_count'],
+        'avg_daily_rate': totals['price_sum'] / totals['listing_count'],
+        'min_price': totals['min_price'],
+        'max_price': totals['max_price'],
+        'avg_rating': totals['rating_sum'] / totals['rating_count'].replace(0, np.nan),
+        'total_reviews': totals['review_sum'],
+        'avg_reviews': totals['review_sum'] / totals['review_count'].replace(0, np.nan),
+        'reviews_per_year': totals['reviews_per_year_sum'] / totals['reviews_per_year_count'].replace(0, np.nan),
+        'unique_hosts': area_hosts.groupby('rv_type')['host_id'].nunique().reindex(totals.index, fill_value=0),
+    }).rename_axis('rv_type').reset_index()
+    df_overview = frames.sql_types(order_by(df_overview, ['avg_daily_rate'], ascending=False).reset_index(drop=True),
+                                   integers=['listing_count', 'total_reviews', 'unique_hosts'])
     print(df_overview.to_string(index=False))
     
     # 2. ROI Analysis by RV Type
@@ -89,141 +106,92 @@ def analyze_investment_opportunities():
     # 3. Market Saturation Analysis
     print("\n=== Market Saturation Analysis ===")
     
-    query_saturation = """
-    WITH rv_metrics AS (
-        SELECT 
-            rv_type,
-            COUNT(*) as listing_count,
-            AVG(num_reviews) as avg_reviews,
-            COUNT(DISTINCT host_id) as unique_hosts,
-            AVG(base_price) as avg_price,
-            COUNT(CASE WHEN num_reviews >= 10 THEN 1 END) as established_count,
-            COUNT(CASE WHEN num_reviews < 5 THEN 1 END) as new_count
-        FROM listings
-        WHERE location_city IN ('Calgary', 'Airdrie', 'Cochrane', 'Chestermere', 'Okotoks')
-        AND base_price IS NOT NULL
-        AND rv_type IS NOT NULL
-        GROUP BY rv_type
-    )
-    SELECT 
-        rv_type,
-        listing_count,
-        unique_hosts,
-        ROUND(CAST(listing_count AS FLOAT) / unique_hosts, 2) as listings_per_host,
-        established_count,
-        new_count,
-        ROUND(CAST(new_count AS FLOAT) / listing_count * 100, 1) as new_listing_pct,
-        avg_reviews,
-        avg_price
-    FROM rv_metrics
-    ORDER BY listing_count DESC
-    """
-    
-    df_saturation = pd.read_sql_query(query_saturation, conn)
+    df_saturation = typed_area.assign(
+        established=typed_area['num_reviews'] >= 10,
+        new=typed_area['num_reviews'] < 5,
+    ).groupby('rv_type').agg(
+        listing_count=('listing_id', 'size'),
+        avg_reviews=('num_reviews', 'mean'),
+        unique_hosts=('host_id', 'nunique'),
+        avg_price=('base_price', 'mean'),
+        established_count=('established', 'sum'),
+        new_count=('new', 'sum'),
+    ).reset_index()
+    df_saturation['listings_per_host'] = sql_round(
+        df_saturation['listing_count'] / df_saturation['unique_hosts'].replace(0, np.nan), 2)
+    df_saturation['new_listing_pct'] = sql_round(df_saturation['new_count'] / df_saturation['listing_count'] * 100, 1)
+    df_saturation = order_by(df_saturation, ['listing_count'], ascending=False)[[
+        'rv_type', 'listing_count', 'unique_hosts', 'listings_per_host', 'established_count',
+        'new_count', 'new_listing_pct', 'avg_reviews', 'avg_price'
+    ]]
+    df_saturation = frames.sql_types(df_saturation.reset_index(drop=True),
+                                     integers=['listing_count', 'unique_hosts', 'established_count', 'new_count'])
     print(df_saturation.to_string(index=False))
     
     # 4. Size and Feature Sweet Spots
     print("\n=== Size and Feature Analysis for Travel Trailers ===")
     
-    query_size_analysis = """
-    SELECT 
-        CASE 
-            WHEN length_ft < 20 THEN 'Under 20ft'
-            WHEN length_ft BETWEEN 20 AND 25 THEN '20-25ft'
-            WHEN length_ft BETWEEN 26 AND 30 THEN '26-30ft'
-            WHEN length_ft BETWEEN 31 AND 35 THEN '31-35ft'
-            ELSE 'Over 35ft'
-        END as size_category,
-        COUNT(*) as count,
-        AVG(base_price) as avg_price,
-        AVG(num_reviews) as avg_reviews,
-        AVG(overall_rating) as avg_rating,
-        AVG(CASE WHEN delivery_available = 1 THEN 1 ELSE 0 END) * 100 as delivery_pct
-    FROM listings
-    WHERE rv_type = 'Travel Trailer'
-    AND location_city IN ('Calgary', 'Airdrie', 'Cochrane', 'Chestermere', 'Okotoks')
-    AND length_ft IS NOT NULL
-    AND base_price IS NOT NULL
-    GROUP BY size_category
-    ORDER BY avg_price DESC
-    """
-    
-    df_size = pd.read_sql_query(query_size_analysis, conn)
+    trailers = priced_area[(priced_area['rv_type'] == 'Travel Trailer') & priced_area['length_ft'].notna()]
+    length = trailers['length_ft']
+    df_size = trailers.assign(
+        size_category=np.select(
+            [length < 20, length.between(20, 25), length.between(26, 30), length.between(31, 35)],
+            ['Under 20ft', '20-25ft', '26-30ft', '31-35ft'],
+            default='Over 35ft'
+        ),
+        delivery=(trailers['delivery_available'] == 1).astype('int64'),
+    ).groupby('size_category').agg(
+        count=('listing_id', 'size'),
+        avg_price=('base_price', 'mean'),
+        avg_reviews=('num_reviews', 'mean'),
+        avg_rating=('overall_rating', 'mean'),
+        delivery_pct=('delivery', 'mean'),
+    ).reset_index()
+    df_size['delivery_pct'] = df_size['delivery_pct'] * 100
+    df_size = order_by(df_size, ['avg_price'], ascending=False).reset_index(drop=True)
+    
     print("Travel Trailer Performance by Size:")
     print(df_size.to_string(index=False))
     
     # 5. Top Performing Models
     print("\n=== Top Performing RV Models (by demand proxy) ===")
     
-    query_top_models = """
-    SELECT 
-        rv_type,
-        rv_make,
-        rv_model,
-        COUNT(*) as count,
-        AVG(base_price) as avg_price,
-        AVG(num_reviews) as avg_reviews,
-        AVG(overall_rating) as avg_rating,
-        MIN(rv_year) as oldest_year,
-        MAX(rv_year) as newest_year
-    FROM listings
-    WHERE location_city IN ('Calgary', 'Airdrie', 'Cochrane', 'Chestermere', 'Okotoks')
-    AND base_price IS NOT NULL
-    AND rv_make IS NOT NULL
-    AND rv_model IS NOT NULL
-    GROUP BY rv_type, rv_make, rv_model
-    HAVING COUNT(*) >= 3
-    ORDER BY avg_reviews DESC
-    LIMIT 15
-    """
-    
-    df_models = pd.read_sql_query(query_top_models, conn)
+    models = priced_area[priced_area['rv_make'].notna() & priced_area['rv_model'].notna()]
+    df_models = models.groupby(['rv_type', 'rv_make', 'rv_model'], dropna=False, sort=False).agg(
+        count=('listing_id', 'size'),
+        avg_price=('base_price', 'mean'),
+        avg_reviews=('num_reviews', 'mean'),
+        avg_rating=('overall_rating', 'mean'),
+        oldest_year=('rv_year', 'min'),
+        newest_year=('rv_year', 'max'),
+    ).reset_index()
+    df_models = order_by(df_models[df_models['count'] >= 3], ['rv_type', 'rv_make', 'rv_model'])
+    df_models = frames.sql_types(order_by(df_models, ['avg_reviews'], ascending=False).head(15).reset_index(drop=True),
+                                 integers=['count', 'oldest_year', 'newest_year'])
     print(df_models.to_string(index=False))
     
     # 6. Entry-Level vs Premium Analysis
     print("\n=== Entry-Level vs Premium Market Analysis ===")
     
-    query_segments = """
-    WITH percentiles AS (
-        SELECT 
-            rv_type,
-            base_price,
-            NTILE(4) OVER (PARTITION BY rv_type ORDER BY base_price) as price_quartile
-        FROM listings
-        WHERE location_city IN ('Calgary', 'Airdrie', 'Cochrane', 'Chestermere', 'Okotoks')
-        AND base_price IS NOT NULL
-        AND rv_type IS NOT NULL
-    ),
-    segment_analysis AS (
-        SELECT 
-            l.rv_type,
-            CASE 
-                WHEN p.price_quartile = 1 THEN 'Budget'
-                WHEN p.price_quartile = 2 THEN 'Mid-Range'
-                WHEN p.price_quartile = 3 THEN 'Upper-Mid'
-                ELSE 'Premium'
-            END as segment,
-            COUNT(*) as count,
-            AVG(l.base_price) as avg_price,
-            AVG(l.num_reviews) as avg_reviews,
-            AVG(l.overall_rating) as avg_rating
-        FROM listings l
-        JOIN percentiles p ON l.rv_type = p.rv_type AND l.base_price = p.base_price
-        WHERE l.location_city IN ('Calgary', 'Airdrie', 'Cochrane', 'Chestermere', 'Okotoks')
-        GROUP BY l.rv_type, segment
-    )
-    SELECT * FROM segment_analysis
-    WHERE rv_type IN ('Travel Trailer', 'Class C')
-    ORDER BY rv_type, 
-        CASE segment 
-            WHEN 'Budget' THEN 1 
-            WHEN 'Mid-Range' THEN 2 
-            WHEN 'Upper-Mid' THEN 3 
-            ELSE 4 
-        END
-    """
-    
-    df_segments = pd.read_sql_query(query_segments, conn)
+    # Price quartiles (NTILE(4) by price within each type), matched back to
+    # listings by type and price, so every listing at a price counts once per
+    # ranked listing at that price
+    quartiles = order_by(typed_area, ['rv_type', 'base_price'])[['rv_type', 'base_price']]
+    quartiles['price_quartile'] = ntile(quartiles.groupby('rv_type').cumcount(),
+                                        quartiles.groupby('rv_type')['rv_type'].transform('size'), 4)
+    segments = ['Budget', 'Mid-Range', 'Upper-Mid', 'Premium']
+    compared = ['Travel Trailer', 'Class C']
+    matched = area[area['rv_type'].isin(compared)].merge(
+        quartiles[quartiles['rv_type'].isin(compared)], on=['rv_type', 'base_price'])
+    matched['segment'] = np.array(segments)[matched['price_quartile'].clip(upper=4) - 1]
+    df_segments = matched.groupby(['rv_type', 'segment']).agg(
+        count=('listing_id', 'size'),
+        avg_price=('base_price', 'mean'),
+        avg_reviews=('num_reviews', 'mean'),
+        avg_rating=('overall_rating', 'mean'),
+    ).reset_index()
+    df_segments['rank'] = df_segments['segment'].map(segments.index)
+    df_segments = order_by(df_segments, ['rv_type', 'rank']).drop(columns='rank').reset_index(drop=True)
     print(df_segments.to_string(index=False))
     
     # 7. Investment Recommendations
@@ -302,38 +270,20 @@ def analyze_investment_opportunities():
     # 9. Market Gaps and Opportunities
     print("\n=== IDENTIFIED MARKET GAPS ===")
     
-    query_gaps = """
-    SELECT 
-        'Luxury Travel Trailers' as gap,
-        'Only ' || COUNT(*) || ' listings over $200/night' as opportunity
-    FROM listings
-    WHERE rv_type = 'Travel Trailer'
-    AND base_price > 200
-    AND location_city = 'Calgary'
-    
-    UNION ALL
-    
-    SELECT 
-        'Pet-Friendly Class C' as gap,
-        'Only ' || ROUND(AVG(CASE WHEN pet_friendly = 1 THEN 100 ELSE 0 END), 0) || '% allow pets' as opportunity
-    FROM listings
-    WHERE rv_type = 'Class C'
-    AND location_city = 'Calgary'
-    
-    UNION ALL
-    
-    SELECT 
-        'Small Travel Trailers' as gap,
-        'Only ' || COUNT(*) || ' under 20ft (easy tow market)' as opportunity
-    FROM listings
-    WHERE rv_type = 'Travel Trailer'
-    AND length_ft < 20
-    AND location_city = 'Calgary'
-    """
-    
-    df_gaps = pd.read_sql_query(query_gaps, conn)
-    for _, row in df_gaps.iterrows():
-        print(f"- {row['gap']}: {row['opportunity']}")
+    calgary = listings[listings['location_city'] == 'Calgary']
+    calgary_trailers = calgary[calgary['rv_type'] == 'Travel Trailer']
+    calgary_class_c = calgary[calgary['rv_type'] == 'Class C']
+    pet_pct = None
+    if len(calgary_class_c):
+        # Rendered as SQLite renders a rounded REAL, e.g. "25.0"
+        pet_pct = str(sql_round((calgary_class_c['pet_friendly'] == 1).mean() * 100, 0))
+    gaps = [
+        ('Luxury Travel Trailers', f"Only {(calgary_trailers['base_price'] > 200).sum()} listings over $200/night"),
+        ('Pet-Friendly Class C', f"Only {pet_pct}% allow pets" if pet_pct is not None else None),
+        ('Small Travel Trailers', f"Only {(calgary_trailers['length_ft'] < 20).sum()} under 20ft (easy tow market)"),
+    ]
+    for gap, opportunity in gaps:
+        print(f"- {gap}: {opportunity}")
     
     # Export investment analysis
     print("\n✓ Detailed investment analysis completed")
@@ -347,12 +297,10 @@ def analyze_investment_opportunities():
     }
     
     import json
-    with open('/home/chris/rvezy/data/processed/investment_analysis.json', 'w') as f:
+    with open(PROCESSED_DIR / 'investment_analysis.json', 'w') as f:
         json.dump(investment_summary, f, indent=2)
     
-    print("✓ Investment analysis exported to: /home/chris/rvezy/data/processed/investment_analysis.json")
-    
-    conn.close()
+    print(f"✓ Investment analysis exported to: {PROCESSED_DIR / 'investment_analysis.json'}")
 
 if __name__ == "__main__":
     analyze_investment_opportunities()
\ No newline at end of file
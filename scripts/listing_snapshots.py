@@ -0,0 +1,137 @@
+import argparse
+import re
+import sqlite3
+from datetime import date, datetime
+from pathlib import Path
+from typing import List, Tuple
+
+from rvezy_db import DB_PATH
+
+# Listing fields whose history is kept; a snapshot row is only written when
+# one of them differs from the listing's previous snapshot
+TRACKED_FIELDS = ('base_price', 'security_deposit', 'num_reviews', 'overall_rating')
+
+# Latest snapshot of every listing on or before a date. The correlated
+# MAX() is a seek on the (url, scrape_date) primary key.
+AS_OF_QUERY = f'''
+    SELECT s.url, s.scrape_date, {', '.join('s.' + field for field in TRACKED_FIELDS)}
+    FROM listing_snapshots s
+    WHERE s.scrape_date = (
+        SELECT MAX(scrape_date) FROM listing_snapshots
+        WHERE url = s.url AND scrape_date <= ?
+    )
+'''
+
+
+def create_snapshot_table(cursor: sqlite3.Cursor) -> None:
+    """Create the listing_snapshots table (one row per listing per changed scrape date)"""
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS listing_snapshots (
+            url TEXT NOT NULL,
+            scrape_date TEXT NOT NULL,
+            {', '.join(field + (' INTEGER' if field == 'num_reviews' else ' REAL') for field in TRACKED_FIELDS)},
+            PRIMARY KEY (url, scrape_date)
+        ) WITHOUT ROWID
+    ''')
+
+
+def scrape_date_from_filename(path) -> str:
+    """ISO date from the MMDDYYYY stamp in an export's file name, else today"""
+    for stamp in reversed(re.findall(r'(?<!\d)\d{8}(?!\d)', Path(path).name)):
+        try:
+            return datetime.strptime(stamp, '%m%d%Y').date().isoformat()
+        except ValueError:
+            continue
+    return date.today().isoformat()
+
+
+class SnapshotRecorder:
+    """Writes listing snapshots for one scrape date, skipping unchanged listings.
+
+    Each listing is compared with its latest snapshot before the scrape
+    date. Reloading the same date replaces (or, if the listing changed back,
+    removes) that date's row, so re-runs are idempotent.
+    """
+
+    def __init__(self, cursor: sqlite3.Cursor, scrape_date: str):
+        self.cursor = cursor
+        self.scrape_date = scrape_date
+        self.previous = {}
+        self.current = {}
+
+    def load(self) -> None:
+        """(Re)load the snapshots around the scrape date, e.g. after a rollback"""
+        fields = ', '.join(TRACKED_FIELDS)
+        self.cursor.execute(f'''
+            SELECT s.url, {fields} FROM listing_snapshots s
+            WHERE s.scrape_date = (
+                SELECT MAX(scrape_date) FROM listing_snapshots
+                WHERE url = s.url AND scrape_date < ?
+            )
+        ''', (self.scrape_date,))
+        self.previous = {row[0]: tuple(row[1:]) for row in self.cursor.fetchall()}
+        self.cursor.execute(f'SELECT url, {fields} FROM listing_snapshots WHERE scrape_date = ?',
+                            (self.scrape_date,))
+        self.current = {row[0]: tuple(row[1:]) for row in self.cursor.fetchall()}
+
+    def record(self, rows: List[Tuple[str, Tuple]]) -> None:
+        """Record (url, tracked field values) pairs, in TRACKED_FIELDS order (no commit)"""
+        changed = []
+        reverted = []
+        for url, values in rows:
+            if values == self.previous.get(url):
+                if self.current.pop(url, None) is not None:
+                    reverted.append((url, self.scrape_date))
+            elif self.current.get(url) != values:
+                self.current[url] = values
+                changed.append((url, self.scrape_date) + values)
+
+        self.cursor.executemany(f'''
+            INSERT OR REPLACE INTO listing_snapshots (url, scrape_date, {', '.join(TRACKED_FIELDS)})
+            VALUES ({', '.join('?' * (len(TRACKED_FIELDS) + 2))})
+        ''', changed)
+        self.cursor.executemany('DELETE FROM listing_snapshots WHERE url = ? AND scrape_date = ?', reverted)
+
+
+def listings_as_of(conn: sqlite3.Connection, as_of: str) -> List[Tuple]:
+    """(url, scrape_date, *TRACKED_FIELDS) for every listing as it was on as_of"""
+    return conn.execute(AS_OF_QUERY, (as_of,)).fetchall()
+
+
+def listing_history(conn: sqlite3.Connection, url: str) -> List[Tuple]:
+    """(scrape_date, *TRACKED_FIELDS) for each recorded change of one listing"""
+    return conn.execute(f'''
+        SELECT scrape_date, {', '.join(TRACKED_FIELDS)} FROM listing_snapshots
+        WHERE url = ? ORDER BY scrape_date
+    ''', (url,)).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show listing price and review history from listing_snapshots")
+    parser.add_argument('--db', default=str(DB_PATH),
+                        help="SQLite database written by extract_rvezy_data.py")
+    parser.add_argument('--url', help="print the change history of one listing")
+    parser.add_argument('--as-of', default=date.today().isoformat(),
+                        help="print every listing as of this date (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(Path(args.db))
+    header = ' | '.join(f"{field:>16}" for field in TRACKED_FIELDS)
+
+    if args.url:
+        print(f"=== History of {args.url} ===")
+        print(f"{'scrape_date':>12} | {header}")
+        for scrape_date, *values in listing_history(conn, args.url):
+            print(f"{scrape_date:>12} | " + ' | '.join(f"{str(value):>16}" for value in values))
+    else:
+        rows = listings_as_of(conn, args.as_of)
+        print(f"=== {len(rows)} listings as of {args.as_of} ===")
+        print(f"{'scrape_date':>12} | {header} | url")
+        for url, scrape_date, *values in rows:
+            print(f"{scrape_date:>12} | " + ' | '.join(f"{str(value):>16}" for value in values) + f" | {url}")
+
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
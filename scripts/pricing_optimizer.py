@@ -1,13 +1,15 @@
-import sqlite3
+from typing import Optional
+
 import pandas as pd
 import numpy as np
-from pathlib import Path
 
-def optimize_pricing():
+from analytics_frames import AnalyticsFrames, order_by, reviews_per_year, shared_frames
+from rvezy_db import PROCESSED_DIR
+
+def optimize_pricing(frames: Optional[AnalyticsFrames] = None):
     """Analyze pricing optimization opportunities for the user's $97/night Travel Trailer"""
     
-    db_path = Path("/home/chris/rvezy/data/processed/rvezy_listings.db")
-    conn = sqlite3.connect(db_path)
+    frames = frames or shared_frames()
     
     # User's current listing details
     USER_PRICE = 97
@@ -26,108 +28,47 @@ def optimize_pricing():
     print(f"- Estimated Length: {USER_LENGTH}ft")
     print(f"- Profit Split: 60/40 with RV owner")
     
+    # Calgary Travel Trailers, cheapest first (the order of the city/type/price index)
+    listings = frames.listings
+    calgary_tt_all = listings[(listings['rv_type'] == 'Travel Trailer') & (listings['location_city'] == 'Calgary')]
+    calgary_tt = order_by(calgary_tt_all[calgary_tt_all['base_price'].notna()], ['base_price', 'listing_id'])
+    
     # 1. Market Position Analysis
     print("\n=== Market Position Analysis ===")
     
-    query_position = """
-    SELECT 
-        COUNT(*) as total_travel_trailers,
-        SUM(CASE WHEN base_price <= ? THEN 1 ELSE 0 END) as cheaper_count,
-        MIN(base_price) as min_price,
-        MAX(base_price) as max_price,
-        AVG(base_price) as avg_price,
-        PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY base_price) as q1_price,
-        PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY base_price) as median_price,
-        PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY base_price) as q3_price
-    FROM listings
-    WHERE rv_type = 'Travel Trailer'
-    AND location_city = 'Calgary'
-    AND base_price IS NOT NULL
-    """
-    
-    # SQLite doesn't have PERCENTILE_CONT, so let's use a different approach
-    query_position = """
-    SELECT 
-        COUNT(*) as total_travel_trailers,
-        SUM(CASE WHEN base_price <= ? THEN 1 ELSE 0 END) as cheaper_count,
-        MIN(base_price) as min_price,
-        MAX(base_price) as max_price,
-        AVG(base_price) as avg_price
-    FROM listings
-    WHERE rv_type = 'Travel Trailer'
-    AND location_city = 'Calgary'
-    AND base_price IS NOT NULL
-    """
-    
-    df_position = pd.read_sql_query(query_position, conn, params=[USER_PRICE])
-    
-    # Get percentiles separately
-    query_prices = """
-    SELECT base_price
-    FROM listings
-    WHERE rv_type = 'Travel Trailer'
-    AND location_city = 'Calgary'
-    AND base_price IS NOT NULL
-    ORDER BY base_price
-    """
-    
-    prices = pd.read_sql_query(query_prices, conn)['base_price']
-    q1 = prices.quantile(0.25)
-    median = prices.quantile(0.50)
-    q3 = prices.quantile(0.75)
-    
-    percentile = (df_position['cheaper_count'].iloc[0] / df_position['total_travel_trailers'].iloc[0]) * 100
-    
-    print(f"Total Travel Trailers in Calgary: {df_position['total_travel_trailers'].iloc[0]}")
+    market_prices = calgary_tt['base_price']
+    q1 = market_prices.quantile(0.25)
+    median = market_prices.quantile(0.50)
+    q3 = market_prices.quantile(0.75)
+    
+    percentile = ((market_prices <= USER_PRICE).sum() / len(market_prices)) * 100
+    
+    print(f"Total Travel Trailers in Calgary: {len(market_prices)}")
     print(f"Your price percentile: {percentile:.1f}%")
     print(f"Price statistics:")
-    print(f"  - Minimum: ${df_position['min_price'].iloc[0]:.2f}")
+    print(f"  - Minimum: ${market_prices.min():.2f}")
     print(f"  - 25th percentile: ${q1:.2f}")
     print(f"  - Median: ${median:.2f}")
-    print(f"  - Average: ${df_position['avg_price'].iloc[0]:.2f}")
+    print(f"  - Average: ${market_prices.mean():.2f}")
     print(f"  - 75th percentile: ${q3:.2f}")
-    print(f"  - Maximum: ${df_position['max_price'].iloc[0]:.2f}")
+    print(f"  - Maximum: ${market_prices.max():.2f}")
     
     # 2. Comparable RV Analysis
     print("\n=== Comparable RV Analysis ===")
     
-    query_comparable = """
-    SELECT 
-        rv_year,
-        rv_make,
-        rv_model,
-        base_price,
-        sleeps,
-        length_ft,
-        overall_rating,
-        num_reviews,
-        delivery_available,
-        pet_friendly,
-        h.is_superhost,
-        l.url
-    FROM listings l
-    JOIN hosts h ON l.host_id = h.host_id
-    WHERE l.rv_type = 'Travel Trailer'
-    AND l.location_city = 'Calgary'
-    AND l.base_price IS NOT NULL
-    AND l.sleeps BETWEEN ? AND ?
-    AND l.length_ft BETWEEN ? AND ?
-    AND l.rv_year BETWEEN ? AND ?
-    ORDER BY ABS(l.sleeps - ?) + ABS(l.length_ft - ?) ASC
-    LIMIT 20
-    """
-    
-    # Find comparable RVs (similar size, age, capacity)
-    df_comparable = pd.read_sql_query(
-        query_comparable, 
-        conn, 
-        params=[
-            USER_SLEEPS - 2, USER_SLEEPS + 2,  # Sleeps range
-            USER_LENGTH - 4, USER_LENGTH + 4,  # Length range
-            USER_YEAR - 3, USER_YEAR + 3,      # Year range
-            USER_SLEEPS, USER_LENGTH           # For sorting by similarity
-        ]
-    )
+    # Find comparable RVs (similar size, age, capacity), most similar first
+    hosted = calgary_tt.merge(frames.hosts[['host_id', 'is_superhost']], on='host_id', sort=False)
+    comparable = hosted[
+        hosted['sleeps'].between(USER_SLEEPS - 2, USER_SLEEPS + 2)      # Sleeps range
+        & hosted['length_ft'].between(USER_LENGTH - 4, USER_LENGTH + 4)  # Length range
+        & hosted['rv_year'].between(USER_YEAR - 3, USER_YEAR + 3)        # Year range
+    ]
+    similarity = (comparable['sleeps'] - USER_SLEEPS).abs() + (comparable['length_ft'] - USER_LENGTH).abs()
+    comparable = comparable.assign(similarity=similarity).sort_values('similarity', kind='stable').head(20)
+    df_comparable = frames.sql_types(comparable[[
+        'rv_year', 'rv_make', 'rv_model', 'base_price', 'sleeps', 'length_ft', 'overall_rating',
+        'num_reviews', 'delivery_available', 'pet_friendly', 'is_superhost', 'url'
+    ]].reset_index(drop=True))
     
     print(f"Found {len(df_comparable)} comparable Travel Trailers (±2 sleeps, ±4ft, ±3 years)")
     
@@ -145,29 +86,12 @@ def optimize_pricing():
     # 3. Feature-Based Pricing Analysis
     print("\n=== Feature Impact on Pricing ===")
     
-    query_features = """
-    WITH feature_analysis AS (
-        SELECT 
-            AVG(CASE WHEN delivery_available = 1 THEN base_price ELSE NULL END) as avg_with_delivery,
-            AVG(CASE WHEN delivery_available = 0 THEN base_price ELSE NULL END) as avg_no_delivery,
-            AVG(CASE WHEN pet_friendly = 1 THEN base_price ELSE NULL END) as avg_pet_friendly,
-            AVG(CASE WHEN pet_friendly = 0 THEN base_price ELSE NULL END) as avg_no_pets,
-            AVG(CASE WHEN h.is_superhost = 1 THEN base_price ELSE NULL END) as avg_superhost,
-            AVG(CASE WHEN h.is_superhost = 0 THEN base_price ELSE NULL END) as avg_regular_host
-        FROM listings l
-        JOIN hosts h ON l.host_id = h.host_id
-        WHERE l.rv_type = 'Travel Trailer'
-        AND l.location_city = 'Calgary'
-        AND l.base_price IS NOT NULL
-    )
-    SELECT * FROM feature_analysis
-    """
-    
-    df_features = pd.read_sql_query(query_features, conn)
+    def average_price(flag, value):
+        return hosted.loc[hosted[flag] == value, 'base_price'].mean()
     
-    delivery_premium = ((df_features['avg_with_delivery'].iloc[0] / df_features['avg_no_delivery'].iloc[0]) - 1) * 100
-    pet_premium = ((df_features['avg_pet_friendly'].iloc[0] / df_features['avg_no_pets'].iloc[0]) - 1) * 100
-    superhost_premium = ((df_features['avg_superhost'].iloc[0] / df_features['avg_regular_host'].iloc[0]) - 1) * 100
+    delivery_premium = ((average_price('delivery_available', 1) / average_price('delivery_available', 0)) - 1) * 100
+    pet_premium = ((average_price('pet_friendly', 1) / average_price('pet_friendly', 0)) - 1) * 100
+    superhost_premium = ((average_price('is_superhost', 1) / average_price('is_superhost', 0)) - 1) * 100
     
     print(f"Average price premiums for features:")
     print(f"  - Delivery available: {delivery_premium:+.1f}%")
@@ -177,37 +101,24 @@ def optimize_pricing():
     # 4. Performance-Based Pricing
     print("\n=== Performance-Based Pricing Analysis ===")
     
-    query_performance = """
-    SELECT 
-        CASE 
-            WHEN base_price < 100 THEN 'Under $100'
-            WHEN base_price BETWEEN 100 AND 125 THEN '$100-125'
-            WHEN base_price BETWEEN 126 AND 150 THEN '$126-150'
-            WHEN base_price BETWEEN 151 AND 175 THEN '$151-175'
-            ELSE 'Over $175'
-        END as price_range,
-        COUNT(*) as count,
-        AVG(overall_rating) as avg_rating,
-        AVG(num_reviews) as avg_reviews,
-        AVG(CAST(num_reviews AS FLOAT) / 
-            NULLIF((2025 - rv_year), 0)) as reviews_per_year
-    FROM listings
-    WHERE rv_type = 'Travel Trailer'
-    AND location_city = 'Calgary'
-    AND base_price IS NOT NULL
-    AND num_reviews > 0
-    GROUP BY price_range
-    ORDER BY 
-        CASE price_range
-            WHEN 'Under $100' THEN 1
-            WHEN '$100-125' THEN 2
-            WHEN '$126-150' THEN 3
-            WHEN '$151-175' THEN 4
-            ELSE 5
-        END
-    """
-    
-    df_performance = pd.read_sql_query(query_performance, conn)
+    reviewed = calgary_tt[calgary_tt['num_reviews'] > 0]
+    price = reviewed['base_price']
+    price_range = np.select(
+        [price < 100, price.between(100, 125), price.between(126, 150), price.between(151, 175)],
+        ['Under $100', '$100-125', '$126-150', '$151-175'],
+        default='Over $175'
+    )
+    ranges = ['Under $100', '$100-125', '$126-150', '$151-175', 'Over $175']
+    df_performance = reviewed.assign(
+        price_range=price_range,
+        reviews_per_year=reviews_per_year(reviewed),
+    ).groupby('price_range').agg(
+        count=('listing_id', 'size'),
+        avg_rating=('overall_rating', 'mean'),
+        avg_reviews=('num_reviews', 'mean'),
+        reviews_per_year=('reviews_per_year', 'mean'),
+    ).reindex([label for label in ranges if label in set(price_range)]).reset_index()
+    
     print("Performance by Price Range:")
     print(df_performance.to_string(index=False))
     
@@ -265,21 +176,15 @@ def optimize_pricing():
     # 7. Weekly/Monthly Discount Strategy
     print("\n5. DISCOUNT STRATEGY:")
     
-    query_discounts = """
-    SELECT 
-        AVG(CASE WHEN p.discount_type = 'weekly' THEN p.discount_percent END) as avg_weekly_discount,
-        AVG(CASE WHEN p.discount_type = 'monthly' THEN p.discount_percent END) as avg_monthly_discount
-    FROM listings l
-    LEFT JOIN pricing p ON l.listing_id = p.listing_id
-    WHERE l.rv_type = 'Travel Trailer'
-    AND l.location_city = 'Calgary'
-    AND l.base_price BETWEEN ? AND ?
-    """
+    nearby = calgary_tt_all[calgary_tt_all['base_price'].between(recommended_base - 20, recommended_base + 20)]
+    discounts = frames.pricing[frames.pricing['listing_id'].isin(nearby['listing_id'])]
     
-    df_discounts = pd.read_sql_query(query_discounts, conn, params=[recommended_base - 20, recommended_base + 20])
+    def average_discount(discount_type):
+        average = discounts.loc[discounts['discount_type'] == discount_type, 'discount_percent'].mean()
+        return None if pd.isna(average) else average
     
-    avg_weekly = df_discounts['avg_weekly_discount'].iloc[0] or 10
-    avg_monthly = df_discounts['avg_monthly_discount'].iloc[0] or 20
+    avg_weekly = average_discount('weekly') or 10
+    avg_monthly = average_discount('monthly') or 20
     
     print(f"   Market standard discounts for similar price range:")
     print(f"   - Weekly: {avg_weekly:.0f}% off")
@@ -293,22 +198,20 @@ def optimize_pricing():
         'recommended_price': recommended_base,
         'revenue_increase_potential': ((recommended_base/USER_PRICE)-1)*100,
         'market_stats': {
-            'min': float(df_position['min_price'].iloc[0]),
+            'min': float(market_prices.min()),
             'q1': float(q1),
             'median': float(median),
-            'avg': float(df_position['avg_price'].iloc[0]),
+            'avg': float(market_prices.mean()),
             'q3': float(q3),
-            'max': float(df_position['max_price'].iloc[0])
+            'max': float(market_prices.max())
         }
     }
     
     import json
-    with open('/home/chris/rvezy/data/processed/pricing_analysis.json', 'w') as f:
+    with open(PROCESSED_DIR / 'pricing_analysis.json', 'w') as f:
         json.dump(analysis_data, f, indent=2)
     
-    print("\n✓ Detailed analysis exported to: /home/chris/rvezy/data/processed/pricing_analysis.json")
-    
-    conn.close()
+    print(f"\n✓ Detailed analysis exported to: {PROCESSED_DIR / 'pricing_analysis.json'}")
 
 if __name__ == "__main__":
     optimize_pricing()
\ No newline at end of file
@@ -0,0 +1,92 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+from pathlib import Path
+from typing import Optional, Tuple
+
+import pandas as pd
+
+from rvezy_db import PROCESSED_DIR, data_version
+
+# Results of read_sql_query(), one pickle per query, kept across runs
+CACHE_DIR = Path(os.environ.get('RVEZY_QUERY_CACHE_DIR', PROCESSED_DIR / 'query_cache'))
+
+# Total size of the cache; the least recently used results are removed
+# beyond it (0 turns the cache off)
+CACHE_MB = float(os.environ.get('RVEZY_QUERY_CACHE_MB', 512))
+
+
+def database_state(conn: sqlite3.Connection) -> Optional[Tuple]:
+    """What a connection would read: the database file, its data_version and
+    the size and mtime of the file and its WAL.
+
+    None when results cannot be cached (an in-memory database, or a
+    connection in the middle of its own uncommitted writes). The file stats
+    also change on writes that do not bump data_version, so a result is
+    never served after any change to the database.
+    """
+    path = next((row[2] for row in conn.execute('PRAGMA database_list') if row[1] == 'main'), '')
+    if not path or conn.in_transaction:
+        return None
+    stats = tuple((os.stat(file).st_size, os.stat(file).st_mtime_ns)
+                  for file in (path, path + '-wal') if os.path.exists(file))
+    return path, data_version(conn), stats
+
+
+def read_sql_query(sql: str, conn: sqlite3.Connection, params=None, **kwargs) -> pd.DataFrame:
+    """pd.read_sql_query, answered from the cache when the database is unchanged"""
+    state = database_state(conn) if CACHE_MB > 0 else None
+    if state is None:
+        return pd.read_sql_query(sql, conn, params=params, **kwargs)
+
+    key = hashlib.sha256(pickle.dumps((sql, params, sorted(kwargs.items()), state))).hexdigest()
+    path = CACHE_DIR / f'{key}.pkl'
+    try:
+        with open(path, 'rb') as f:
+            frame = pickle.load(f)
+        os.utime(path)
+        return frame
+    except (OSError, EOFError, pickle.UnpicklingError):
+        pass
+
+    frame = pd.read_sql_query(sql, conn, params=params, **kwargs)
+    try:
+        store(path, frame)
+    except OSError:
+        pass
+    return frame
+
+
+def store(path: Path, frame: pd.DataFrame) -> None:
+    """Write one result (atomically, as pipeline nodes share the cache), then evict"""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    partial = path.with_suffix(f'.{os.getpid()}.partial')
+    with open(partial, 'wb') as f:
+        pickle.dump(frame, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(partial, path)
+    evict(CACHE_MB * 1024 * 1024)
+
+
+def evict(max_bytes: float) -> None:
+    """Remove the least recently used results until the cache fits in max_bytes"""
+    entries = []
+    for entry in os.scandir(CACHE_DIR):
+        if entry.name.endswith('.pkl'):
+            stat = entry.stat()
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def clear() -> None:
+    """Remove every cached result"""
+    if CACHE_DIR.exists():
+        evict(0)
@@ -1,10 +1,9 @@
-import sqlite3
-import pandas as pd
-from pathlib import Path
+from query_cache import read_sql_query
+from rvezy_db import PROCESSED_DIR, connect
+from segment_summaries import segment_sources
 
 def query_database():
-    db_path = Path("/home/chris/rvezy/data/processed/rvezy_listings.db")
-    conn = sqlite3.connect(db_path)
+    conn = connect()
     
     # Query 1: Travel Trailers in Calgary similar to user's listing
     print("=== Travel Trailers in Calgary (similar to your listing) ===")
@@ -29,7 +28,7 @@ def query_database():
     ORDER BY l.base_price
     """
     
-    df1 = pd.read_sql_query(query1, conn)
+    df1 = read_sql_query(query1, conn)
     print(f"Found {len(df1)} Travel Trailers in Calgary")
     print(f"Price range: ${df1['base_price'].min():.2f} - ${df1['base_price'].max():.2f}")
     print(f"Average price: ${df1['base_price'].mean():.2f}")
@@ -40,20 +39,20 @@ def query_database():
     query2 = """
     SELECT 
         rv_type,
-        COUNT(*) as count,
-        AVG(base_price) as avg_price,
-        MIN(base_price) as min_price,
-        MAX(base_price) as max_price,
-        AVG(overall_rating) as avg_rating
-    FROM listings
+        SUM(listing_count) as count,
+        SUM(price_sum) / SUM(listing_count) as avg_price,
+        MIN(min_price) as min_price,
+        MAX(max_price) as max_price,
+        SUM(rating_sum) / SUM(rating_count) as avg_rating
+    FROM {segment_summaries}
     WHERE location_city = 'Calgary'
     AND rv_type IS NOT NULL
-    AND base_price IS NOT NULL
+    AND price_tier IS NOT NULL
     GROUP BY rv_type
     ORDER BY avg_price DESC
-    """
+    """.format(**segment_sources(conn))
     
-    df2 = pd.read_sql_query(query2, conn)
+    df2 = read_sql_query(query2, conn)
     print(df2.to_string(index=False))
     
     # Query 3: Most common amenities
@@ -70,7 +69,7 @@ def query_database():
     LIMIT 15
     """
     
-    df3 = pd.read_sql_query(query3, conn)
+    df3 = read_sql_query(query3, conn)
     print(df3.to_string(index=False))
     
     # Query 4: Delivery services
@@ -88,7 +87,7 @@ def query_database():
     GROUP BY rv_type
     """
     
-    df4 = pd.read_sql_query(query4, conn)
+    df4 = read_sql_query(query4, conn)
     print(df4.to_string(index=False))
     
     # Query 5: High performing listings
@@ -110,7 +109,7 @@ def query_database():
     LIMIT 10
     """
     
-    df5 = pd.read_sql_query(query5, conn)
+    df5 = read_sql_query(query5, conn)
     print(df5.to_string(index=False))
     
     # Export key data to CSV for further analysis
@@ -128,8 +127,8 @@ def query_database():
     WHERE l.location_city = 'Calgary'
     """
     
-    df_export = pd.read_sql_query(query_export, conn)
-    df_export.to_csv('/home/chris/rvezy/data/processed/calgary_listings.csv', index=False)
+    df_export = read_sql_query(query_export, conn)
+    df_export.to_csv(PROCESSED_DIR / 'calgary_listings.csv', index=False)
     print(f"Exported {len(df_export)} Calgary listings to calgary_listings.csv")
     
     conn.close()
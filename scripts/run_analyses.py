@@ -0,0 +1,40 @@
+import time
+
+from addon_amenity_analyzer import analyze_addons_amenities
+from analytics_frames import AnalyticsFrames
+from analyze_multi_owners import analyze_multi_rv_owners
+from investment_analyzer import analyze_investment_opportunities
+from pricing_optimizer import optimize_pricing
+from rvezy_db import DB_PATH, connect
+from seasonal_revenue_analyzer import analyze_seasonal_revenue
+from top_performer_analyzer import analyze_top_performers
+
+# Every analyzer, run in this order against one load of the database
+ANALYZERS = [
+    optimize_pricing,
+    analyze_investment_opportunities,
+    analyze_multi_rv_owners,
+    analyze_seasonal_revenue,
+    analyze_top_performers,
+    analyze_addons_amenities,
+]
+
+
+def run_analyses():
+    """Load the analytics frames once and run every analyzer from them"""
+    start = time.perf_counter()
+    conn = connect()
+    try:
+        frames = AnalyticsFrames.load(conn)
+    finally:
+        conn.close()
+    print(f"Loaded {len(frames.listings):,} listings from {DB_PATH} in {time.perf_counter() - start:.2f}s\n")
+
+    for analyzer in ANALYZERS:
+        start = time.perf_counter()
+        analyzer(frames)
+        print(f"\n[{analyzer.__name__} finished in {time.perf_counter() - start:.2f}s]\n")
+
+
+if __name__ == "__main__":
+    run_analyses()
@@ -0,0 +1,171 @@
+import argparse
+import importlib
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from rvezy_db import DB_PATH, PROCESSED_DIR
+
+# The refresh as a DAG: node -> 'module:function' to run and the nodes it runs
+# after. Every analysis and dashboard reads the database, not another node's
+# output, so they all wait on extraction only and run side by side.
+NODES = {
+    'extract': {'target': 'extract_rvezy_data:main', 'after': []},
+    'pricing_optimizer': {'target': 'pricing_optimizer:optimize_pricing', 'after': ['extract']},
+    'investment_analyzer': {'target': 'investment_analyzer:analyze_investment_opportunities', 'after': ['extract']},
+    'analyze_multi_owners': {'target': 'analyze_multi_owners:analyze_multi_rv_owners', 'after': ['extract']},
+    'seasonal_revenue_analyzer': {'target': 'seasonal_revenue_analyzer:analyze_seasonal_revenue', 'after': ['extract']},
+    'top_performer_analyzer': {'target': 'top_performer_analyzer:analyze_top_performers', 'after': ['extract']},
+    'addon_amenity_analyzer': {'target': 'addon_amenity_analyzer:analyze_addons_amenities', 'after': ['extract']},
+    'query_database': {'target': 'query_database:query_database', 'after': ['extract']},
+    'generate_dashboard_data': {'target': 'generate_dashboard_data:generate_dashboard_data', 'after': ['extract']},
+    'generate_comprehensive_dashboard': {
+        'target': 'generate_comprehensive_dashboard:generate_comprehensive_dashboard_data', 'after': ['extract'],
+    },
+}
+
+# Nodes allowed to write to the database; the rest get read-only connections
+WRITERS = {'extract'}
+
+
+def run_node(name: str, target: str, args: Optional[List[str]], read_only: bool, log_path: Path,
+             pipeline_start: float) -> Dict:
+    """Run one node in a pool worker with its output sent to log_path"""
+    module_name, function_name = target.split(':')
+    os.environ['RVEZY_DB_READ_ONLY'] = '1' if read_only else '0'
+    started = time.time() - pipeline_start
+    start, cpu_start = time.perf_counter(), time.process_time()
+
+    # Redirect the file descriptors rather than sys.stdout so logging handlers
+    # and child processes of the node write to its log too
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved = os.dup(1), os.dup(2)
+    ok = False
+    with open(log_path, 'w') as log:
+        os.dup2(log.fileno(), 1)
+        os.dup2(log.fileno(), 2)
+        try:
+            function = getattr(importlib.import_module(module_name), function_name)
+            function(args) if args is not None else function()
+            ok = True
+        except (Exception, SystemExit):
+            traceback.print_exc()
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(saved[0], 1)
+            os.dup2(saved[1], 2)
+            os.close(saved[0])
+            os.close(saved[1])
+    return {
+        'ok': ok,
+        'started': round(started, 3),
+        'seconds': round(time.perf_counter() - start, 3),
+        'cpu_seconds': round(time.process_time() - cpu_start, 3),
+    }
+
+
+def run_dag(nodes: Dict[str, Dict], node_args: Dict[str, List[str]], workers: Optional[int],
+            log_dir: Path) -> Dict[str, Dict]:
+    """Run each node once everything it runs after has succeeded, up to `workers` at a time"""
+    for name, node in nodes.items():
+        unknown = [dep for dep in node['after'] if dep not in nodes]
+        if unknown:
+            raise ValueError(f"{name} runs after unknown node(s): {', '.join(unknown)}")
+
+    log_dir.mkdir(parents=True, exist_ok=True)
+    pipeline_start = time.time()
+    results = {}
+    pending = dict(nodes)
+    running = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            for name, node in list(pending.items()):
+                if any(dep not in results for dep in node['after']):
+                    continue
+                del pending[name]
+                failed = [dep for dep in node['after'] if not results[dep]['ok']]
+                if failed:
+                    results[name] = {'ok': False, 'skipped': True}
+                    print(f"  {name} skipped ({', '.join(failed)} did not finish)")
+                    continue
+                future = pool.submit(run_node, name, node['target'], node_args.get(name),
+                                     name not in WRITERS, log_dir / f"{name}.log", pipeline_start)
+                running[future] = name
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name] = future.result()
+                seconds = results[name]['seconds']
+                if results[name]['ok']:
+                    print(f"  {name} done in {seconds:.2f}s")
+                else:
+                    print(f"  {name} FAILED in {seconds:.2f}s, see {log_dir / f'{name}.log'}")
+    return results
+
+
+def critical_path(nodes: Dict[str, Dict], results: Dict[str, Dict]) -> float:
+    """Seconds along the slowest chain of nodes, the least the run could take"""
+    finish = {}
+
+    def finish_time(name):
+        if name not in finish:
+            after = [finish_time(dep) for dep in nodes[name]['after']]
+            finish[name] = max(after, default=0) + results.get(name, {}).get('seconds', 0)
+        return finish[name]
+
+    return max((finish_time(name) for name in nodes), default=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract, analyze and build the dashboards, running independent steps in parallel")
+    parser.add_argument('--input', help="CSV export(s) to extract first; without it the analyses "
+                                        "run against the existing database")
+    parser.add_argument('--incremental', action='store_true',
+                        help="only extract listings that are new or changed since the last run")
+    parser.add_argument('--workers', type=int, default=None, help="processes in the pool (default one per CPU)")
+    parser.add_argument('--log-dir', default=str(PROCESSED_DIR / 'pipeline_logs'),
+                        help="one <node>.log per node with everything it printed")
+    args = parser.parse_args()
+
+    nodes = dict(NODES)
+    node_args = {}
+    if args.input:
+        node_args['extract'] = ['--input', args.input, '--db', str(DB_PATH)]
+        if args.incremental:
+            node_args['extract'].append('--incremental')
+    else:
+        del nodes['extract']
+        for name, node in nodes.items():
+            nodes[name] = dict(node, after=[dep for dep in node['after'] if dep != 'extract'])
+
+    print(f"Running {len(nodes)} nodes against {DB_PATH}")
+    start = time.perf_counter()
+    results = run_dag(nodes, node_args, args.workers, Path(args.log_dir))
+    wall = time.perf_counter() - start
+
+    print(f"\n{'Node':<36} {'Status':<8} {'Start':>8} {'Seconds':>9} {'CPU':>9}")
+    for name in nodes:
+        result = results[name]
+        if result.get('skipped'):
+            print(f"{name:<36} {'skipped':<8}")
+            continue
+        print(f"{name:<36} {'ok' if result['ok'] else 'FAILED':<8} {result['started']:>8.2f} "
+              f"{result['seconds']:>9.2f} {result['cpu_seconds']:>9.2f}")
+    node_seconds = sum(result.get('seconds', 0) for result in results.values())
+    print(f"\nFinished in {wall:.2f}s: {node_seconds:.2f}s of node time, "
+          f"{critical_path(nodes, results):.2f}s on the critical path")
+
+    if not all(result['ok'] for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
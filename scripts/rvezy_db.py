@@ -0,0 +1,50 @@
+import os
+import sqlite3
+from pathlib import Path
+
+from sql_functions import register_functions
+
+# Project locations shared by the ETL and analysis scripts. Each can be
+# overridden from the environment, e.g. to point a benchmark run at a
+# fixture database without touching the real one.
+PROCESSED_DIR = Path(os.environ.get('RVEZY_PROCESSED_DIR', '/home/chris/rvezy/data/processed'))
+OUTPUT_DIR = Path(os.environ.get('RVEZY_OUTPUT_DIR', '/home/chris/rvezy/output'))
+DB_PATH = Path(os.environ.get('RVEZY_DB', PROCESSED_DIR / 'rvezy_listings.db'))
+
+
+def connect(db_path=None, read_only=None) -> sqlite3.Connection:
+    """Open the listings database (DB_PATH unless another path is given).
+
+    A read-only connection fails on any write and never takes a write lock, so
+    analyses can run side by side. read_only defaults to RVEZY_DB_READ_ONLY,
+    which run_pipeline sets for its analysis nodes. Every connection has the
+    median, percentile and iqr aggregates of sql_functions.
+    """
+    if read_only is None:
+        read_only = os.environ.get('RVEZY_DB_READ_ONLY') == '1'
+    if read_only:
+        conn = sqlite3.connect(f"{Path(db_path or DB_PATH).resolve().as_uri()}?mode=ro", uri=True)
+    else:
+        conn = sqlite3.connect(db_path or DB_PATH)
+    register_functions(conn)
+    return conn
+
+
+def create_data_version_table(cursor: sqlite3.Cursor) -> None:
+    """Create the single-row data_version counter (0 until the first write; no commit)"""
+    cursor.execute('CREATE TABLE IF NOT EXISTS data_version (version INTEGER NOT NULL)')
+    cursor.execute('INSERT INTO data_version (version) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM data_version)')
+
+
+def bump_data_version(cursor: sqlite3.Cursor) -> None:
+    """Mark the data as changed, in the writer's transaction (no commit)"""
+    cursor.execute('UPDATE data_version SET version = version + 1')
+
+
+def data_version(conn: sqlite3.Connection) -> int:
+    """The database's data_version counter (0 for a database without one)"""
+    try:
+        row = conn.execute('SELECT version FROM data_version').fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row[0] if row else 0
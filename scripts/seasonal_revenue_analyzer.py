@@ -1,38 +1,43 @@
-import sqlite3
+import json
+from typing import Optional
+
 import pandas as pd
 import numpy as np
-from pathlib import Path
-import json
 
-def analyze_seasonal_revenue():
+from analytics_frames import (WINTER_AMENITY, AnalyticsFrames, order_by, reviews_per_year, shared_frames,
+                              sql_round)
+from rvezy_db import PROCESSED_DIR
+
+def analyze_seasonal_revenue(frames: Optional[AnalyticsFrames] = None):
     """Analyze revenue potential with seasonal considerations and occupancy indicators"""
     
-    db_path = Path("/home/chris/rvezy/data/processed/rvezy_listings.db")
-    conn = sqlite3.connect(db_path)
+    frames = frames or shared_frames()
+    priced = frames.priced
+    amenity_names = frames.amenities[['listing_id', 'name']]
+    winter_ready = priced['listing_id'].isin(frames.winter_ready_ids)
     
     print("=== RVezy Seasonal Revenue Analysis ===\n")
     
     # 1. Winter-Ready RV Analysis
     print("=== Winter-Ready RV Analysis ===")
     
-    query_winter_ready = """
-    SELECT 
-        l.rv_type,
-        COUNT(DISTINCT l.listing_id) as total_count,
-        COUNT(DISTINCT CASE WHEN a.name = 'Full-Winter rental available' THEN l.listing_id END) as winter_ready_count,
-        ROUND(COUNT(DISTINCT CASE WHEN a.name = 'Full-Winter rental available' THEN l.listing_id END) * 100.0 / COUNT(DISTINCT l.listing_id), 1) as winter_ready_pct,
-        AVG(CASE WHEN a.name = 'Full-Winter rental available' THEN l.base_price END) as winter_avg_price,
-        AVG(CASE WHEN a.name != 'Full-Winter rental available' OR a.name IS NULL THEN l.base_price END) as regular_avg_price
-    FROM listings l
-    LEFT JOIN listing_amenities la ON l.listing_id = la.listing_id
-    LEFT JOIN amenities a ON la.amenity_id = a.amenity_id
-    WHERE l.base_price IS NOT NULL
-    AND l.rv_type IS NOT NULL
-    GROUP BY l.rv_type
-    ORDER BY winter_ready_count DESC
-    """
-    
-    df_winter = pd.read_sql_query(query_winter_ready, conn)
+    # One row per listing and amenity (or one row for a listing without any)
+    typed = priced[priced['rv_type'].notna()]
+    typed_amenities = typed.merge(amenity_names, on='listing_id', how='left', sort=False)
+    is_winter = typed_amenities['name'] == WINTER_AMENITY
+    df_winter = typed_amenities.assign(
+        winter_listing=typed_amenities['listing_id'].where(is_winter),
+        winter_price=typed_amenities['base_price'].where(is_winter),
+        regular_price=typed_amenities['base_price'].where(~is_winter),
+    ).groupby('rv_type').agg(
+        total_count=('listing_id', 'nunique'),
+        winter_ready_count=('winter_listing', 'nunique'),
+        winter_avg_price=('winter_price', 'mean'),
+        regular_avg_price=('regular_price', 'mean'),
+    ).reset_index()
+    df_winter.insert(3, 'winter_ready_pct', sql_round(df_winter['winter_ready_count'] * 100.0 / df_winter['total_count'], 1))
+    df_winter = frames.sql_types(order_by(df_winter, ['winter_ready_count'], ascending=False).reset_index(drop=True),
+                                 integers=['total_count', 'winter_ready_count'])
     
     # Calculate winter premium
     df_winter['winter_premium_pct'] = ((df_winter['winter_avg_price'] / df_winter['regular_avg_price']) - 1) * 100
@@ -48,55 +53,30 @@ def analyze_seasonal_revenue():
     # Shoulder: 60 days (April, September)  
     # Winter: 185 days (October-March)
     
-    query_revenue_scenarios = """
-    WITH winter_listings AS (
-        SELECT DISTINCT l.listing_id, l.rv_type, l.base_price
-        FROM listings l
-        JOIN listing_amenities la ON l.listing_id = la.listing_id
-        JOIN amenities a ON la.amenity_id = a.amenity_id
-        WHERE a.name = 'Full-Winter rental available'
-        AND l.base_price IS NOT NULL
-    ),
-    regular_listings AS (
-        SELECT l.listing_id, l.rv_type, l.base_price
-        FROM listings l
-        WHERE l.listing_id NOT IN (SELECT listing_id FROM winter_listings)
-        AND l.base_price IS NOT NULL
-    )
-    SELECT 
-        'Winter-Ready' as category,
-        rv_type,
-        COUNT(*) as count,
-        AVG(base_price) as avg_price,
-        -- Summer occupancy assumptions
-        AVG(base_price) * 120 * 0.70 as summer_revenue_70pct,
-        AVG(base_price) * 120 * 0.50 as summer_revenue_50pct,
-        -- Year-round with winter capability
-        (AVG(base_price) * 120 * 0.70) + -- Summer high
-        (AVG(base_price) * 60 * 0.40) +  -- Shoulder medium
-        (AVG(base_price) * 185 * 0.20) as year_round_revenue
-    FROM winter_listings
-    GROUP BY rv_type
-    
-    UNION ALL
-    
-    SELECT 
-        'Regular' as category,
-        rv_type,
-        COUNT(*) as count,
-        AVG(base_price) as avg_price,
-        AVG(base_price) * 120 * 0.70 as summer_revenue_70pct,
-        AVG(base_price) * 120 * 0.50 as summer_revenue_50pct,
-        -- Limited winter operation
-        (AVG(base_price) * 120 * 0.70) + -- Summer high
-        (AVG(base_price) * 60 * 0.40) +  -- Shoulder medium
-        (AVG(base_price) * 30 * 0.10) as year_round_revenue -- Minimal winter
-    FROM regular_listings
-    GROUP BY rv_type
-    ORDER BY category, year_round_revenue DESC
-    """
-    
-    df_scenarios = pd.read_sql_query(query_revenue_scenarios, conn)
+    def revenue_scenarios(category, listings, winter_days, winter_occupancy):
+        scenarios = listings.groupby('rv_type', dropna=False, sort=False).agg(
+            count=('listing_id', 'size'),
+            avg_price=('base_price', 'mean'),
+        ).reset_index()
+        scenarios.insert(0, 'category', category)
+        avg_price = scenarios['avg_price']
+        scenarios['summer_revenue_70pct'] = avg_price * 120 * 0.70
+        scenarios['summer_revenue_50pct'] = avg_price * 120 * 0.50
+        scenarios['year_round_revenue'] = (
+            (avg_price * 120 * 0.70) +                      # Summer high
+            (avg_price * 60 * 0.40) +                       # Shoulder medium
+            (avg_price * winter_days * winter_occupancy)    # Winter
+        )
+        return scenarios
+    
+    df_scenarios = pd.concat([
+        # Year-round with winter capability
+        revenue_scenarios('Winter-Ready', priced[winter_ready], 185, 0.20),
+        # Limited winter operation
+        revenue_scenarios('Regular', priced[~winter_ready], 30, 0.10),
+    ])
+    df_scenarios = frames.sql_types(order_by(df_scenarios, ['category', 'year_round_revenue'], [True, False])
+                                    .reset_index(drop=True), integers=['count'])
     
     print("\nRevenue Scenarios: Winter-Ready vs Regular RVs")
     print("Summer = 120 days, Shoulder = 60 days, Winter = 185 days")
@@ -105,55 +85,25 @@ def analyze_seasonal_revenue():
     # 3. Occupancy Indicators from Review Data
     print("\n=== Occupancy Indicators Analysis ===")
     
-    query_occupancy_proxy = """
-    WITH review_velocity AS (
-        SELECT 
-            l.listing_id,
-            l.rv_type,
-            l.rv_year,
-            l.base_price,
-            l.num_reviews,
-            l.overall_rating,
-            CASE 
-                WHEN l.rv_year IS NOT NULL AND l.rv_year > 0 
-                THEN CAST(l.num_reviews AS FLOAT) / NULLIF(2025 - l.rv_year, 0)
-                ELSE NULL 
-            END as reviews_per_year,
-            CASE 
-                WHEN a.name = 'Full-Winter rental available' THEN 1 
-                ELSE 0 
-            END as is_winter_ready
-        FROM listings l
-        LEFT JOIN listing_amenities la ON l.listing_id = la.listing_id
-        LEFT JOIN amenities a ON la.amenity_id = a.amenity_id AND a.name = 'Full-Winter rental available'
-        WHERE l.num_reviews > 0
-        AND l.base_price IS NOT NULL
-    )
-    SELECT 
-        CASE 
-            WHEN reviews_per_year >= 10 THEN 'High Activity (10+ reviews/year)'
-            WHEN reviews_per_year >= 5 THEN 'Medium Activity (5-10 reviews/year)'
-            WHEN reviews_per_year >= 2 THEN 'Low Activity (2-5 reviews/year)'
-            ELSE 'Very Low Activity (<2 reviews/year)'
-        END as activity_level,
-        COUNT(*) as count,
-        AVG(base_price) as avg_price,
-        AVG(num_reviews) as avg_total_reviews,
-        AVG(overall_rating) as avg_rating,
-        AVG(is_winter_ready) * 100 as winter_ready_pct
-    FROM review_velocity
-    WHERE reviews_per_year IS NOT NULL
-    GROUP BY activity_level
-    ORDER BY 
-        CASE activity_level
-            WHEN 'High Activity (10+ reviews/year)' THEN 1
-            WHEN 'Medium Activity (5-10 reviews/year)' THEN 2
-            WHEN 'Low Activity (2-5 reviews/year)' THEN 3
-            ELSE 4
-        END
-    """
-    
-    df_occupancy = pd.read_sql_query(query_occupancy_proxy, conn)
+    # One row per listing and amenity, as the amenities are joined in
+    active = priced[(priced['num_reviews'] > 0) & (priced['rv_year'] > 0)]
+    active = active.assign(reviews_per_year=reviews_per_year(active))
+    active = active[active['reviews_per_year'].notna()]
+    velocity = active.merge(amenity_names, on='listing_id', how='left', sort=False)
+    activity_levels = ['High Activity (10+ reviews/year)', 'Medium Activity (5-10 reviews/year)',
+                       'Low Activity (2-5 reviews/year)', 'Very Low Activity (<2 reviews/year)']
+    rate = velocity['reviews_per_year']
+    velocity['activity_level'] = np.select([rate >= 10, rate >= 5, rate >= 2], activity_levels[:3],
+                                           default=activity_levels[3])
+    velocity['is_winter_ready'] = (velocity['name'] == WINTER_AMENITY).astype('int64')
+    df_occupancy = velocity.groupby('activity_level').agg(
+        count=('listing_id', 'size'),
+        avg_price=('base_price', 'mean'),
+        avg_total_reviews=('num_reviews', 'mean'),
+        avg_rating=('overall_rating', 'mean'),
+        winter_ready_pct=('is_winter_ready', 'mean'),
+    ).reindex([level for level in activity_levels if level in set(velocity['activity_level'])]).reset_index()
+    df_occupancy['winter_ready_pct'] = df_occupancy['winter_ready_pct'] * 100
     
     print("\nActivity Levels as Occupancy Proxy:")
     print("(Assuming 1 review per 3-4 bookings)")
@@ -169,30 +119,17 @@ def analyze_seasonal_revenue():
     # 4. Best Performing Winter-Ready Models
     print("\n=== Top Winter-Ready RV Models ===")
     
-    query_winter_models = """
-    SELECT 
-        l.rv_type,
-        l.rv_make,
-        l.rv_model,
-        COUNT(*) as count,
-        AVG(l.base_price) as avg_price,
-        AVG(l.num_reviews) as avg_reviews,
-        AVG(l.overall_rating) as avg_rating,
-        ROUND(AVG(l.base_price) * 365 * 0.35, 0) as est_annual_revenue_35pct
-    FROM listings l
-    JOIN listing_amenities la ON l.listing_id = la.listing_id
-    JOIN amenities a ON la.amenity_id = a.amenity_id
-    WHERE a.name = 'Full-Winter rental available'
-    AND l.rv_make IS NOT NULL
-    AND l.rv_model IS NOT NULL
-    AND l.base_price IS NOT NULL
-    GROUP BY l.rv_type, l.rv_make, l.rv_model
-    HAVING COUNT(*) >= 2
-    ORDER BY est_annual_revenue_35pct DESC
-    LIMIT 10
-    """
-    
-    df_winter_models = pd.read_sql_query(query_winter_models, conn)
+    winter_priced = priced[winter_ready & priced['rv_make'].notna() & priced['rv_model'].notna()]
+    df_winter_models = winter_priced.groupby(['rv_type', 'rv_make', 'rv_model'], dropna=False, sort=False).agg(
+        count=('listing_id', 'size'),
+        avg_price=('base_price', 'mean'),
+        avg_reviews=('num_reviews', 'mean'),
+        avg_rating=('overall_rating', 'mean'),
+    ).reset_index()
+    df_winter_models['est_annual_revenue_35pct'] = sql_round(df_winter_models['avg_price'] * 365 * 0.35, 0)
+    df_winter_models = order_by(df_winter_models[df_winter_models['count'] >= 2], ['rv_type', 'rv_make', 'rv_model'])
+    df_winter_models = frames.sql_types(order_by(df_winter_models, ['est_annual_revenue_35pct'], ascending=False)
+                                        .head(10).reset_index(drop=True), integers=['count'])
     
     print("Top Winter-Ready Models (min 2 units):")
     print(df_winter_models.to_string(index=False))
@@ -201,23 +138,17 @@ def analyze_seasonal_revenue():
     print("\n=== Seasonal Pricing Insights ===")
     
     # Since we don't have booking dates, analyze price variations
-    query_price_analysis = """
-    SELECT 
-        rv_type,
-        COUNT(*) as count,
-        MIN(base_price) as min_price,
-        AVG(base_price) as avg_price,
-        MAX(base_price) as max_price,
-        ROUND((MAX(base_price) - MIN(base_price)) / AVG(base_price) * 100, 1) as price_variance_pct
-    FROM listings
-    WHERE base_price IS NOT NULL
-    AND rv_type IS NOT NULL
-    GROUP BY rv_type
-    HAVING COUNT(*) >= 10
-    ORDER BY avg_price DESC
-    """
-    
-    df_pricing = pd.read_sql_query(query_price_analysis, conn)
+    df_pricing = priced[priced['rv_type'].notna()].groupby('rv_type').agg(
+        count=('listing_id', 'size'),
+        min_price=('base_price', 'min'),
+        avg_price=('base_price', 'mean'),
+        max_price=('base_price', 'max'),
+    ).reset_index()
+    df_pricing['price_variance_pct'] = sql_round(
+        (df_pricing['max_price'] - df_pricing['min_price']) / df_pricing['avg_price'] * 100, 1)
+    df_pricing = df_pricing[df_pricing['count'] >= 10]
+    df_pricing = frames.sql_types(order_by(df_pricing, ['avg_price'], ascending=False).reset_index(drop=True),
+                                  integers=['count'])
     
     print("\nPrice Variance by RV Type:")
     print(df_pricing.to_string(index=False))
@@ -236,16 +167,12 @@ def analyze_seasonal_revenue():
     print("   - Winter (Oct-Mar): 10-20% for winter-ready, 5% for regular")
     
     print("\n3. HIGH-ACTIVITY LISTING CHARACTERISTICS:")
-    high_activity_listings = pd.read_sql_query("""
-        SELECT 
-            rv_type,
-            AVG(base_price) as avg_price,
-            COUNT(*) as count
-        FROM listings
-        WHERE CAST(num_reviews AS FLOAT) / NULLIF(2025 - rv_year, 0) >= 10
-        AND rv_year IS NOT NULL
-        GROUP BY rv_type
-    """, conn)
+    listings = frames.listings
+    high_activity = listings[reviews_per_year(listings) >= 10]
+    high_activity_listings = frames.sql_types(high_activity.groupby('rv_type', dropna=False).agg(
+        avg_price=('base_price', 'mean'),
+        count=('listing_id', 'size'),
+    ).reset_index().pipe(order_by, ['rv_type']), integers=['count'])
     
     print("   High-activity listings by type:")
     for _, row in high_activity_listings.iterrows():
@@ -259,12 +186,10 @@ def analyze_seasonal_revenue():
         'winter_ready_models': df_winter_models.to_dict('records')
     }
     
-    with open('/home/chris/rvezy/data/processed/seasonal_analysis.json', 'w') as f:
+    with open(PROCESSED_DIR / 'seasonal_analysis.json', 'w') as f:
         json.dump(seasonal_data, f, indent=2)
     
-    print("\n✓ Seasonal analysis exported to: /home/chris/rvezy/data/processed/seasonal_analysis.json")
-    
-    conn.close()
+    print(f"\n✓ Seasonal analysis exported to: {PROCESSED_DIR / 'seasonal_analysis.json'}")
 
 if __name__ == "__main__":
     analyze_seasonal_revenue()
\ No newline at end of file
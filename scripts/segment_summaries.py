@@ -0,0 +1,254 @@
+import argparse
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict
+
+from rvezy_db import DB_PATH, bump_data_version, create_data_version_table
+
+# Reviews per year are measured against this year, as in the original queries
+CURRENT_YEAR = 2025
+
+# Bump when the summary columns or segment keys change; the next refresh
+# then rebuilds every segment
+SUMMARY_VERSION = 1
+
+# Price tiers, as (upper bound, label); listings without a price have no tier
+PRICE_TIERS = [
+    (125, 'Budget (<$125)'),
+    (175, 'Mid ($125-175)'),
+    (250, 'Upper ($175-250)'),
+    (None, 'Premium ($250+)'),
+]
+
+# Listing columns the summaries are computed from; an update that changes
+# none of them leaves every segment as it was
+SUMMARIZED_COLUMNS = ('rv_type', 'location_city', 'base_price', 'num_reviews', 'overall_rating',
+                      'rv_year', 'host_id')
+
+
+def price_tier_sql(row: str = '') -> str:
+    """SQL for the price tier of a listing (row is 'NEW.' or 'OLD.' in a trigger)"""
+    cases = ' '.join(f"WHEN {row}base_price < {bound} THEN '{label}'" for bound, label in PRICE_TIERS if bound)
+    return f"CASE WHEN {row}base_price IS NULL THEN NULL {cases} ELSE '{PRICE_TIERS[-1][1]}' END"
+
+
+def segment_key_sql(row: str = '') -> str:
+    """SQL for a listing's segment as a JSON array, which keeps NULL keys distinct from ''"""
+    return f"json_array({row}rv_type, {row}location_city, {price_tier_sql(row)})"
+
+
+# Additive aggregates per (rv_type, location_city, price_tier): averages are
+# sum / count over any set of segments, so a query over rv_types, cities or
+# tiers adds up a few rows instead of scanning listings
+SUMMARY_SELECT = f'''
+    SELECT
+        rv_type,
+        location_city,
+        {price_tier_sql()} AS price_tier,
+        COUNT(*) AS listing_count,
+        SUM(base_price) AS price_sum,
+        MIN(base_price) AS min_price,
+        MAX(base_price) AS max_price,
+        COUNT(num_reviews) AS review_count,
+        SUM(num_reviews) AS review_sum,
+        COUNT(CASE WHEN num_reviews >= 20 THEN 1 END) AS successful_count,
+        COUNT(overall_rating) AS rating_count,
+        SUM(overall_rating) AS rating_sum,
+        COUNT(CASE WHEN overall_rating >= 0 AND overall_rating <= 5 THEN overall_rating END) AS valid_rating_count,
+        SUM(CASE WHEN overall_rating >= 0 AND overall_rating <= 5 THEN overall_rating END) AS valid_rating_sum,
+        COUNT(CAST(num_reviews AS FLOAT) / NULLIF({CURRENT_YEAR} - rv_year, 0)) AS reviews_per_year_count,
+        SUM(CAST(num_reviews AS FLOAT) / NULLIF({CURRENT_YEAR} - rv_year, 0)) AS reviews_per_year_sum
+    FROM listings
+    {{where}}
+    GROUP BY 1, 2, 3
+'''
+
+# Hosts with listings in each segment, for distinct host counts across segments
+HOSTS_SELECT = f'''
+    SELECT rv_type, location_city, {price_tier_sql()} AS price_tier, host_id, COUNT(*) AS listing_count
+    FROM listings
+    {{where}}
+    GROUP BY 1, 2, 3, 4
+'''
+
+# One segment, found through idx_listings_city_type_price
+SEGMENT_WHERE = f'WHERE location_city IS ? AND rv_type IS ? AND {price_tier_sql()} IS ?'
+
+SUMMARY_COLUMNS = [
+    'rv_type', 'location_city', 'price_tier', 'listing_count', 'price_sum', 'min_price', 'max_price',
+    'review_count', 'review_sum', 'successful_count', 'rating_count', 'rating_sum', 'valid_rating_count',
+    'valid_rating_sum', 'reviews_per_year_count', 'reviews_per_year_sum',
+]
+
+
+def create_segment_tables(cursor: sqlite3.Cursor) -> None:
+    """Create the segment summary tables and the triggers that mark changed segments"""
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS segment_summaries (
+            rv_type TEXT,
+            location_city TEXT,
+            price_tier TEXT,
+            listing_count INTEGER NOT NULL,
+            price_sum REAL,
+            min_price REAL,
+            max_price REAL,
+            review_count INTEGER NOT NULL,
+            review_sum INTEGER,
+            successful_count INTEGER NOT NULL,
+            rating_count INTEGER NOT NULL,
+            rating_sum REAL,
+            valid_rating_count INTEGER NOT NULL,
+            valid_rating_sum REAL,
+            reviews_per_year_count INTEGER NOT NULL,
+            reviews_per_year_sum REAL
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_segment_summaries_key
+        ON segment_summaries (rv_type, location_city, price_tier)
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS segment_hosts (
+            rv_type TEXT,
+            location_city TEXT,
+            price_tier TEXT,
+            host_id INTEGER,
+            listing_count INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_segment_hosts_key
+        ON segment_hosts (rv_type, location_city, price_tier)
+    ''')
+    # Segments (as segment_key_sql arrays) whose listings changed since the last refresh
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS segment_summary_dirty (
+            segment TEXT PRIMARY KEY
+        ) WITHOUT ROWID
+    ''')
+    # Definition the summaries were built with (SUMMARY_VERSION/CURRENT_YEAR)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS segment_summary_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    ''')
+
+    # Not INSERT OR IGNORE: a trigger fired by the ETL's INSERT ... ON CONFLICT
+    # DO UPDATE takes the outer statement's conflict policy (ABORT), so an
+    # already-dirty segment would fail the listing write. An upsert clause
+    # inside the trigger is kept as written.
+    mark = 'INSERT INTO segment_summary_dirty (segment) VALUES ({}) ON CONFLICT(segment) DO NOTHING'
+    # Recreated every time so databases built with older trigger bodies pick up changes
+    for trigger in ('segment_summaries_insert', 'segment_summaries_delete', 'segment_summaries_update'):
+        cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    cursor.execute(f'''
+        CREATE TRIGGER segment_summaries_insert AFTER INSERT ON listings BEGIN
+            {mark.format(segment_key_sql('NEW.'))};
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER segment_summaries_delete AFTER DELETE ON listings BEGIN
+            {mark.format(segment_key_sql('OLD.'))};
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER segment_summaries_update AFTER UPDATE ON listings
+        WHEN {' OR '.join(f'OLD.{column} IS NOT NEW.{column}' for column in SUMMARIZED_COLUMNS)}
+        BEGIN
+            {mark.format(segment_key_sql('OLD.'))};
+            {mark.format(segment_key_sql('NEW.'))};
+        END
+    ''')
+
+
+def summary_definition() -> str:
+    return f'{SUMMARY_VERSION}/{CURRENT_YEAR}'
+
+
+def refresh_segment_summaries(cursor: sqlite3.Cursor) -> int:
+    """Recompute the segments whose listings changed since the last refresh (no commit).
+
+    Every segment is rebuilt when the summaries are new or were built with
+    another definition. Returns the number of segments recomputed.
+    """
+    cursor.execute("SELECT value FROM segment_summary_meta WHERE key = 'definition'")
+    built = cursor.fetchone()
+    if built is None or built[0] != summary_definition():
+        cursor.execute('DELETE FROM segment_summaries')
+        cursor.execute('DELETE FROM segment_hosts')
+        cursor.execute('DELETE FROM segment_summary_dirty')
+        cursor.execute(f"INSERT INTO segment_summaries ({', '.join(SUMMARY_COLUMNS)}) "
+                       f"{SUMMARY_SELECT.format(where='')}")
+        cursor.execute(f"INSERT INTO segment_hosts (rv_type, location_city, price_tier, host_id, listing_count) "
+                       f"{HOSTS_SELECT.format(where='')}")
+        cursor.execute("INSERT OR REPLACE INTO segment_summary_meta (key, value) VALUES ('definition', ?)",
+                       (summary_definition(),))
+        cursor.execute('SELECT COUNT(*) FROM segment_summaries')
+        return cursor.fetchone()[0]
+
+    cursor.execute('SELECT segment FROM segment_summary_dirty')
+    segments = [tuple(json.loads(row[0])) for row in cursor.fetchall()]
+    keys = [(city, rv_type, tier) for rv_type, city, tier in segments]
+    for table in ('segment_summaries', 'segment_hosts'):
+        cursor.executemany(f'''
+            DELETE FROM {table} WHERE location_city IS ? AND rv_type IS ? AND price_tier IS ?
+        ''', keys)
+    cursor.executemany(f"INSERT INTO segment_summaries ({', '.join(SUMMARY_COLUMNS)}) "
+                       f"{SUMMARY_SELECT.format(where=SEGMENT_WHERE)}", keys)
+    cursor.executemany(f"INSERT INTO segment_hosts (rv_type, location_city, price_tier, host_id, listing_count) "
+                       f"{HOSTS_SELECT.format(where=SEGMENT_WHERE)}", keys)
+    cursor.execute('DELETE FROM segment_summary_dirty')
+    return len(segments)
+
+
+def summaries_current(conn: sqlite3.Connection) -> bool:
+    """Whether the materialized summaries exist and match listings (nothing left to refresh)"""
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if not {'segment_summaries', 'segment_hosts', 'segment_summary_dirty', 'segment_summary_meta'} <= tables:
+        return False
+    built = conn.execute("SELECT value FROM segment_summary_meta WHERE key = 'definition'").fetchone()
+    if built is None or built[0] != summary_definition():
+        return False
+    return conn.execute('SELECT 1 FROM segment_summary_dirty LIMIT 1').fetchone() is None
+
+
+def segment_sources(conn: sqlite3.Connection) -> Dict[str, str]:
+    """FROM-clause sources for segment_summaries and segment_hosts.
+
+    These are the materialized tables when they are current. Otherwise (a
+    database the ETL has not refreshed, e.g. opened read-only) they are the
+    same aggregates computed from listings, so readers never see stale totals.
+    """
+    if summaries_current(conn):
+        return {'segment_summaries': 'segment_summaries', 'segment_hosts': 'segment_hosts'}
+    return {
+        'segment_summaries': f"({SUMMARY_SELECT.format(where='')})",
+        'segment_hosts': f"({HOSTS_SELECT.format(where='')})",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the per-segment summary tables of the listings database")
+    parser.add_argument('--db', default=str(DB_PATH), help="SQLite database to refresh")
+    parser.add_argument('--rebuild', action='store_true', help="recompute every segment, not just changed ones")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(Path(args.db))
+    cursor = conn.cursor()
+    create_segment_tables(cursor)
+    if args.rebuild:
+        cursor.execute("DELETE FROM segment_summary_meta WHERE key = 'definition'")
+    refreshed = refresh_segment_summaries(cursor)
+    if refreshed:
+        create_data_version_table(cursor)
+        bump_data_version(cursor)
+    conn.commit()
+    cursor.execute('SELECT COUNT(*) FROM segment_summaries')
+    print(f"Refreshed {refreshed} segments ({cursor.fetchone()[0]} in {args.db})")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
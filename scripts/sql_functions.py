@@ -0,0 +1,121 @@
+import math
+import sqlite3
+from bisect import bisect_left
+from typing import List, Optional
+
+
+def percentile_of(ordered: List[float], p: float) -> Optional[float]:
+    """The p-th percentile (0-100) of sorted values, interpolated linearly
+    between the closest ranks exactly as numpy.percentile and pandas'
+    quantile do (PERCENTILE_CONT); None for no values"""
+    if not ordered:
+        return None
+    index = (len(ordered) - 1) * (p / 100)
+    if index >= len(ordered) - 1:
+        return float(ordered[-1])
+    lower = math.floor(index)
+    gamma = index - lower
+    a, b = ordered[lower], ordered[lower + 1]
+    # numpy's lerp: from the nearer end, so the result is monotonic in gamma
+    if gamma >= 0.5:
+        return float(b - (b - a) * (1 - gamma))
+    return float(a + (b - a) * gamma)
+
+
+class Quantiles:
+    """Non-NULL values of a group or window frame, sorted when a quantile is read.
+
+    As a window function SQLite calls inverse() for rows leaving the frame,
+    so a moving median costs a sort of the frame only when it changed order.
+    """
+
+    def __init__(self):
+        self.values = []
+        self.ordered = True
+
+    def add(self, value) -> None:
+        if value is None:
+            return
+        if self.values and value < self.values[-1]:
+            self.ordered = False
+        self.values.append(value)
+
+    def inverse(self, value, *args) -> None:
+        if value is None:
+            return
+        self.sort()
+        del self.values[bisect_left(self.values, value)]
+
+    def sort(self) -> None:
+        if not self.ordered:
+            self.values.sort()
+            self.ordered = True
+
+    def value(self):
+        return self.finalize()
+
+
+class Median(Quantiles):
+    """median(x): the middle value, or the mean of the two middle values, as numpy.median"""
+
+    def step(self, value) -> None:
+        self.add(value)
+
+    def finalize(self) -> Optional[float]:
+        self.sort()
+        count = len(self.values)
+        if not count:
+            return None
+        middle = count // 2
+        if count % 2:
+            return float(self.values[middle])
+        return (self.values[middle - 1] + self.values[middle]) / 2
+
+
+class Percentile(Quantiles):
+    """percentile(x, p): the p-th percentile (p from 0 to 100) of x"""
+
+    def __init__(self):
+        super().__init__()
+        self.p = None
+
+    def step(self, value, p) -> None:
+        if p is None or not 0 <= p <= 100:
+            raise ValueError(f"percentile() needs p between 0 and 100, got {p!r}")
+        self.p = p
+        self.add(value)
+
+    def finalize(self) -> Optional[float]:
+        self.sort()
+        return percentile_of(self.values, self.p)
+
+
+class InterquartileRange(Quantiles):
+    """iqr(x): 75th less 25th percentile of x"""
+
+    def step(self, value) -> None:
+        self.add(value)
+
+    def finalize(self) -> Optional[float]:
+        self.sort()
+        if not self.values:
+            return None
+        return percentile_of(self.values, 75) - percentile_of(self.values, 25)
+
+
+# SQL name -> (argument count, implementation)
+AGGREGATES = {
+    'median': (1, Median),
+    'percentile': (2, Percentile),
+    'iqr': (1, InterquartileRange),
+}
+
+
+def register_functions(conn: sqlite3.Connection) -> None:
+    """Add the quantile aggregates to a connection, usable in GROUP BY queries
+    and, on Python 3.11+ with SQLite 3.25+, as window functions (OVER ...)"""
+    for name, (arguments, implementation) in AGGREGATES.items():
+        if hasattr(conn, 'create_window_function'):
+            conn.create_window_function(name, arguments, implementation)
+        else:
+            conn.create_aggregate(name, arguments, implementation)
@@ -1,46 +1,32 @@
-import sqlite3
+import json
+from typing import Optional
+
 import pandas as pd
 import numpy as np
-from pathlib import Path
-import json
 
-def analyze_top_performers():
+from analytics_frames import CURRENT_YEAR, AnalyticsFrames, order_by, reviews_per_year, shared_frames, sql_round
+from rvezy_db import PROCESSED_DIR
+
+def analyze_top_performers(frames: Optional[AnalyticsFrames] = None):
     """Analyze top performing listings to identify success factors"""
     
-    db_path = Path("/home/chris/rvezy/data/processed/rvezy_listings.db")
-    conn = sqlite3.connect(db_path)
+    frames = frames or shared_frames()
+    listings = frames.listings
+    hosted = frames.listings_hosts.rename(columns={'name': 'host_name'})
+    top_performer = listings['num_reviews'] >= 20
     
     print("=== RVezy Top Performer Analysis ===\n")
     
     # 1. Top Listings by Reviews
     print("=== Top 20 Listings by Review Count ===")
     
-    query_top_reviews = """
-    SELECT 
-        l.rv_type,
-        l.rv_year,
-        l.rv_make,
-        l.rv_model,
-        l.base_price,
-        l.num_reviews,
-        l.overall_rating,
-        l.location_city,
-        l.sleeps,
-        l.length_ft,
-        l.delivery_available,
-        l.pet_friendly,
-        h.name as host_name,
-        h.is_superhost,
-        h.response_rate,
-        ROUND(CAST(l.num_reviews AS FLOAT) / NULLIF(2025 - l.rv_year, 0), 2) as reviews_per_year
-    FROM listings l
-    JOIN hosts h ON l.host_id = h.host_id
-    WHERE l.num_reviews IS NOT NULL
-    ORDER BY l.num_reviews DESC
-    LIMIT 20
-    """
-    
-    df_top_reviews = pd.read_sql_query(query_top_reviews, conn)
+    # Ties come newest listing first, as read backwards through the num_reviews index
+    reviewed = order_by(hosted[hosted['num_reviews'].notna()], ['num_reviews', 'listing_id'], ascending=False).head(20)
+    df_top_reviews = frames.sql_types(reviewed[[
+        'rv_type', 'rv_year', 'rv_make', 'rv_model', 'base_price', 'num_reviews', 'overall_rating',
+        'location_city', 'sleeps', 'length_ft', 'delivery_available', 'pet_friendly', 'host_name',
+        'is_superhost', 'response_rate'
+    ]].assign(reviews_per_year=sql_round(reviews_per_year(reviewed), 2)).reset_index(drop=True))
     
     print("Highest Review Count Listings:")
     print(df_top_reviews[['rv_type', 'rv_year', 'rv_make', 'rv_model', 'base_price', 
@@ -50,50 +36,24 @@ def analyze_top_performers():
     print("\n=== Success Factors Analysis ===")
     
     # Define success as listings with 20+ reviews
-    query_success_factors = """
-    WITH successful_listings AS (
-        SELECT listing_id
-        FROM listings
-        WHERE num_reviews >= 20
-    ),
-    all_listings AS (
-        SELECT listing_id
-        FROM listings
-        WHERE base_price IS NOT NULL
-    )
-    SELECT 
-        'Successful (20+ reviews)' as category,
-        COUNT(*) as count,
-        AVG(l.base_price) as avg_price,
-        AVG(l.overall_rating) as avg_rating,
-        AVG(h.response_rate) as avg_response_rate,
-        AVG(h.is_superhost) * 100 as superhost_pct,
-        AVG(l.delivery_available) * 100 as delivery_pct,
-        AVG(l.pet_friendly) * 100 as pet_friendly_pct,
-        AVG(CASE WHEN l.flexible_pickup = 1 AND l.flexible_dropoff = 1 THEN 1 ELSE 0 END) * 100 as flexible_times_pct
-    FROM successful_listings sl
-    JOIN listings l ON sl.listing_id = l.listing_id
-    JOIN hosts h ON l.host_id = h.host_id
-    
-    UNION ALL
-    
-    SELECT 
-        'Others (<20 reviews)' as category,
-        COUNT(*) as count,
-        AVG(l.base_price) as avg_price,
-        AVG(l.overall_rating) as avg_rating,
-        AVG(h.response_rate) as avg_response_rate,
-        AVG(h.is_superhost) * 100 as superhost_pct,
-        AVG(l.delivery_available) * 100 as delivery_pct,
-        AVG(l.pet_friendly) * 100 as pet_friendly_pct,
-        AVG(CASE WHEN l.flexible_pickup = 1 AND l.flexible_dropoff = 1 THEN 1 ELSE 0 END) * 100 as flexible_times_pct
-    FROM listings l
-    JOIN hosts h ON l.host_id = h.host_id
-    WHERE l.listing_id NOT IN (SELECT listing_id FROM successful_listings)
-    AND l.base_price IS NOT NULL
-    """
-    
-    df_success = pd.read_sql_query(query_success_factors, conn)
+    def success_factors(category, group):
+        return {
+            'category': category,
+            'count': len(group),
+            'avg_price': group['base_price'].mean(),
+            'avg_rating': group['overall_rating'].mean(),
+            'avg_response_rate': group['response_rate'].mean(),
+            'superhost_pct': group['is_superhost'].mean() * 100,
+            'delivery_pct': group['delivery_available'].mean() * 100,
+            'pet_friendly_pct': group['pet_friendly'].mean() * 100,
+            'flexible_times_pct': ((group['flexible_pickup'] == 1) & (group['flexible_dropoff'] == 1)).mean() * 100,
+        }
+    
+    successful = hosted['num_reviews'] >= 20
+    df_success = pd.DataFrame([
+        success_factors('Successful (20+ reviews)', hosted[successful]),
+        success_factors('Others (<20 reviews)', hosted[~successful & hosted['base_price'].notna()]),
+    ])
     
     print("Success Factor Comparison:")
     print(df_success.to_string(index=False))
@@ -101,29 +61,14 @@ def analyze_top_performers():
     # 3. Top Performers by Revenue Efficiency
     print("\n=== Top Performers by Revenue Efficiency ===")
     
-    query_revenue_efficiency = """
-    SELECT 
-        l.rv_type,
-        l.rv_make,
-        l.rv_model,
-        l.rv_year,
-        l.base_price,
-        l.num_reviews,
-        l.overall_rating,
-        ROUND(l.base_price * l.num_reviews / NULLIF(2025 - l.rv_year, 0), 2) as revenue_efficiency_score,
-        h.name as host_name,
-        h.is_superhost
-    FROM listings l
-    JOIN hosts h ON l.host_id = h.host_id
-    WHERE l.num_reviews >= 10
-    AND l.rv_year IS NOT NULL
-    AND l.rv_year > 0
-    AND l.base_price IS NOT NULL
-    ORDER BY revenue_efficiency_score DESC
-    LIMIT 15
-    """
-    
-    df_efficiency = pd.read_sql_query(query_revenue_efficiency, conn)
+    efficient = hosted[(hosted['num_reviews'] >= 10) & (hosted['rv_year'] > 0) & hosted['base_price'].notna()]
+    age = (CURRENT_YEAR - efficient['rv_year']).replace(0, np.nan)
+    efficient = efficient.assign(
+        revenue_efficiency_score=sql_round(efficient['base_price'] * efficient['num_reviews'] / age, 2))
+    df_efficiency = frames.sql_types(order_by(efficient, ['revenue_efficiency_score'], ascending=False).head(15)[[
+        'rv_type', 'rv_make', 'rv_model', 'rv_year', 'base_price', 'num_reviews', 'overall_rating',
+        'revenue_efficiency_score', 'host_name', 'is_superhost'
+    ]].reset_index(drop=True))
     
     print("Top Revenue Efficiency Scores (Price × Reviews/Year):")
     print(df_efficiency.to_string(index=False))
@@ -131,22 +76,20 @@ def analyze_top_performers():
     # 4. Location Analysis for Top Performers
     print("\n=== Geographic Distribution of Top Performers ===")
     
-    query_location = """
-    SELECT 
-        location_city,
-        COUNT(*) as total_listings,
-        COUNT(CASE WHEN num_reviews >= 20 THEN 1 END) as top_performers,
-        ROUND(COUNT(CASE WHEN num_reviews >= 20 THEN 1 END) * 100.0 / COUNT(*), 1) as success_rate,
-        AVG(base_price) as avg_price,
-        AVG(CASE WHEN num_reviews >= 20 THEN base_price END) as avg_price_top
-    FROM listings
-    WHERE location_city IS NOT NULL
-    GROUP BY location_city
-    HAVING COUNT(*) >= 10
-    ORDER BY success_rate DESC
-    """
-    
-    df_location = pd.read_sql_query(query_location, conn)
+    located = listings[listings['location_city'].notna()]
+    df_location = located.assign(
+        top=top_performer,
+        price_top=located['base_price'].where(top_performer),
+    ).groupby('location_city').agg(
+        total_listings=('listing_id', 'size'),
+        top_performers=('top', 'sum'),
+        avg_price=('base_price', 'mean'),
+        avg_price_top=('price_top', 'mean'),
+    ).reset_index()
+    df_location = df_location[df_location['total_listings'] >= 10]
+    df_location.insert(3, 'success_rate', sql_round(df_location['top_performers'] * 100.0 / df_location['total_listings'], 1))
+    df_location = frames.sql_types(order_by(df_location, ['success_rate'], ascending=False).reset_index(drop=True),
+                                   integers=['total_listings', 'top_performers'])
     
     print("Success Rates by City (min 10 listings):")
     print(df_location.head(10).to_string(index=False))
@@ -154,29 +97,16 @@ def analyze_top_performers():
     # 5. Pricing Strategy of Top Performers
     print("\n=== Pricing Strategy Analysis ===")
     
-    query_pricing_strategy = """
-    WITH market_averages AS (
-        SELECT 
-            rv_type,
-            AVG(base_price) as market_avg_price
-        FROM listings
-        WHERE base_price IS NOT NULL
-        GROUP BY rv_type
-    )
-    SELECT 
-        l.rv_type,
-        COUNT(*) as count,
-        AVG(l.base_price) as avg_price_top_performers,
-        ma.market_avg_price,
-        ROUND((AVG(l.base_price) / ma.market_avg_price - 1) * 100, 1) as price_vs_market_pct
-    FROM listings l
-    JOIN market_averages ma ON l.rv_type = ma.rv_type
-    WHERE l.num_reviews >= 20
-    AND l.base_price IS NOT NULL
-    GROUP BY l.rv_type, ma.market_avg_price
-    """
-    
-    df_pricing = pd.read_sql_query(query_pricing_strategy, conn)
+    market_avg_price = frames.priced.groupby('rv_type')['base_price'].mean()
+    top_priced = listings[top_performer & listings['base_price'].notna() & listings['rv_type'].notna()]
+    df_pricing = top_priced.groupby('rv_type').agg(
+        count=('listing_id', 'size'),
+        avg_price_top_performers=('base_price', 'mean'),
+    ).reset_index()
+    df_pricing['market_avg_price'] = df_pricing['rv_type'].map(market_avg_price)
+    df_pricing['price_vs_market_pct'] = sql_round(
+        (df_pricing['avg_price_top_performers'] / df_pricing['market_avg_price'] - 1) * 100, 1)
+    df_pricing = frames.sql_types(df_pricing, integers=['count'])
     
     print("Top Performers Pricing vs Market Average:")
     print(df_pricing.to_string(index=False))
@@ -184,28 +114,18 @@ def analyze_top_performers():
     # 6. Amenity Analysis for Top Performers
     print("\n=== Key Amenities of Top Performers ===")
     
-    query_amenities = """
-    WITH top_performers AS (
-        SELECT listing_id
-        FROM listings
-        WHERE num_reviews >= 20
-    )
-    SELECT 
-        a.name,
-        COUNT(CASE WHEN tp.listing_id IS NOT NULL THEN 1 END) as top_performer_count,
-        COUNT(*) as total_count,
-        ROUND(COUNT(CASE WHEN tp.listing_id IS NOT NULL THEN 1 END) * 100.0 / 
-              (SELECT COUNT(*) FROM top_performers), 1) as adoption_by_top_pct
-    FROM listing_amenities la
-    JOIN amenities a ON la.amenity_id = a.amenity_id
-    LEFT JOIN top_performers tp ON la.listing_id = tp.listing_id
-    GROUP BY a.name
-    HAVING COUNT(CASE WHEN tp.listing_id IS NOT NULL THEN 1 END) >= 20
-    ORDER BY adoption_by_top_pct DESC
-    LIMIT 15
-    """
-    
-    df_amenities = pd.read_sql_query(query_amenities, conn)
+    top_ids = listings.loc[top_performer, 'listing_id']
+    df_amenities = frames.amenities.assign(
+        top=frames.amenities['listing_id'].isin(top_ids),
+    ).groupby('name').agg(
+        top_performer_count=('top', 'sum'),
+        total_count=('listing_id', 'size'),
+    ).reset_index()
+    df_amenities = df_amenities[df_amenities['top_performer_count'] >= 20]
+    df_amenities['adoption_by_top_pct'] = sql_round(
+        df_amenities['top_performer_count'] * 100.0 / (len(top_ids) or np.nan), 1)
+    df_amenities = frames.sql_types(order_by(df_amenities, ['adoption_by_top_pct'], ascending=False).head(15)
+                                    .reset_index(drop=True), integers=['top_performer_count', 'total_count'])
     
     print("Most Common Amenities Among Top Performers:")
     print(df_amenities.to_string(index=False))
@@ -213,40 +133,20 @@ def analyze_top_performers():
     # 7. Host Characteristics
     print("\n=== Top Performer Host Analysis ===")
     
-    query_hosts = """
-    WITH host_performance AS (
-        SELECT 
-            h.host_id,
-            h.name,
-            h.joined_year,
-            h.response_rate,
-            h.is_superhost,
-            COUNT(l.listing_id) as num_listings,
-            SUM(l.num_reviews) as total_reviews,
-            AVG(l.base_price) as avg_price,
-            AVG(l.overall_rating) as avg_rating
-        FROM hosts h
-        JOIN listings l ON h.host_id = l.host_id
-        WHERE l.base_price IS NOT NULL
-        GROUP BY h.host_id
-    )
-    SELECT 
-        name as host_name,
-        joined_year,
-        response_rate,
-        is_superhost,
-        num_listings,
-        total_reviews,
-        ROUND(avg_price, 2) as avg_price,
-        ROUND(avg_rating, 2) as avg_rating,
-        ROUND(total_reviews * 1.0 / num_listings, 1) as reviews_per_listing
-    FROM host_performance
-    WHERE total_reviews >= 50
-    ORDER BY total_reviews DESC
-    LIMIT 15
-    """
-    
-    df_hosts = pd.read_sql_query(query_hosts, conn)
+    portfolios = frames.host_portfolios
+    portfolios = portfolios[portfolios['total_reviews'] >= 50]
+    portfolios = order_by(portfolios, ['total_reviews'], ascending=False).head(15)
+    df_hosts = frames.sql_types(pd.DataFrame({
+        'host_name': portfolios['name'],
+        'joined_year': portfolios['joined_year'],
+        'response_rate': portfolios['response_rate'],
+        'is_superhost': portfolios['is_superhost'],
+        'num_listings': portfolios['num_listings'],
+        'total_reviews': portfolios['total_reviews'],
+        'avg_price': sql_round(portfolios['avg_price'], 2),
+        'avg_rating': sql_round(portfolios['avg_rating'], 2),
+        'reviews_per_listing': sql_round(portfolios['total_reviews'] * 1.0 / portfolios['num_listings'], 1),
+    }).reset_index(drop=True), integers=['num_listings', 'total_reviews'])
     
     print("Top Hosts by Total Reviews:")
     print(df_hosts.to_string(index=False))
@@ -292,12 +192,10 @@ def analyze_top_performers():
         'top_hosts': df_hosts.to_dict('records')
     }
     
-    with open('/home/chris/rvezy/data/processed/top_performer_analysis.json', 'w') as f:
+    with open(PROCESSED_DIR / 'top_performer_analysis.json', 'w') as f:
         json.dump(top_performer_data, f, indent=2, default=str)
     
-    print("\n✓ Top performer analysis exported to: /home/chris/rvezy/data/processed/top_performer_analysis.json")
-    
-    conn.close()
+    print(f"\n✓ Top performer analysis exported to: {PROCESSED_DIR / 'top_performer_analysis.json'}")
 
 if __name__ == "__main__":
     analyze_top_performers()
\ No newline at end of file